@@ -0,0 +1,427 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Loading a CSV into Typed Columns with `mmap`**
+# MAGIC
+# MAGIC The csv demos load `students.csv` / `employee.csv` **row by row**:
+# MAGIC
+# MAGIC ```
+# MAGIC with open(input_csv_filepath, mode="r") as f:
+# MAGIC     rows = csv.DictReader(f)
+# MAGIC     for row in rows:
+# MAGIC         print(row)          # {'emp_id': '101', 'name': 'Sam', 'salary': '45000'}
+# MAGIC ```
+# MAGIC
+# MAGIC If we keep those rows (`list(csv.DictReader(f))`), **every row is a dict** and **every value is a separate `str`**.
+# MAGIC A 4-column row costs around **400 bytes**, even when the numbers themselves need 8 bytes each.
+# MAGIC
+# MAGIC In this lesson we build `ColumnarCsv`:
+# MAGIC 1. **memory-map** the file (`mmap`) — the OS gives us the bytes, no copy into a Python `str`
+# MAGIC 2. scan the **line offsets** once
+# MAGIC 3. fill **typed columns** directly: `array('q')` for ints, `array('d')` for floats, **interned** strings for text
+# MAGIC 4. optional **NumPy** output (zero-copy for numeric columns)
+# MAGIC 5. a `DictReader`-style **row view**, so existing loops keep working
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. What `mmap` Gives Us
+# MAGIC
+# MAGIC `mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)` maps the file into memory:
+# MAGIC - it behaves like a **read-only `bytes`** object: `mm[10:20]`, `mm.find(b"\n", pos)`, `len(mm)`
+# MAGIC - pages are loaded **lazily** by the OS as we touch them, and shared with the OS file cache
+# MAGIC - nothing is decoded until we ask for it
+# MAGIC
+# MAGIC `int(b"101")` and `float(b"45000.5")` accept **bytes** directly, so numeric columns never become `str` at all.
+
+# COMMAND ----------
+
+# DBTITLE 1, Imports and a Tiny mmap Example
+import os
+import csv
+import sys
+import mmap
+import time
+import random
+import tempfile
+import itertools
+import tracemalloc
+from array import array
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:                     # NumPy is optional
+    np = None
+
+workdir = tempfile.mkdtemp()
+students_csv = os.path.join(workdir, "students.csv")
+with open(students_csv, "w", newline="") as f:
+    f.write("id,name,marks\n1,anil,11.11\n2,bharath,22.22\n3,chandu,33.33\n4,david,44.44\n")
+
+with open(students_csv, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    print(len(mm), mm[:13], mm.find(b"\n"))
+    print(int(mm[14:15]), float(mm[21:26]))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. Scanning Line Offsets Once
+# MAGIC
+# MAGIC `offsets[i]` is the byte position where line `i` starts; one extra entry at the end marks the end of the data.
+# MAGIC Line `i` is then simply `mm[offsets[i]:offsets[i + 1]]`.
+# MAGIC
+# MAGIC - with NumPy: compare **all bytes at once** with `b"\n"` → `np.flatnonzero` (runs in C)
+# MAGIC - without NumPy: a loop over `mm.find(b"\n", pos)` (the search itself runs in C, one Python step per line)
+# MAGIC
+# MAGIC The offsets are stored in an `array('q')` (8 bytes per line) and are later used to cut the file into **blocks**
+# MAGIC of whole lines, so we never hold more than one block of temporary objects.
+
+# COMMAND ----------
+
+# DBTITLE 1, line_offsets
+def line_offsets(mm, start=0):
+    """Start offset of every line from `start` on, plus one final entry = end of the data."""
+    end = len(mm)
+    if np is not None:
+        newlines = np.flatnonzero(np.frombuffer(mm, dtype=np.uint8)[start:] == ord("\n"))
+        offsets = array("q", [start])
+        offsets.frombytes((newlines + (start + 1)).astype(np.int64).tobytes())
+    else:
+        offsets = array("q", [start])
+        find = mm.find
+        pos = find(b"\n", start)
+        while pos >= 0:
+            offsets.append(pos + 1)
+            pos = find(b"\n", pos + 1)
+    if offsets[-1] != end:              # last line has no trailing newline
+        offsets.append(end)
+    return offsets
+
+
+with open(students_csv, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    offs = line_offsets(mm)
+    print(offs.tolist())
+    print([mm[offs[i]:offs[i + 1]] for i in range(len(offs) - 1)])
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Filling Typed Columns Block by Block
+# MAGIC
+# MAGIC For every block of lines (65,536 by default):
+# MAGIC
+# MAGIC ```
+# MAGIC b"1,anil,11.11\n2,bharath,22.22"
+# MAGIC   → .replace(b"\n", b",").split(b",")   → [b"1", b"anil", b"11.11", b"2", b"bharath", b"22.22"]
+# MAGIC   → flat[0::3] → array('q', map(int, ...))       ids
+# MAGIC   → flat[1::3] → interned str                     names
+# MAGIC   → flat[2::3] → array('d', map(float, ...))     marks
+# MAGIC ```
+# MAGIC
+# MAGIC **Interning** (`sys.intern`) makes equal strings share **one** object. A `department` column with 1 million
+# MAGIC rows but 5 departments then holds 5 strings, and the column itself is just a list of 8-byte pointers.
+# MAGIC
+# MAGIC ⚠️ Splitting on `,` is only correct when there are **no quoted values** (`"eswar, jr."`).
+# MAGIC If the file contains a quote character anywhere, the loader uses `csv.reader` for the parsing instead —
+# MAGIC slower, but always correct. The columns are the same either way.
+
+# COMMAND ----------
+
+# DBTITLE 1, ColumnarCsv
+_TYPECODES = {int: "q", float: "d"}
+
+
+def _decode_intern(values, encoding):
+    return [sys.intern(v.decode(encoding)) for v in values]
+
+
+class ColumnarCsv:
+    def __init__(self, schema, columns, line_offsets=None):
+        self.schema = dict(schema)                 # {"id": int, "name": str, "marks": float}
+        self.fieldnames = list(self.schema)        # same attribute name as csv.DictReader
+        self.columns = columns                     # {"id": array('q'), "name": [...], "marks": array('d')}
+        self.line_offsets = line_offsets
+        self._length = len(next(iter(columns.values()))) if columns else 0
+
+    # ---- loading ----
+    @classmethod
+    def _empty_columns(cls, schema):
+        return {name: array(_TYPECODES[conv]) if conv in _TYPECODES else [] for name, conv in schema.items()}
+
+    @classmethod
+    def load(cls, path, schema, has_header=True, encoding="utf-8", block_lines=65_536):
+        schema = dict(schema)
+        if os.path.getsize(path) == 0:
+            return cls(schema, cls._empty_columns(schema), array("q"))
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            if has_header:
+                start = mm.find(b"\n") + 1 or len(mm)
+                header = mm[:start].decode(encoding).strip().split(",")
+                if header != list(schema):
+                    raise ValueError(f"header {header} does not match schema {list(schema)}")
+
+            if mm.find(b'"', start) >= 0:
+                return cls._load_with_csv_module(path, schema, has_header, encoding)
+
+            offsets = line_offsets(mm, start)
+            columns = cls._empty_columns(schema)
+            for first in range(0, len(offsets) - 1, block_lines):
+                last = min(first + block_lines, len(offsets) - 1)
+                cls._fill_block(columns, schema, mm[offsets[first]:offsets[last]], encoding)
+        return cls(schema, columns, offsets)
+
+    @classmethod
+    def _fill_block(cls, columns, schema, block, encoding):
+        lines = block.replace(b"\r\n", b"\n").rstrip(b"\n")
+        if not lines:
+            return
+        width = len(schema)
+        raw = lines.split(b"\n")
+        # every line needs width - 1 commas: with only a total count, a long and a short row cancel out
+        if set(map(bytes.count, raw, itertools.repeat(b",", len(raw)))) == {width - 1}:
+            flat = lines.replace(b"\n", b",").split(b",")
+        else:                                                       # blank lines or a bad row somewhere
+            rows = [line.split(b",") for line in raw if line.strip()]
+            bad = [row for row in rows if len(row) != width]
+            if bad:
+                raise ValueError(f"expected {width} fields, got {len(bad[0])}: {bad[0]}")
+            flat = [value for row in rows for value in row]
+        for i, (name, conv) in enumerate(schema.items()):
+            values = flat[i::width]
+            if conv is str:
+                columns[name].extend(_decode_intern(values, encoding))
+            elif conv in _TYPECODES:
+                columns[name].extend(map(conv, values))              # int(b"1"), float(b"1.5") work on bytes
+            else:
+                columns[name].extend(conv(v.decode(encoding)) for v in values)
+
+    @classmethod
+    def _load_with_csv_module(cls, path, schema, has_header, encoding):
+        columns = cls._empty_columns(schema)
+        appenders = [(columns[name].append, conv) for name, conv in schema.items()]
+        with open(path, newline="", encoding=encoding) as f:
+            reader = csv.reader(f)
+            if has_header:
+                next(reader, None)
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) != len(appenders):
+                    raise ValueError(f"expected {len(appenders)} fields, got {len(row)}: {row}")
+                for (append, conv), value in zip(appenders, row):
+                    append(sys.intern(value) if conv is str else conv(value))
+        return cls(schema, columns)
+
+    # ---- access ----
+    def __len__(self):
+        return self._length
+
+    def column(self, name):
+        return self.columns[name]
+
+    def row(self, i):
+        if not -self._length <= i < self._length:
+            raise IndexError("row index out of range")
+        return CsvRow(self, i % self._length)
+
+    def __iter__(self):
+        """Rows as read-only dict-like views — a drop-in for iterating over csv.DictReader."""
+        for i in range(self._length):
+            yield CsvRow(self, i)
+
+    def to_numpy(self):
+        """{name: ndarray}; numeric columns share memory with the arrays (no copy)."""
+        if np is None:
+            raise ImportError("to_numpy() needs NumPy: pip install numpy")
+        result = {}
+        for name, col in self.columns.items():
+            if isinstance(col, array):
+                result[name] = np.frombuffer(col, dtype=np.int64 if col.typecode == "q" else np.float64)
+            else:
+                result[name] = np.array(col, dtype=object)
+        return result
+
+    def nbytes(self):
+        """Approximate memory of the columns (distinct strings counted once)."""
+        total = 0
+        for col in self.columns.values():
+            if isinstance(col, array):
+                total += col.buffer_info()[1] * col.itemsize
+            else:
+                total += sys.getsizeof(col) + sum(map(sys.getsizeof, {id(s): s for s in col}.values()))
+        return total
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. A `DictReader`-Compatible Row View
+# MAGIC
+# MAGIC `CsvRow` stores only the table and a row number (`__slots__`, no `__dict__`). It inherits from
+# MAGIC `collections.abc.Mapping`, so everything that works on a read-only dict works on it:
+# MAGIC `row["name"]`, `row.get(...)`, `row.keys()`, `row.items()`, `"name" in row`, `dict(row)`.
+# MAGIC
+# MAGIC One difference from `csv.DictReader`: values are already **typed** (`101`, not `'101'`).
+# MAGIC Old code that did `int(row["emp_id"])` or `float(row["salary"])` still works, because `int(101) == 101`.
+
+# COMMAND ----------
+
+# DBTITLE 1, CsvRow
+class CsvRow(Mapping):
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, name):
+        return self._table.columns[name][self._i]
+
+    def __iter__(self):
+        return iter(self._table.fieldnames)
+
+    def __len__(self):
+        return len(self._table.fieldnames)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 5. Loading `students.csv` and `employee.csv`
+
+# COMMAND ----------
+
+# DBTITLE 1, students.csv
+students = ColumnarCsv.load(students_csv, {"id": int, "name": str, "marks": float})
+print(len(students), students.fieldnames)
+print(students.column("marks"))
+
+for row in students:                     # same loop as with csv.DictReader
+    print(row["id"], row["name"], row["marks"])
+
+print(dict(students.row(-1)))
+print(students.line_offsets)
+
+# COMMAND ----------
+
+# DBTITLE 1, employee.csv (with a quoted value → csv.reader path)
+employee_csv = os.path.join(workdir, "employee.csv")
+with open(employee_csv, "w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow(["emp_id", "name", "salary", "department"])
+    writer.writerows([(101, "Sam", 45000, "IT"), (102, "Lisa", 52000, "HR"), (103, "Mike, Jr.", 61000, "IT")])
+
+employees = ColumnarCsv.load(employee_csv, {"emp_id": int, "name": str, "salary": float, "department": str})
+for row in employees:
+    print(row)
+print(employees.line_offsets)            # None: the csv.reader path does not keep offsets
+
+# COMMAND ----------
+
+# DBTITLE 1, Rows with the Wrong Number of Fields
+bad_csv = os.path.join(workdir, "bad.csv")
+with open(bad_csv, "w") as f:            # 4 + 2 fields: the total is right, the rows are not
+    f.write("id,name,marks\n1,anil,11.11,extra\n2,bharath\n3,chandu,33.33\n")
+try:
+    ColumnarCsv.load(bad_csv, {"id": int, "name": str, "marks": float})
+except ValueError as exc:
+    print("ValueError:", exc)
+
+# COMMAND ----------
+
+# DBTITLE 1, Optional NumPy Output
+if np is not None:
+    arrays = students.to_numpy()
+    print(arrays["marks"].mean(), arrays["id"][arrays["marks"] > 20])
+    arrays["marks"][0] = 99.0            # a view: the column array changes too
+    print(students.column("marks")[0])
+else:
+    print("NumPy not installed — columns are still available as array('q') / array('d')")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 6. Memory and Time: `list(csv.DictReader(f))` vs `ColumnarCsv`
+# MAGIC
+# MAGIC An employee file with 1,000,000 rows and 4 columns (`department` has only 5 distinct values).
+# MAGIC `tracemalloc` slows down allocation-heavy code a lot, so memory and time are measured in **separate** runs.
+
+# COMMAND ----------
+
+# DBTITLE 1, Create a Big employee.csv
+N = 1_000_000
+random.seed(3)
+departments = ["IT", "HR", "Sales", "Finance", "Ops"]
+big_csv = os.path.join(workdir, "employee_big.csv")
+with open(big_csv, "w", newline="") as f:
+    f.write("emp_id,name,salary,department\n")
+    f.writelines(f"{i},emp{i % 50_000},{random.randint(20_000, 150_000)}.0,{random.choice(departments)}\n"
+                 for i in range(N))
+print(f"file size: {os.path.getsize(big_csv) / 1024 / 1024:.1f} MB")
+
+employee_schema = {"emp_id": int, "name": str, "salary": float, "department": str}
+
+# COMMAND ----------
+
+# DBTITLE 1, Load Time
+def load_dicts():
+    with open(big_csv, newline="") as f:
+        return list(csv.DictReader(f))
+
+start = time.perf_counter()
+dict_rows = load_dicts()
+t_dicts = time.perf_counter() - start
+del dict_rows
+
+start = time.perf_counter()
+table = ColumnarCsv.load(big_csv, employee_schema)
+t_columns = time.perf_counter() - start
+
+print(f"list(csv.DictReader(f)) : {t_dicts:.2f}s   (values are still strings)")
+print(f"ColumnarCsv.load        : {t_columns:.2f}s   (values already int/float)")
+
+# COMMAND ----------
+
+# DBTITLE 1, Memory
+def peak_memory(label, fn):
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} kept {current / 1024 / 1024:7.1f} MiB   peak {peak / 1024 / 1024:7.1f} MiB")
+    return result
+
+del table
+dict_rows = peak_memory("list(csv.DictReader(f))", load_dicts)
+del dict_rows
+table = peak_memory("ColumnarCsv.load", lambda: ColumnarCsv.load(big_csv, employee_schema))
+print(f"ColumnarCsv.nbytes()     {table.nbytes() / 1024 / 1024:7.1f} MiB")
+print(table.row(123_456))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ The columnar table keeps roughly **a tenth** of the memory of the list of dicts:
+# MAGIC - `emp_id` / `salary` → 8 bytes per value instead of a `str` object (~50 bytes) plus a dict slot
+# MAGIC - `department` → 5 interned strings shared by a million rows
+# MAGIC - no per-row dict at all — `CsvRow` objects are created only when you look at a row
+# MAGIC
+# MAGIC The peak stays low too: only one block of lines is split at a time.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Step | Tool |
+# MAGIC |------|------|
+# MAGIC | Read the file without copying | `mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)` |
+# MAGIC | Find rows | `line_offsets(mm)` → `array('q')` of line starts |
+# MAGIC | Store numbers | `array('q')` / `array('d')` — 8 bytes per value |
+# MAGIC | Store text | `sys.intern` — repeated values stored once |
+# MAGIC | Quoted values | Automatic fallback to `csv.reader` |
+# MAGIC | NumPy | `table.to_numpy()` — zero-copy for numeric columns |
+# MAGIC | Old `DictReader` loops | `for row in table:` → `CsvRow` (a read-only `Mapping`) |
@@ -0,0 +1,362 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Appending Records Safely: a Buffered JSON Lines Writer**
+# MAGIC
+# MAGIC At the end of the json demo we appended `my_data` to `pavan_data_2.json`:
+# MAGIC
+# MAGIC ```
+# MAGIC with open(target_file_path, mode="a") as file:
+# MAGIC     json.dump(my_data, file)
+# MAGIC ```
+# MAGIC
+# MAGIC Two problems:
+# MAGIC 1. After two appends the file contains `{...}{...}` — **not valid JSON**, `json.load` fails with *Extra data*
+# MAGIC 2. Every record **opens and closes** the file again (two system calls + a flush per record)
+# MAGIC
+# MAGIC The standard answer is **JSON Lines** (`.jsonl`): one JSON object per line. Appending is always valid,
+# MAGIC and a reader can stream the file line by line.
+# MAGIC
+# MAGIC In this lesson we build:
+# MAGIC - `JsonlWriter` → keeps the file open, buffers **N records or T milliseconds**, writes each batch with one
+# MAGIC   `writelines`, and has an **fsync policy**: `"none"`, `"batch"` or `"every"`
+# MAGIC - `iter_jsonl` → streams the records back, and survives a half-written last line after a crash
+
+# COMMAND ----------
+
+# DBTITLE 1, The Problem: Appending json.dump Output
+import os
+import json
+import time
+import tempfile
+import threading
+
+workdir = tempfile.mkdtemp()
+my_data = {"name": "pavan", "age": 22, "mail": "pavan@gmail.com", "is_graduate": True}
+
+pavan_data_2 = os.path.join(workdir, "pavan_data_2.json")
+for _ in range(2):
+    with open(pavan_data_2, mode="a") as file:
+        json.dump(my_data, file)
+
+print(open(pavan_data_2).read())
+try:
+    with open(pavan_data_2) as f:
+        json.load(f)
+except json.JSONDecodeError as exc:
+    print("JSONDecodeError:", exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. When Is Data Really on Disk? (fsync)
+# MAGIC
+# MAGIC | Step | Where the bytes are | Survives a program crash? | Survives a power cut? |
+# MAGIC |------|---------------------|---------------------------|-----------------------|
+# MAGIC | `buffer.append(line)` | our Python list | ❌ | ❌ |
+# MAGIC | `f.writelines(...)` + `f.flush()` | OS page cache | ✅ | ❌ |
+# MAGIC | `os.fsync(f.fileno())` | the disk | ✅ | ✅ |
+# MAGIC
+# MAGIC `fsync` is **slow** (milliseconds on many disks), so the policy is a trade-off:
+# MAGIC
+# MAGIC | `fsync=` | What happens | Use for |
+# MAGIC |----------|--------------|---------|
+# MAGIC | `"none"` | flush to the OS per batch, never fsync | logs you can afford to lose on power loss |
+# MAGIC | `"batch"` (default) | one fsync per batch | most event logs |
+# MAGIC | `"every"` | flush + fsync after **every** record (no batching) | payments, audit trails |
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. `JsonlWriter`
+# MAGIC
+# MAGIC - A batch is written when it has `batch_size` records **or** its oldest record is `flush_ms` milliseconds old
+# MAGIC - A small **daemon thread** checks the age, so a quiet logger still writes its last records within `flush_ms`
+# MAGIC - A `threading.Lock` protects the buffer, so several threads can log to the same writer
+# MAGIC - If the file ends with a **half-written line** (an earlier crash), that tail is cut off first, so the new
+# MAGIC   records start on a clean line and the file stays readable with `on_error="raise"`
+# MAGIC - If the background flush fails (disk full, ...), the error is kept and raised by the next `write`,
+# MAGIC   `flush` or `close`, so it is never lost with the thread
+
+# COMMAND ----------
+
+# DBTITLE 1, JsonlWriter
+FSYNC_POLICIES = ("none", "batch", "every")
+
+
+class JsonlWriter:
+    def __init__(self, path, batch_size=1000, flush_ms=200, fsync="batch", encoding="utf-8", dumps=json.dumps):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.batch_size = 1 if fsync == "every" else batch_size
+        self.flush_ms = flush_ms
+        self.fsync = fsync
+        self._dumps = dumps
+        self._buffer = []
+        self._oldest = None                      # time.monotonic() of the oldest buffered record
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._error = None                       # exception raised by the background flush
+        self.records_written = 0
+        self.batches_written = 0
+
+        self.torn_bytes = self._truncate_torn_tail(path)
+        self._file = open(path, "a", encoding=encoding, newline="")
+
+        self._flusher = None
+        if flush_ms is not None and self.batch_size > 1:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    @staticmethod
+    def _truncate_torn_tail(path, block=64 * 1024):
+        """Cut off a half-written last line from an earlier crash; return how many bytes were removed."""
+        try:
+            f = open(path, "r+b")
+        except FileNotFoundError:
+            return 0
+        with f:
+            size = end = f.seek(0, os.SEEK_END)
+            while end:
+                start = max(0, end - block)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end != size:
+                f.truncate(end)
+            return size - end
+
+    # ---- writing ----
+    def write(self, record):
+        line = self._dumps(record) + "\n"        # serialise outside the lock
+        with self._lock:
+            if self._file.closed:
+                raise ValueError("write to a closed JsonlWriter")
+            self._raise_flush_error()
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(line)
+            if len(self._buffer) >= self.batch_size:
+                self._write_batch()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        with self._lock:
+            self._raise_flush_error()
+            if self._buffer:
+                self._write_batch()
+
+    def _raise_flush_error(self):
+        # caller holds the lock; the writer stays broken, its buffer may be half written
+        if self._error is not None:
+            raise self._error
+
+    def _write_batch(self):
+        # caller holds the lock
+        self._file.writelines(self._buffer)
+        self._file.flush()
+        if self.fsync != "none":
+            os.fsync(self._file.fileno())
+        self.records_written += len(self._buffer)
+        self.batches_written += 1
+        self._buffer.clear()
+        self._oldest = None
+
+    def _flush_periodically(self):
+        interval = self.flush_ms / 1000
+        while not self._closed.wait(interval / 2):
+            with self._lock:
+                if self._oldest is not None and time.monotonic() - self._oldest >= interval:
+                    try:
+                        self._write_batch()
+                    except Exception as exc:
+                        self._error = exc                # raised by the next write, flush or close
+                        return
+
+    # ---- closing ----
+    def close(self):
+        if self._file.closed:
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            error = self._error
+            try:
+                if error is None and self._buffer:
+                    self._write_batch()
+            finally:
+                try:
+                    self._file.close()
+                except OSError:
+                    if error is None:
+                        raise
+            if error is not None:
+                raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. `iter_jsonl`: Streaming the Records Back
+# MAGIC
+# MAGIC - one `json.loads` per line, blank lines skipped, nothing else kept in memory
+# MAGIC - a bad **last** line without a newline is a record that was being written when the program died →
+# MAGIC   it is skipped (nothing after it was ever written). `JsonlWriter` cuts such a tail off before appending,
+# MAGIC   so it never ends up in the middle of the file
+# MAGIC - a bad line anywhere else is real corruption → `on_error="raise"` (default) or `"skip"`
+
+# COMMAND ----------
+
+# DBTITLE 1, iter_jsonl
+def iter_jsonl(path, encoding="utf-8", on_error="raise"):
+    if on_error not in ("raise", "skip"):
+        raise ValueError("on_error must be 'raise' or 'skip'")
+    loads = json.loads
+    with open(path, encoding=encoding, newline="") as f:
+        for line_no, line in enumerate(f, 1):
+            if line.isspace():
+                continue
+            try:
+                yield loads(line)
+            except json.JSONDecodeError as exc:
+                if not line.endswith("\n"):
+                    return                              # torn last line: the write never finished
+                if on_error == "raise":
+                    raise ValueError(f"{path}, line {line_no}: {exc.msg}") from None
+
+# COMMAND ----------
+
+# DBTITLE 1, Appending my_data the JSON Lines Way
+pavan_data = os.path.join(workdir, "pavan_data.jsonl")
+
+for run in range(2):                                    # two separate "program runs", like the demo
+    with JsonlWriter(pavan_data) as log:
+        log.write({**my_data, "run": run})
+
+print(open(pavan_data).read())
+print(list(iter_jsonl(pavan_data)))
+
+# COMMAND ----------
+
+# DBTITLE 1, Time-Based Flush and a Crash Mid-Write
+events = os.path.join(workdir, "events.jsonl")
+
+log = JsonlWriter(events, batch_size=1000, flush_ms=100)
+log.write({"event": "login", "user": "anusha"})
+print("right after write:", os.path.getsize(events), "bytes on disk")
+time.sleep(0.3)
+print("after 300 ms     :", os.path.getsize(events), "bytes on disk")
+log.close()
+
+with open(events, "a") as f:                            # simulate a crash in the middle of a record
+    f.write('{"event": "logout", "us')
+
+print(list(iter_jsonl(events)))                         # the torn last line is skipped
+
+with JsonlWriter(events) as log:                        # next run cuts the torn line off first
+    print("torn bytes removed:", log.torn_bytes)
+    log.write({"event": "login", "user": "hemanth"})
+
+print(repr(open(events).read()))
+print(list(iter_jsonl(events)))
+
+# COMMAND ----------
+
+# DBTITLE 1, A Failing Background Flush
+log = JsonlWriter("/dev/full", batch_size=1000, flush_ms=50)   # every write to /dev/full fails: "disk full"
+log.write({"event": "login", "user": "anusha"})
+time.sleep(0.2)                                         # the background thread tries to write and fails
+for step in (lambda: log.write({"event": "logout"}), log.close):
+    try:
+        step()
+    except OSError as exc:
+        print(type(exc).__name__, exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Throughput: 200,000 Events
+# MAGIC
+# MAGIC The same records written four ways. `fsync="every"` is timed on fewer records, because each fsync waits for the disk.
+
+# COMMAND ----------
+
+# DBTITLE 1, Benchmark
+N = 200_000
+records = [{"event": "click", "user": f"user{i % 500}", "ts": 1_700_000_000 + i, "ok": i % 7 != 0}
+           for i in range(N)]
+
+
+def open_append_per_record(path, recs):
+    for rec in recs:
+        with open(path, mode="a") as file:
+            json.dump(rec, file)
+            file.write("\n")
+
+
+def with_writer(fsync):
+    def run(path, recs):
+        with JsonlWriter(path, batch_size=1000, fsync=fsync) as log:
+            for rec in recs:
+                log.write(rec)
+    return run
+
+
+def timed(label, fn, n, name):
+    path = os.path.join(workdir, name)
+    start = time.perf_counter()
+    fn(path, records[:n])
+    elapsed = time.perf_counter() - start
+    assert sum(1 for _ in iter_jsonl(path)) == n
+    print(f"{label:<38} {n:>7} records  {elapsed:6.2f}s  {n / elapsed:>10,.0f} records/s")
+    return path
+
+
+timed('open(mode="a") + json.dump per record', open_append_per_record, N, "naive.jsonl")
+timed('JsonlWriter fsync="none"', with_writer("none"), N, "none.jsonl")
+batch_path = timed('JsonlWriter fsync="batch"', with_writer("batch"), N, "batch.jsonl")
+timed('JsonlWriter fsync="every"', with_writer("every"), 2_000, "every.jsonl")
+
+start = time.perf_counter()
+count = sum(1 for _ in iter_jsonl(batch_path))
+print(f"iter_jsonl read back {count} records in {time.perf_counter() - start:.2f}s")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ Keeping the file open and writing 1000 lines per `writelines` removes the open/close per record —
+# MAGIC that is where the old approach spends most of its time. `fsync="batch"` costs one disk wait per 1000 records,
+# MAGIC while `fsync="every"` pays it for every single record: use it only where each record must survive a power cut.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | New way |
+# MAGIC |---------|---------|
+# MAGIC | `json.dump` appended → `{...}{...}` (invalid JSON) | One JSON object per line (`.jsonl`) |
+# MAGIC | `open` / `close` per record | File kept open, `writelines` per batch |
+# MAGIC | Flush whenever Python decides | `batch_size` records or `flush_ms` milliseconds |
+# MAGIC | No durability control | `fsync="none" / "batch" / "every"` |
+# MAGIC | `json.load` of the whole file | `iter_jsonl(path)` streams records, skips a torn last line |
+# MAGIC
+# MAGIC ```
+# MAGIC with JsonlWriter("events.jsonl", batch_size=1000, flush_ms=200, fsync="batch") as log:
+# MAGIC     log.write({"event": "login", "user": "pavan"})
+# MAGIC
+# MAGIC for event in iter_jsonl("events.jsonl"):
+# MAGIC     ...
+# MAGIC ```
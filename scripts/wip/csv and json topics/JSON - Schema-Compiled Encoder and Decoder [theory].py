@@ -0,0 +1,470 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Compiling a JSON Schema into Fast Encode / Decode Functions**
+# MAGIC
+# MAGIC The json demo round-trips the **same shapes** again and again:
+# MAGIC
+# MAGIC ```
+# MAGIC {"name": "John Doe", "age": 30, "salary": 55000.75, "is_manager": true, "department": null,
+# MAGIC  "skills": ["Python", "SQL", "Databricks"],
+# MAGIC  "projects": [{"name": "AI System", "status": "completed"}, ...]}
+# MAGIC ```
+# MAGIC
+# MAGIC `json.dumps` does not know that. For **every value** of **every record** it asks "is this a str? an int?
+# MAGIC a dict? a list?" and picks an encoder. `json.loads` gives back plain dicts, and checking that
+# MAGIC `age` really is an int is extra code we write by hand.
+# MAGIC
+# MAGIC If we **know the shape**, we can do what the generated `__init__` in the decorators lesson did:
+# MAGIC **write the code once** for this exact shape and compile it with `exec`:
+# MAGIC - an **encoder** that goes straight from fields to text, no type dispatch
+# MAGIC - a **decoder** that validates every field while building the result — a dict or a `__slots__` object
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. Describing a Shape
+# MAGIC
+# MAGIC A schema is a dict of `field → type`, written with normal Python type hints:
+# MAGIC
+# MAGIC | Spec | JSON | Python |
+# MAGIC |------|------|--------|
+# MAGIC | `str`, `int`, `float`, `bool` | string, number, `true` / `false` | same (an `int` is accepted for `float`) |
+# MAGIC | `Optional[str]` | string or `null` | `str` or `None` |
+# MAGIC | `list[str]` | array of strings | `list` |
+# MAGIC | `{"name": str, ...}` | nested object | `dict` |
+# MAGIC | another compiled codec | nested object | whatever that codec produces (e.g. a `Project` object) |
+
+# COMMAND ----------
+
+# DBTITLE 1, Imports and SchemaError
+import gc
+import json
+import math
+import time
+import typing
+from typing import Optional
+from json.encoder import encode_basestring_ascii
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def _wrong_type(path, expected, value):
+    raise SchemaError(f"{path}: expected {expected}, got {type(value).__name__} {value!r:.40}")
+
+
+def _wrong_keys(path, obj, keys):
+    missing = [k for k in keys if k not in obj]
+    extra = [k for k in obj if k not in keys]
+    raise SchemaError(f"{path}: missing keys {missing}, unexpected keys {extra}")
+
+
+def _slow_number(value, expected):
+    """Whatever the fast path rejected: an int in a float field is fine, everything else is an error."""
+    if type(value) is int:
+        return int.__repr__(value)
+    if type(value) is float and expected == "float":
+        raise ValueError(f"{value!r} is not allowed in JSON")          # nan / inf
+    raise TypeError(f"expected {expected}, got {type(value).__name__} {value!r:.40}")
+
+
+def _slow_bool(value):
+    raise TypeError(f"expected bool, got {type(value).__name__} {value!r:.40}")
+
+
+def _not_a_list(value):
+    raise TypeError(f"expected list, got {type(value).__name__} {value!r:.40}")
+
+
+def _reject_constant(name):
+    raise SchemaError(f"{name} is not valid JSON")
+
+
+# json.loads would turn NaN / Infinity / -Infinity into floats; the codec rejects them like the encoder does
+_json_decode = json.JSONDecoder(parse_constant=_reject_constant).decode
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. The Code Generator
+# MAGIC
+# MAGIC For each field the generator writes:
+# MAGIC - an **expression** that turns the value into JSON text (e.g. `_esc(r["name"])` for a `str`, using the C string
+# MAGIC   escaper that `json.dumps` itself uses)
+# MAGIC - a few **statements** that check the decoded value (`if type(v1) is not int: ...`)
+# MAGIC
+# MAGIC The output uses the same separators as `json.dumps` (`", "` and `": "`), so both produce **identical text**.
+# MAGIC Nested objects become their own generated functions. The source is kept in `codec.source` so you can read it.
+
+# COMMAND ----------
+
+# DBTITLE 1, SchemaCodec
+_SCALARS = {str: "str", int: "int", float: "float", bool: "bool"}
+
+
+def _optional_of(spec):
+    if typing.get_origin(spec) is typing.Union:
+        args = [a for a in typing.get_args(spec) if a is not type(None)]
+        if len(args) == 1 and len(typing.get_args(spec)) == 2:
+            return args[0]
+    return None
+
+
+class SchemaCodec:
+    def __init__(self, schema, cls=None, name="record"):
+        self.schema = dict(schema)
+        self.cls = cls
+        self.name = name
+        self._namespace = {
+            "_esc": encode_basestring_ascii, "_float": float.__repr__, "_int": int.__repr__,
+            "_isfinite": math.isfinite, "_slow_number": _slow_number, "_slow_bool": _slow_bool,
+            "_wrong_type": _wrong_type, "_wrong_keys": _wrong_keys, "_not_a_list": _not_a_list,
+        }
+        self._sources = []
+        self._counter = 0
+        self._encode, self._decode = self._compile(self.schema, cls, name)
+        self.source = "\n\n".join(self._sources)
+
+    # ---- code generation ----
+    def _new_name(self, prefix):
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def _nested(self, spec, path):
+        """Functions (encode_name, decode_name) for a nested object spec."""
+        if isinstance(spec, SchemaCodec):
+            enc, dec = self._new_name("_enc"), self._new_name("_dec")
+            self._namespace[enc], self._namespace[dec] = spec._encode, spec._decode
+            return enc, dec
+        encode_fn, decode_fn = self._compile(spec, None, path)
+        enc, dec = self._new_name("_enc"), self._new_name("_dec")
+        self._namespace[enc], self._namespace[dec] = encode_fn, decode_fn
+        return enc, dec
+
+    def _encode_expr(self, spec, v, path):
+        if spec is str:
+            return f"_esc({v})"
+        if spec is int:
+            return f"(_int({v}) if type({v}) is int else _slow_number({v}, 'int'))"
+        if spec is float:
+            return f"(_float({v}) if type({v}) is float and _isfinite({v}) else _slow_number({v}, 'float'))"
+        if spec is bool:
+            return f"('true' if {v} is True else 'false' if {v} is False else _slow_bool({v}))"
+        inner = _optional_of(spec)
+        if inner is not None:
+            return f"('null' if {v} is None else {self._encode_expr(inner, v, path)})"
+        if typing.get_origin(spec) is list:
+            (item,) = typing.get_args(spec)
+            items = f"({v} if type({v}) is list or type({v}) is tuple else _not_a_list({v}))"   # a str is iterable too
+            if item is str:
+                return f"('[' + ', '.join(map(_esc, {items})) + ']')"
+            x = self._new_name("x")
+            return f"('[' + ', '.join([{self._encode_expr(item, x, path + '[*]')} for {x} in {items}]) + ']')"
+        if isinstance(spec, (dict, SchemaCodec)):
+            enc, _ = self._nested(spec, path)
+            return f"{enc}({v})"
+        raise TypeError(f"{path}: unsupported schema type {spec!r}")
+
+    def _check_lines(self, spec, v, path):
+        """Statements that validate (and maybe convert) variable v."""
+        if isinstance(spec, type) and spec in _SCALARS:
+            lines = [f"if type({v}) is not {_SCALARS[spec]}:"]
+            if spec is float:
+                lines += [f"    if type({v}) is int:", f"        {v} = float({v})",
+                          "    else:", f"        _wrong_type({path!r}, 'float', {v})"]
+            else:
+                lines.append(f"    _wrong_type({path!r}, {_SCALARS[spec]!r}, {v})")
+            return lines
+        inner = _optional_of(spec)
+        if inner is not None:
+            return [f"if {v} is not None:"] + ["    " + line for line in self._check_lines(inner, v, path)]
+        if typing.get_origin(spec) is list:
+            (item,) = typing.get_args(spec)
+            lines = [f"if type({v}) is not list:", f"    _wrong_type({path!r}, 'list', {v})"]
+            x = self._new_name("x")
+            if item is str or item is int or item is bool:
+                lines += [f"if not set(map(type, {v})) <= {{{_SCALARS[item]}}}:",
+                          f"    for {x} in {v}:"]
+                lines += ["        " + line for line in self._check_lines(item, x, path + "[*]")]
+            else:
+                body = self._check_lines(item, x, path + "[*]")
+                lines += [f"{v} = {v}[:]" if body else "",
+                          f"for _i, {x} in enumerate({v}):"]
+                lines += ["    " + line for line in body] + [f"    {v}[_i] = {x}"]
+            return [line for line in lines if line]
+        if isinstance(spec, (dict, SchemaCodec)):
+            _, dec = self._nested(spec, path)
+            return [f"{v} = {dec}({v})"]
+        raise TypeError(f"{path}: unsupported schema type {spec!r}")
+
+    def _compile(self, schema, cls, path):
+        fields = list(schema)
+        if cls is not None:
+            bad = [f for f in fields if not f.isidentifier()]
+            if bad:
+                raise ValueError(f"fields {bad} cannot be attributes of {cls.__name__}")
+        get = (lambda f: f"r.{f}") if cls is not None else (lambda f: f"r[{f!r}]")
+
+        # encoder: one long string concatenation
+        parts, literal = [], "{"
+        for i, field in enumerate(fields):
+            literal += ("" if i == 0 else ", ") + json.dumps(field) + ": "
+            parts += [repr(literal), self._encode_expr(schema[field], get(field), f"{path}.{field}")]
+            literal = ""
+        parts.append(repr("}"))
+        enc_name = self._new_name("_encode_")
+        enc_src = f"def {enc_name}(r):\n    return (" + "\n            + ".join(parts) + ")"
+
+        # decoder: unpack, check, build
+        dec_name = self._new_name("_decode_")
+        variables = [f"v{i}" for i in range(len(fields))]
+        body = [f"if type(d) is not dict:", f"    _wrong_type({path!r}, 'object', d)",
+                f"if len(d) != {len(fields)}:", f"    _wrong_keys({path!r}, d, {fields!r})",
+                "try:"]
+        body += [f"    {v} = d[{f!r}]" for v, f in zip(variables, fields)]
+        body += ["except KeyError:", f"    _wrong_keys({path!r}, d, {fields!r})"]
+        for v, f in zip(variables, fields):
+            body += self._check_lines(schema[f], v, f"{path}.{f}")
+        if cls is not None:
+            cls_name = self._new_name("_cls")
+            self._namespace[cls_name] = cls
+            body.append(f"return {cls_name}(" + ", ".join(f"{f}={v}" for f, v in zip(fields, variables)) + ")")
+        else:
+            body.append("return {" + ", ".join(f"{f!r}: {v}" for f, v in zip(fields, variables)) + "}")
+        dec_src = f"def {dec_name}(d):\n" + "\n".join("    " + line for line in body)
+
+        for src in (enc_src, dec_src):
+            exec(src, self._namespace)
+            self._sources.append(src)
+        return self._namespace[enc_name], self._namespace[dec_name]
+
+    # ---- public API ----
+    def dumps(self, obj):
+        return self._encode(obj)
+
+    def loads(self, text):
+        return self._decode(_json_decode(text))
+
+    def validate(self, obj):
+        """Check an already-decoded dict (e.g. from json.load) and build the record."""
+        return self._decode(obj)
+
+    def dumps_lines(self, objs):
+        """JSON Lines text: one record per line."""
+        return "".join([line + "\n" for line in map(self._encode, objs)])
+
+    def loads_lines(self, lines):
+        """Decode and validate JSON Lines (blank lines are skipped)."""
+        loads, decode = _json_decode, self._decode
+        return [decode(loads(line)) for line in lines if line and not line.isspace()]
+
+
+def compile_schema(schema, cls=None, name="record"):
+    return SchemaCodec(schema, cls=cls, name=name)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. The Demo Shapes: `my_data`, Courses, Employee
+
+# COMMAND ----------
+
+# DBTITLE 1, my_data and a Course
+my_data_codec = compile_schema({"name": str, "age": int, "mail": str, "is_graduate": bool}, name="my_data")
+my_data = {"name": "pavan", "age": 22, "mail": "pavan@gmail.com", "is_graduate": True}
+
+text = my_data_codec.dumps(my_data)
+print(text)
+print(text == json.dumps(my_data))
+print(my_data_codec.loads(text))
+print(my_data_codec.source)
+
+course_codec = compile_schema({"CourseID": str, "CourseName": str, "Credits": int}, name="course")
+courses = [{"CourseID": "CSE101", "CourseName": "Introduction to Computer Science", "Credits": 3},
+           {"CourseID": "MTH102", "CourseName": "Calculus I", "Credits": 4}]
+print(course_codec.dumps_lines(courses))
+
+# COMMAND ----------
+
+# DBTITLE 1, Employee with __slots__ Classes
+class Project:
+    __slots__ = ("name", "status")
+
+    def __init__(self, name, status):
+        self.name = name
+        self.status = status
+
+    def __repr__(self):
+        return f"Project({self.name!r}, {self.status!r})"
+
+
+class Employee:
+    __slots__ = ("name", "age", "salary", "is_manager", "department", "skills", "projects")
+
+    def __init__(self, name, age, salary, is_manager, department, skills, projects):
+        self.name = name
+        self.age = age
+        self.salary = salary
+        self.is_manager = is_manager
+        self.department = department
+        self.skills = skills
+        self.projects = projects
+
+
+project_codec = compile_schema({"name": str, "status": str}, cls=Project, name="project")
+employee_codec = compile_schema({
+    "name": str,
+    "age": int,
+    "salary": float,
+    "is_manager": bool,
+    "department": Optional[str],
+    "skills": list[str],
+    "projects": list[project_codec],
+}, cls=Employee, name="employee")
+
+json_string = """{
+    "name": "John Doe", "age": 30, "salary": 55000.75, "is_manager": true, "department": null,
+    "skills": ["Python", "SQL", "Databricks"],
+    "projects": [{"name": "AI System", "status": "completed"}, {"name": "Data Pipeline", "status": "ongoing"}]
+}"""
+
+emp = employee_codec.loads(json_string)
+print(type(emp).__name__, emp.name, emp.salary * 0.1, emp.projects)
+print(employee_codec.dumps(emp))
+print(employee_codec.dumps(emp) == json.dumps(json.loads(json_string)))
+
+# COMMAND ----------
+
+# DBTITLE 1, Validation Errors Say Exactly What Is Wrong
+bad_inputs = [
+    '{"name": "pavan", "age": "22", "mail": "p@gmail.com", "is_graduate": true}',
+    '{"name": "pavan", "age": 22, "mail": "p@gmail.com"}',
+    '{"name": "pavan", "age": 22, "mail": "p@gmail.com", "is_graduate": 1}',
+]
+for text in bad_inputs:
+    try:
+        my_data_codec.loads(text)
+    except SchemaError as exc:
+        print("SchemaError:", exc)
+
+try:
+    employee_codec.loads(json_string.replace('"completed"', "42"))
+except SchemaError as exc:
+    print("SchemaError:", exc)
+
+try:
+    employee_codec.loads(json_string.replace("55000.75", "NaN"))
+except SchemaError as exc:
+    print("SchemaError:", exc)
+
+try:
+    compile_schema({"name": str, "skills": list[str]}).dumps({"name": "pavan", "skills": "Python"})
+except TypeError as exc:
+    print("TypeError:", exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Benchmark: 1,000,000 Employee Records
+# MAGIC
+# MAGIC | Encode | Decode |
+# MAGIC |--------|--------|
+# MAGIC | `json.dumps(record)` per record | `json.loads(line)` per record (no validation!) |
+# MAGIC | `codec.dumps(record)` per record | `json.loads` + a hand-written generic validator |
+# MAGIC | `codec.dumps_lines(records)` | `codec.loads_lines(lines)` — validated, into `Employee` objects |
+
+# COMMAND ----------
+
+# DBTITLE 1, Encoding
+N = 1_000_000
+employee_dict_codec = compile_schema(employee_codec.schema | {"projects": list[{"name": str, "status": str}]})
+records = [{"name": f"emp{i}", "age": 20 + i % 40, "salary": 30_000 + i * 0.25, "is_manager": i % 10 == 0,
+            "department": None if i % 3 else "IT", "skills": ["Python", "SQL", "Databricks"][: 1 + i % 3],
+            "projects": [{"name": "AI System", "status": "completed"}, {"name": "Data Pipeline", "status": "ongoing"}]}
+           for i in range(N)]
+
+# the 1M input records live until the end; freezing them stops the garbage collector from re-scanning them
+# again and again, which would otherwise dominate every timing below (gc.unfreeze() after the last timing)
+gc.collect()
+gc.freeze()
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<42} {time.perf_counter() - start:6.2f}s")
+    return result
+
+
+plain_lines = timed("json.dumps per record", lambda: [json.dumps(r) for r in records])
+codec_lines = timed("codec.dumps per record", lambda: [employee_dict_codec.dumps(r) for r in records])
+jsonl_text = timed("codec.dumps_lines(records)", lambda: employee_dict_codec.dumps_lines(records))
+print("identical text:", plain_lines == codec_lines and jsonl_text == "\n".join(plain_lines) + "\n")
+del codec_lines
+
+# COMMAND ----------
+
+# DBTITLE 1, Decoding with Validation
+def generic_validate(obj, schema, path="record"):
+    """What we would write without code generation: walk the schema for every record."""
+    if not isinstance(obj, dict) or obj.keys() != schema.keys():
+        raise SchemaError(f"{path}: bad object")
+    for key, spec in schema.items():
+        value, where = obj[key], f"{path}.{key}"
+        inner = _optional_of(spec)
+        if inner is not None:
+            if value is not None:
+                generic_validate({key: value}, {key: inner}, path)
+        elif isinstance(spec, dict):
+            generic_validate(value, spec, where)
+        elif typing.get_origin(spec) is list:
+            (item,) = typing.get_args(spec)
+            for x in value:
+                if isinstance(item, dict):
+                    generic_validate(x, item, where)
+                elif type(x) is not item:
+                    raise SchemaError(f"{where}: bad item")
+        elif type(value) is not spec and not (spec is float and type(value) is int):
+            raise SchemaError(f"{where}: bad type")
+    return obj
+
+
+generic_schema = employee_dict_codec.schema
+timed("json.loads per record (no validation)", lambda: [json.loads(line) for line in plain_lines])
+timed("json.loads + generic validator", lambda: [generic_validate(json.loads(line), generic_schema)
+                                                  for line in plain_lines])
+timed("employee_dict_codec.loads per record", lambda: [employee_dict_codec.loads(line) for line in plain_lines])
+timed("employee_dict_codec.loads_lines (dicts)", lambda: employee_dict_codec.loads_lines(plain_lines))
+employees = timed("employee_codec.loads_lines (Employee)", lambda: employee_codec.loads_lines(plain_lines))
+print(type(employees[0]).__name__, employees[-1].name, employees[-1].projects)
+
+del records, plain_lines, jsonl_text, employees
+gc.unfreeze()                            # hand the frozen objects back to the garbage collector
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ What the numbers show:
+# MAGIC - **Encoding**: the generated encoder beats `json.dumps`, because it never asks "what type is this?".
+# MAGIC   It uses the same C string escaper, so the text is **byte-for-byte identical**
+# MAGIC - **Decoding**: parsing is still done by the C parser in `json.loads` — Python code cannot parse faster.
+# MAGIC   What we win is the **validation**: the generated checks are so cheap that validated decoding costs about
+# MAGIC   the same as plain `json.loads`, while a generic validator that walks the schema more than **doubles** the time
+# MAGIC
+# MAGIC ⚠️ `NaN` / `Infinity` are rejected in both directions (they are not valid JSON; the decoder passes a
+# MAGIC `parse_constant` that raises), and keys must match the schema **exactly**.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Step | What you write |
+# MAGIC |------|----------------|
+# MAGIC | Describe the shape once | `codec = compile_schema({"name": str, "age": int, "skills": list[str], ...})` |
+# MAGIC | Map onto a `__slots__` class | `compile_schema(schema, cls=Employee)` |
+# MAGIC | Nest shapes | `"projects": list[project_codec]` or a nested dict |
+# MAGIC | Encode | `codec.dumps(obj)`, `codec.dumps_lines(objs)` |
+# MAGIC | Decode + validate | `codec.loads(text)`, `codec.loads_lines(lines)`, `codec.validate(dict)` |
+# MAGIC | See the generated code | `print(codec.source)` |
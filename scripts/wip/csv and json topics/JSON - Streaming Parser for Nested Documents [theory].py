@@ -0,0 +1,430 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Streaming JSON: Yield Students One by One**
+# MAGIC
+# MAGIC In the json demo we read whole files with `json.load`:
+# MAGIC
+# MAGIC ```
+# MAGIC with open(json_file_path) as f:
+# MAGIC     data = json.load(f)
+# MAGIC ```
+# MAGIC
+# MAGIC For the nested enrolment document
+# MAGIC
+# MAGIC ```
+# MAGIC {"Students": {"Student": [ {"StudentID": "101", ..., "Courses": {"Course": [...]}}, {...}, ... ]}}
+# MAGIC ```
+# MAGIC
+# MAGIC `json.load` builds the **whole tree** before we can look at the first student.
+# MAGIC A 3 GB export becomes roughly 10–20 GB of dicts, lists and strings.
+# MAGIC
+# MAGIC In this lesson we build:
+# MAGIC - `iter_json(path, "Students.Student[*]")` → yields each student **as soon as it is complete**, keeping only
+# MAGIC   a small text buffer in memory
+# MAGIC - `iter_ndjson(path)` → a fast path for **newline-delimited JSON** (one object per line)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. The Idea: Walk the Outside, Decode the Inside
+# MAGIC
+# MAGIC A path like `Students.Student[*]` tells us:
+# MAGIC
+# MAGIC | Step | Meaning |
+# MAGIC |------|---------|
+# MAGIC | `Students` | inside the top-level object, go into key `"Students"` |
+# MAGIC | `Student` | inside that object, go into key `"Student"` |
+# MAGIC | `[*]` | it is an array → **every element** is a result |
+# MAGIC
+# MAGIC We walk the **outer structure** ourselves (only `{`, `}`, `[`, `]`, `,`, `:` and keys), and hand every
+# MAGIC **element** to `json.JSONDecoder().raw_decode(text, pos)`. `raw_decode` is the C parser inside `json.loads`:
+# MAGIC it parses **one** value starting at `pos` and tells us where it ended.
+# MAGIC
+# MAGIC The file is read in chunks. If an element is cut off at the end of the buffer, we read the next chunk and try again.
+# MAGIC After each element the consumed text is dropped, so memory is bounded by **one chunk + one element**.
+
+# COMMAND ----------
+
+# DBTITLE 1, Path Parsing
+import os
+import re
+import json
+import time
+import random
+import tempfile
+import tracemalloc
+
+
+class StreamingJSONError(ValueError):
+    pass
+
+
+def parse_path(path):
+    """'Students.Student[*]' → ['Students', 'Student', '*'];  '[*]' → ['*'];  '' → []."""
+    steps = []
+    for part in filter(None, path.split(".")):
+        name, *stars = part.split("[")
+        if name:
+            steps.append(name)
+        for star in stars:
+            if star != "*]":
+                raise ValueError(f"only [*] is supported in a path, got [{star} in {path!r}")
+            steps.append("*")
+    return steps
+
+
+print(parse_path("Students.Student[*]"))
+print(parse_path("Students.Student[*].Courses.Course[*]"))
+print(parse_path("[*]"))
+
+# COMMAND ----------
+
+# DBTITLE 1, A Buffered Cursor over the File
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9+\-.eE]*\Z")
+_CUT_TOKEN = 16                         # longest cut-off token the decoder reports before its end: "\ud83d\ude0"
+_decoder = json.JSONDecoder()
+
+
+class _Cursor:
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0              # characters dropped from the front of the buffer so far
+        self.eof = False
+
+    def _fill(self):
+        """Read one more chunk; drop already consumed text first. Returns False at end of file."""
+        if self.eof:
+            return False
+        if self.pos:
+            self.offset += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def error(self, message):
+        return StreamingJSONError(f"{message} at character {self.offset + self.pos}")
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise self.error(f"expected {char!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one complete JSON value with the C decoder, reading more text until it fits."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as exc:
+                # text that was only cut off fails in its last token, or in a string running to the end of
+                # the buffer. Any other error is broken JSON: reading on would pull in the rest of the file
+                truncated = (exc.msg.startswith("Unterminated string")
+                             or len(self.buf) - exc.pos <= _CUT_TOKEN and self.buf.find("\n", exc.pos) < 0)
+                if truncated and self._fill():
+                    continue
+                self.pos = max(exc.pos, self.pos)
+                raise self.error(f"invalid JSON ({exc.msg})") from None
+            # a number at the end of the buffer may continue in the next chunk: "12|3", "2.|5"
+            if _NUMBER_TAIL.match(self.buf, end) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. `iter_json`: Yield Everything at a Path
+# MAGIC
+# MAGIC The walker is a small **recursive generator**:
+# MAGIC - path finished → decode the whole value here and `yield` it
+# MAGIC - next step is a key → scan the object's keys; **skip** the values of other keys, walk into the matching one
+# MAGIC - next step is `[*]` → walk into **every** element of the array
+# MAGIC
+# MAGIC Because it is a generator, the caller gets the first student while the rest of the file is still unread.
+
+# COMMAND ----------
+
+# DBTITLE 1, iter_json
+def _walk(cur, steps, i):
+    if i == len(steps):
+        yield cur.value()
+        return
+
+    if steps[i] == "*":
+        cur.expect("[")
+        if cur.peek() == "]":
+            cur.pos += 1
+            return
+        while True:
+            yield from _walk(cur, steps, i + 1)
+            sep = cur.peek()
+            cur.pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                cur.pos -= 1
+                raise cur.error("expected ',' or ']' in array")
+
+    cur.expect("{")
+    if cur.peek() == "}":
+        cur.pos += 1
+        return
+    while True:
+        if cur.peek() != '"':
+            raise cur.error("expected an object key")
+        key = cur.value()
+        cur.expect(":")
+        if key == steps[i]:
+            yield from _walk(cur, steps, i + 1)
+        else:
+            cur.value()                               # skip a value we are not interested in
+        sep = cur.peek()
+        cur.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            cur.pos -= 1
+            raise cur.error("expected ',' or '}' in object")
+
+
+def iter_json(path, json_path, encoding="utf-8", chunk_size=1 << 16):
+    """Yield every value at json_path (e.g. 'Students.Student[*]') while reading the file in chunks."""
+    steps = parse_path(json_path)
+    with open(path, encoding=encoding) as f:
+        cur = _Cursor(f, chunk_size)
+        yield from _walk(cur, steps, 0)
+        if cur.peek():
+            raise cur.error("extra data after the JSON document")
+
+# COMMAND ----------
+
+# DBTITLE 1, The Students Document from the Demo
+students_doc = {
+    "Students": {
+        "Student": [
+            {"StudentID": "101", "FirstName": "John", "LastName": "Doe", "Gender": "Male", "Age": 20,
+             "Courses": {"Course": [
+                 {"CourseID": "CSE101", "CourseName": "Introduction to Computer Science", "Credits": 3},
+                 {"CourseID": "MTH102", "CourseName": "Calculus I", "Credits": 4},
+                 {"CourseID": "PHY103", "CourseName": "Physics I", "Credits": 3}]},
+             "Email": "john.doe@example.com"},
+            {"StudentID": "102", "FirstName": "Jane", "LastName": "Smith", "Gender": "Female", "Age": 22,
+             "Courses": {"Course": [
+                 {"CourseID": "ENG201", "CourseName": "English Literature", "Credits": 4},
+                 {"CourseID": "HIS202", "CourseName": "World History", "Credits": 3}]},
+             "Email": "jane.smith@example.com"},
+        ]
+    }
+}
+
+workdir = tempfile.mkdtemp()
+students_json = os.path.join(workdir, "students.json")
+with open(students_json, "w") as f:
+    json.dump(students_doc, f, indent=2)
+
+for student in iter_json(students_json, "Students.Student[*]", chunk_size=64):    # tiny chunks on purpose
+    print(student["StudentID"], student["FirstName"], len(student["Courses"]["Course"]), "courses")
+
+print([c["CourseID"] for c in iter_json(students_json, "Students.Student[*].Courses.Course[*]")])
+print(list(iter_json(students_json, "Students.Student[*].Email")))
+
+# COMMAND ----------
+
+# DBTITLE 1, Errors Are Reported with a Position
+broken_json = os.path.join(workdir, "broken.json")
+with open(broken_json, "w") as f:
+    f.write('{"Students": {"Student": [{"StudentID": "101"}, {"StudentID": "102",}]}}')
+
+try:
+    for student in iter_json(broken_json, "Students.Student[*]"):
+        print("got", student)
+except StreamingJSONError as exc:
+    print("StreamingJSONError:", exc)
+
+minified = os.path.join(workdir, "broken_minified.json")   # the same mistake, then ~10 MB more on one line
+with open(minified, "w") as f:
+    f.write('{"Students": {"Student": [{"StudentID": "101"}, {"StudentID": "102",}')
+    f.write(', {"StudentID": "100"}' * 500_000 + "]}}")
+
+tracemalloc.start()
+try:
+    for student in iter_json(minified, "Students.Student[*]"):
+        pass
+except StreamingJSONError as exc:
+    print("StreamingJSONError:", exc)
+print(f"peak memory {tracemalloc.get_traced_memory()[1] / 2**20:.2f} MiB for a {os.path.getsize(minified) / 2**20:.1f} MiB file")
+tracemalloc.stop()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Fast Path: Newline-Delimited JSON (NDJSON / JSON Lines)
+# MAGIC
+# MAGIC When every line is one complete JSON value, we do not need the walker at all.
+# MAGIC Calling `json.loads` once per line still means one Python-level call per record, so `iter_ndjson`
+# MAGIC glues a **batch of lines** into one array text `"[line1,line2,...]"` and decodes the batch with a **single**
+# MAGIC `json.loads` call. Blank lines are skipped.
+# MAGIC
+# MAGIC If a batch fails to decode, or gives a different number of records than it has lines (a line like `1,2`
+# MAGIC would otherwise pass as two records), it is decoded again line by line, so the error points at the bad line.
+
+# COMMAND ----------
+
+# DBTITLE 1, iter_ndjson
+def iter_ndjson(path, encoding="utf-8", batch_lines=10_000):
+    with open(path, encoding=encoding) as f:
+        line_no = 0
+        while True:
+            lines = f.readlines(1 << 20)              # ~1 MB of whole lines
+            if not lines:
+                return
+            for start in range(0, len(lines), batch_lines):
+                chunk = lines[start:start + batch_lines]
+                batch = [line for line in chunk if not line.isspace()]
+                try:
+                    records = json.loads("[" + ",".join(batch) + "]")
+                except json.JSONDecodeError:
+                    records = None
+                if records is None or len(records) != len(batch):
+                    for n, line in enumerate(chunk, line_no + start + 1):
+                        if not line.isspace():
+                            try:
+                                json.loads(line)
+                            except json.JSONDecodeError as exc:
+                                raise StreamingJSONError(f"line {n}: {exc.msg}") from None
+                yield from records
+            line_no += len(lines)
+
+
+students_jsonl = os.path.join(workdir, "students.jsonl")
+with open(students_jsonl, "w") as f:
+    for student in students_doc["Students"]["Student"]:
+        f.write(json.dumps(student) + "\n")
+
+print([s["FirstName"] for s in iter_ndjson(students_jsonl)])
+
+two_on_one_line = os.path.join(workdir, "two_on_one_line.jsonl")
+with open(two_on_one_line, "w") as f:
+    f.write('{"StudentID": "101"}\n{"StudentID": "102"},{"StudentID": "103"}\n')
+try:
+    print(list(iter_ndjson(two_on_one_line)))
+except StreamingJSONError as exc:
+    print("StreamingJSONError:", exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. A Big Enrolment Export
+# MAGIC
+# MAGIC 200,000 students with 1–5 courses each. We compute **total credits per gender** two ways:
+# MAGIC `json.load` of the whole file vs `iter_json` one student at a time.
+# MAGIC As in earlier lessons, time and memory are measured in **separate** runs (`tracemalloc` slows allocations).
+
+# COMMAND ----------
+
+# DBTITLE 1, Create the Export
+random.seed(11)
+catalog = [{"CourseID": f"C{i:03d}", "CourseName": f"Course number {i}", "Credits": random.randint(2, 5)}
+           for i in range(200)]
+N = 200_000
+
+big_json = os.path.join(workdir, "enrolments.json")
+with open(big_json, "w") as f:
+    f.write('{"Students": {"Student": [\n')
+    for i in range(N):
+        student = {"StudentID": str(100_000 + i), "FirstName": f"first{i}", "LastName": f"last{i}",
+                   "Gender": random.choice(["Male", "Female"]), "Age": random.randint(18, 30),
+                   "Courses": {"Course": random.sample(catalog, random.randint(1, 5))},
+                   "Email": f"student{i}@example.com"}
+        f.write(("," if i else "") + json.dumps(student) + "\n")
+    f.write("]}}\n")
+
+big_jsonl = os.path.join(workdir, "enrolments.jsonl")
+with open(big_jsonl, "w") as f:
+    for student in iter_json(big_json, "Students.Student[*]"):
+        f.write(json.dumps(student) + "\n")
+
+print(f"enrolments.json  : {os.path.getsize(big_json) / 1024 / 1024:.1f} MB")
+print(f"enrolments.jsonl : {os.path.getsize(big_jsonl) / 1024 / 1024:.1f} MB")
+
+# COMMAND ----------
+
+# DBTITLE 1, Time and Memory
+def credits_by_gender(students):
+    totals = {}
+    for s in students:
+        totals[s["Gender"]] = totals.get(s["Gender"], 0) + sum(c["Credits"] for c in s["Courses"]["Course"])
+    return totals
+
+
+def with_json_load():
+    with open(big_json) as f:
+        return credits_by_gender(json.load(f)["Students"]["Student"])
+
+
+ways = [
+    ("json.load (whole tree)", with_json_load),
+    ("iter_json (streaming)", lambda: credits_by_gender(iter_json(big_json, "Students.Student[*]"))),
+    ("iter_ndjson (JSON Lines)", lambda: credits_by_gender(iter_ndjson(big_jsonl))),
+    ("json.loads per line", lambda: credits_by_gender(json.loads(line) for line in open(big_jsonl))),
+]
+
+results = []
+for label, fn in ways:
+    start = time.perf_counter()
+    results.append(fn())
+    print(f"{label:<26} {time.perf_counter() - start:5.2f}s")
+print("same totals:", all(r == results[0] for r in results))
+
+for label, fn in ways[:3]:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<26} peak memory {peak / 1024 / 1024:7.1f} MiB")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ Streaming keeps memory at a few hundred KiB — the buffer plus one student — instead of the whole tree,
+# MAGIC so a multi-GB export is processed in **constant memory**. The elements are still decoded by the C parser,
+# MAGIC and streaming is even **faster** than `json.load` here: the garbage collector never has to scan a huge tree
+# MAGIC of live dicts and lists.
+# MAGIC
+# MAGIC ⚠️ Values of keys that are **not** on the path are decoded once and thrown away. If a document has a huge
+# MAGIC sibling value next to the array you want, that value has to fit in memory for a moment.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Need | Use |
+# MAGIC |------|-----|
+# MAGIC | Small file, need everything | `json.load(f)` |
+# MAGIC | Big document, process one record at a time | `iter_json(path, "Students.Student[*]")` |
+# MAGIC | Nested arrays | `iter_json(path, "Students.Student[*].Courses.Course[*]")` |
+# MAGIC | One JSON object per line | `iter_ndjson(path)` — batches of lines, one `json.loads` per batch |
+# MAGIC
+# MAGIC - Memory: one chunk (`chunk_size`, 64 KiB by default) + the element being built
+# MAGIC - Each element is parsed by the C decoder (`JSONDecoder.raw_decode`)
+# MAGIC - Broken input raises `StreamingJSONError` with the character position
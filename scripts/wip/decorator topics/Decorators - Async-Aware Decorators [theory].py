@@ -0,0 +1,277 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Async-Aware Decorators**
+# MAGIC
+# MAGIC All the decorators from the earlier lessons (`log`, `timer`, `debug`, `announce`, `double_result`, `safe_divide`) are **sync-only**.
+# MAGIC
+# MAGIC What happens if we put one of them on an `async def` function?
+# MAGIC
+# MAGIC - Calling an `async def` function does **not** run it — it returns a **coroutine object**
+# MAGIC - So the sync `wrapper` finishes immediately, measures nothing, and `debug` prints `<coroutine object ...>`
+# MAGIC - `double_result` even tries to do `coroutine * 2` → `TypeError`
+# MAGIC
+# MAGIC In this lesson every decorator checks **once, at decoration time**, whether the target is a coroutine function:
+# MAGIC
+# MAGIC ```
+# MAGIC inspect.iscoroutinefunction(func) → True  → return an async def wrapper
+# MAGIC                                  → False → return a normal def wrapper
+# MAGIC ```
+# MAGIC
+# MAGIC The async wrapper does **exactly one** `await` (the original function) — no extra awaits, no extra tasks.
+# MAGIC And `functools.wraps` keeps the original `__name__`, `__doc__`, etc.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. The Problem
+
+# COMMAND ----------
+
+# DBTITLE 1, Sync Decorator on an Async Function
+import time
+import asyncio
+import inspect
+import functools
+
+def old_debug(func):
+    def wrapper(*args, **kwargs):
+        print("Calling:", func.__name__)
+        result = func(*args, **kwargs)
+        print("Returned:", result)
+        return result
+    return wrapper
+
+@old_debug
+async def fetch_price():
+    await asyncio.sleep(0.01)
+    return 100
+
+coro = fetch_price()         # prints "Returned: <coroutine object ...>"
+print(asyncio.run(coro))     # the real value only shows up later
+print(fetch_price.__name__)  # "wrapper" — metadata is lost too
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. `log` and `announce`
+
+# COMMAND ----------
+
+# DBTITLE 1, Async-Aware log and announce
+def log(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            print(f"[LOG]: Function '{func.__name__}' was called")
+            return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        print(f"[LOG]: Function '{func.__name__}' was called")
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def announce(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            print("Calling function:", func.__name__)
+            result = await func(*args, **kwargs)
+            print("Function complete.")
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        print("Calling function:", func.__name__)
+        result = func(*args, **kwargs)
+        print("Function complete.")
+        return result
+    return wrapper
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. `timer`
+# MAGIC
+# MAGIC For a coroutine, the time is measured **around the `await`**, so it includes the whole run of the coroutine
+# MAGIC (including the time it spends waiting on I/O).
+# MAGIC The `try / finally` makes sure failed calls are timed too.
+
+# COMMAND ----------
+
+# DBTITLE 1, Async-Aware timer
+def timer(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                print(f"[TIMER] {func.__name__} took {time.perf_counter() - start:.4f}s")
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            print(f"[TIMER] {func.__name__} took {time.perf_counter() - start:.4f}s")
+    return wrapper
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. `debug`, `double_result` and `safe_divide`
+# MAGIC
+# MAGIC These work on the **return value**, so the async version must `await` first and only then look at the result.
+# MAGIC `safe_divide` checks its arguments **before** the call, so its async fast path returns without awaiting anything.
+
+# COMMAND ----------
+
+# DBTITLE 1, Async-Aware Return-Value Decorators
+def debug(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            print("Calling:", func.__name__)
+            result = await func(*args, **kwargs)
+            print("Returned:", result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        print("Calling:", func.__name__)
+        result = func(*args, **kwargs)
+        print("Returned:", result)
+        return result
+    return wrapper
+
+
+def double_result(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return (await func(*args, **kwargs)) * 2
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs) * 2
+    return wrapper
+
+
+def safe_divide(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(a, b):
+            if b == 0:
+                return "Error: Cannot divide by zero"
+            return await func(a, b)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(a, b):
+        if b == 0:
+            return "Error: Cannot divide by zero"
+        return func(a, b)
+    return wrapper
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 5. Using Them on Sync and Async Functions
+
+# COMMAND ----------
+
+# DBTITLE 1, Same Decorators, Sync Functions
+@log
+@timer
+def slow_add(a, b):
+    time.sleep(0.1)
+    return a + b
+
+@safe_divide
+def divide(a, b):
+    return a / b
+
+print("Result:", slow_add(5, 7))
+print(divide(10, 2), divide(10, 0))
+
+# COMMAND ----------
+
+# DBTITLE 1, Same Decorators, Async Functions
+@announce
+@timer
+async def slow_add_async(a, b):
+    await asyncio.sleep(0.1)
+    return a + b
+
+@debug
+@double_result
+async def sum_two_async(a, b):
+    """Add two numbers (asynchronously)."""
+    return a + b
+
+@safe_divide
+async def divide_async(a, b):
+    return a / b
+
+async def main():
+    print("Result:", await slow_add_async(5, 7))
+    print("Doubled:", await sum_two_async(10, 5))
+    print(await divide_async(10, 2), await divide_async(10, 0))
+
+asyncio.run(main())
+
+print(sum_two_async.__name__, "-", sum_two_async.__doc__)
+print("still a coroutine function?", inspect.iscoroutinefunction(sum_two_async))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 6. Many Handlers Running Together
+# MAGIC
+# MAGIC Because the wrapper only `await`s the real coroutine, 100 decorated handlers still overlap —
+# MAGIC the total time is about **one** sleep, not 100.
+
+# COMMAND ----------
+
+# DBTITLE 1, Concurrent Decorated Handlers
+@double_result
+async def handler(n):
+    await asyncio.sleep(0.1)
+    return n
+
+async def serve():
+    start = time.perf_counter()
+    results = await asyncio.gather(*(handler(i) for i in range(100)))
+    print(f"{len(results)} handlers in {time.perf_counter() - start:.2f}s, sum = {sum(results)}")
+
+asyncio.run(serve())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Step | How |
+# MAGIC |------|-----|
+# MAGIC | Detect async target | `inspect.iscoroutinefunction(func)` (once, when decorating) |
+# MAGIC | Async wrapper | `async def wrapper(...)` + `await func(...)` |
+# MAGIC | Keep metadata | `@functools.wraps(func)` on both wrappers |
+# MAGIC | Stay fast | One `await` per call, no extra tasks or sleeps |
+# MAGIC
+# MAGIC ```
+# MAGIC def deco(func):
+# MAGIC     if inspect.iscoroutinefunction(func):
+# MAGIC         async def wrapper(*a, **kw): return await func(*a, **kw)
+# MAGIC     else:
+# MAGIC         def wrapper(*a, **kw): return func(*a, **kw)
+# MAGIC     return functools.wraps(func)(wrapper)
+# MAGIC ```
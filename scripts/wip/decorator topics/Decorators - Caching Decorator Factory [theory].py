@@ -0,0 +1,396 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Caching Decorators (`@cache(maxsize=..., ttl=..., max_bytes=...)`)**
+# MAGIC
+# MAGIC In the parameters lesson we built `repeat(n)` as a **decorator factory**:
+# MAGIC
+# MAGIC ```
+# MAGIC repeat(n) → returns decorator
+# MAGIC decorator → returns wrapper
+# MAGIC wrapper → calls the function
+# MAGIC ```
+# MAGIC
+# MAGIC Here we use the exact same pattern to build a **memoizing** decorator.
+# MAGIC If a function is **pure** (same input → same output), we can remember its results and skip the work next time.
+# MAGIC
+# MAGIC Our `cache` factory supports:
+# MAGIC - `maxsize` → keep at most N results, drop the **least recently used** (LRU)
+# MAGIC - `ttl` → results expire after N seconds
+# MAGIC - `max_bytes` → keep the total (approximate) size of results under a limit
+# MAGIC - `key` → a custom function that builds the cache key from the arguments
+# MAGIC - **hit / miss / eviction counters**
+# MAGIC - **single-flight**: if 10 threads ask for the same missing key, the function runs **once**
+# MAGIC - an **async** version for `async def` functions
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. Building the Cache Key
+# MAGIC
+# MAGIC By default the key is made from the positional and keyword arguments (they must be hashable).
+# MAGIC A `key=` function can be passed instead, e.g. `key=lambda circle: circle._radius`.
+
+# COMMAND ----------
+
+# DBTITLE 1, Default Key Function
+import sys
+import time
+import asyncio
+import inspect
+import threading
+import functools
+from collections import OrderedDict
+
+_KWARGS_MARK = object()
+
+def default_key(*args, **kwargs):
+    if not kwargs:
+        return args
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+print(default_key(1, 2))
+print(default_key(5))
+print(default_key(1, b=2)[-1])
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. The Storage: `CacheStore`
+# MAGIC
+# MAGIC An `OrderedDict` keeps keys in **usage order**:
+# MAGIC - `move_to_end(key)` on every hit → most recently used is at the end
+# MAGIC - the **first** key is always the least recently used → evicted first
+# MAGIC
+# MAGIC Each entry stores `(value, expires_at, size_in_bytes)`.
+
+# COMMAND ----------
+
+# DBTITLE 1, CacheStore Class
+class CacheStore:
+    def __init__(self, maxsize=128, ttl=None, max_bytes=None, sizeof=sys.getsizeof):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.data = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0                           # misses that waited for another caller's computation
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value). Must be called with self.lock held."""
+        entry = self.data.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        value, expires_at, size = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.evictions += 1
+            self.misses += 1
+            return False, None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def record_wait(self):
+        """Count the miss just returned by get() as a wait on a running computation. Lock held."""
+        self.misses -= 1
+        self.waits += 1
+
+    def put(self, key, value):
+        """Store a value. Must be called with self.lock held."""
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return                               # too big to ever fit
+        if key in self.data:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self.data[key] = (value, expires_at, size)
+        self.bytes += size
+        while ((self.maxsize is not None and len(self.data) > self.maxsize)
+               or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            oldest = next(iter(self.data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self.data.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.bytes = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "waits": self.waits, "evictions": self.evictions,
+                "size": len(self.data), "bytes": self.bytes,
+                "maxsize": self.maxsize, "ttl": self.ttl, "max_bytes": self.max_bytes}
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Single-Flight
+# MAGIC
+# MAGIC Without single-flight, 10 threads that miss on the same key **all** run the expensive function.
+# MAGIC
+# MAGIC With single-flight:
+# MAGIC 1. The **first** thread (the "leader") registers a `_Flight` for the key and computes
+# MAGIC 2. Other threads find the `_Flight` and simply **wait** on it
+# MAGIC 3. The leader stores the result (or the exception) and wakes everybody up
+# MAGIC
+# MAGIC `cache_info()` counts the waiting callers as `waits`, not `misses`: `misses` is how often the function ran.
+# MAGIC
+# MAGIC Errors are **not cached** — the next call after a failure tries again.
+
+# COMMAND ----------
+
+# DBTITLE 1, The cache Decorator Factory
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def cache(maxsize=128, ttl=None, max_bytes=None, key=None, sizeof=sys.getsizeof):
+    make_key = key or default_key
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            return _async_cache(func, CacheStore(maxsize, ttl, max_bytes, sizeof), make_key)
+
+        store = CacheStore(maxsize, ttl, max_bytes, sizeof)
+        flights = {}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            k = make_key(*args, **kwargs)
+            with store.lock:
+                found, value = store.get(k)
+                if found:
+                    return value                 # fast path: cache hit
+                flight = flights.get(k)
+                leader = flight is None
+                if leader:
+                    flight = flights[k] = _Flight()
+                else:
+                    store.record_wait()
+
+            if not leader:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+
+            try:
+                flight.value = func(*args, **kwargs)
+            except BaseException as exc:
+                flight.error = exc
+                raise
+            else:
+                with store.lock:
+                    store.put(k, flight.value)
+                return flight.value
+            finally:
+                with store.lock:
+                    del flights[k]
+                flight.done.set()
+
+        wrapper.cache_info = store.info
+        wrapper.cache_clear = store.clear
+        return wrapper
+    return decorator
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. The Async Variant
+# MAGIC
+# MAGIC For `async def` functions the waiting side uses an `asyncio.Future` instead of a thread `Event`.
+# MAGIC The lock is not needed: everything runs on one event loop thread, and there is **no `await`**
+# MAGIC between checking the cache and registering the flight.
+# MAGIC
+# MAGIC A task can be **cancelled** (a timeout, a closed connection). If that happens to the leader, its
+# MAGIC `CancelledError` is not passed on to the waiters — they were not cancelled. They look again instead,
+# MAGIC and the first one back becomes the new leader.
+
+# COMMAND ----------
+
+# DBTITLE 1, Async Cache Wrapper
+_LEADER_CANCELLED = object()
+
+
+def _async_cache(func, store, make_key):
+    flights = {}
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        k = make_key(*args, **kwargs)
+        while True:
+            found, value = store.get(k)
+            if found:
+                return value
+            flight = flights.get(k)
+            if flight is None:
+                break
+            store.record_wait()
+            value = await asyncio.shield(flight)
+            if value is not _LEADER_CANCELLED:
+                return value
+
+        flight = flights[k] = asyncio.get_running_loop().create_future()
+        try:
+            value = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            flight.set_result(_LEADER_CANCELLED)  # only the leader was cancelled: waiters try again
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            flight.exception()                   # mark as retrieved if nobody waits
+            raise
+        else:
+            store.put(k, value)
+            flight.set_result(value)
+            return value
+        finally:
+            del flights[k]
+
+    wrapper.cache_info = store.info
+    wrapper.cache_clear = store.clear
+    return wrapper
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 5. Examples
+
+# COMMAND ----------
+
+# DBTITLE 1, LRU with maxsize
+@cache(maxsize=2)
+def square(x):
+    print("computing", x)
+    return x * x
+
+square(2); square(3); square(2)   # 2 is a hit
+square(4)                          # evicts 3 (least recently used)
+square(3)                          # computed again
+print(square.cache_info())
+
+# COMMAND ----------
+
+# DBTITLE 1, Expiring Results with ttl
+@cache(ttl=0.05)
+def now_rounded():
+    return round(time.time(), 1)
+
+now_rounded(); now_rounded()
+time.sleep(0.06)
+now_rounded()
+print(now_rounded.cache_info())    # 2 misses, 1 hit, 1 eviction
+
+# COMMAND ----------
+
+# DBTITLE 1, Size-Bounded Cache with max_bytes
+@cache(maxsize=None, max_bytes=20_000)
+def make_list(n):
+    return list(range(n))
+
+for n in [100, 500, 100, 900, 500, 1_500, 100]:
+    make_list(n)
+print(make_list.cache_info())
+
+# COMMAND ----------
+
+# DBTITLE 1, Caching a Method with a key Function (Circle.area)
+class Circle:
+    def __init__(self, radius):
+        self._radius = radius
+
+    @property
+    @cache(maxsize=1024, key=lambda self: self._radius)
+    def area(self):
+        time.sleep(0.01)                 # pretend this is expensive
+        return 3.14 * self._radius * self._radius
+
+print(Circle(5).area, Circle(5).area)    # different objects, same radius → one computation
+print(Circle.area.fget.cache_info())
+
+# COMMAND ----------
+
+# DBTITLE 1, Single-Flight Under Load (Threads)
+calls = 0
+
+@cache()
+def slow_reduce(n):
+    global calls
+    calls += 1
+    time.sleep(0.05)
+    return sum(range(n))
+
+threads = [threading.Thread(target=slow_reduce, args=(1_000,)) for _ in range(20)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print("function ran", calls, "time(s) for 20 concurrent callers")
+
+# COMMAND ----------
+
+# DBTITLE 1, Async Single-Flight
+async_calls = 0
+
+@cache(maxsize=16)
+async def fetch_user(user_id):
+    global async_calls
+    async_calls += 1
+    await asyncio.sleep(0.05)
+    return {"id": user_id}
+
+async def main():
+    results = await asyncio.gather(*(fetch_user(7) for _ in range(50)))
+    print(results[0], "- coroutine ran", async_calls, "time(s) for 50 callers")
+    print(fetch_user.cache_info())
+
+asyncio.run(main())
+
+# COMMAND ----------
+
+# DBTITLE 1, Async: the Leader Is Cancelled
+async def leader_cancelled():
+    leader = asyncio.create_task(fetch_user(8))
+    await asyncio.sleep(0)                   # the leader registers the flight
+    waiters = [asyncio.create_task(fetch_user(8)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    print("waiters got:", await asyncio.gather(*waiters))
+    print("leader cancelled:", leader.cancelled(), "- coroutine ran", async_calls, "time(s) in total")
+    print(fetch_user.cache_info())
+
+asyncio.run(leader_cancelled())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Option | Meaning |
+# MAGIC |--------|---------|
+# MAGIC | `maxsize` | LRU limit on number of entries (`None` = unlimited) |
+# MAGIC | `ttl` | Seconds before an entry expires |
+# MAGIC | `max_bytes` | Limit on total `sys.getsizeof` of cached values |
+# MAGIC | `key` | Custom key function (same arguments as the decorated function) |
+# MAGIC | `cache_info()` | Hits, misses, waits (single-flight), evictions, size |
+# MAGIC
+# MAGIC ```
+# MAGIC cache(...) → returns decorator      (factory, like repeat(n))
+# MAGIC decorator  → returns wrapper        (sync or async)
+# MAGIC wrapper    → checks cache, runs function once per key
+# MAGIC ```
+# MAGIC
+# MAGIC ⚠️ Only cache **pure** functions — a cached result will not notice changes in the outside world.
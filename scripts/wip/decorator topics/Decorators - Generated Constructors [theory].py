@@ -0,0 +1,375 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Class Decorators that Generate `__init__` (Like `dataclasses`)**
+# MAGIC
+# MAGIC In the class decorators lesson, `log_creation`, `no_empty_strings` and `uppercase_attributes` each **wrapped** `__init__`:
+# MAGIC
+# MAGIC ```
+# MAGIC Person(...) → new_init (log) → new_init (check) → new_init (upper) → original __init__
+# MAGIC ```
+# MAGIC
+# MAGIC Stacking all three means **3 extra function calls**, `*args/**kwargs` packing at every level,
+# MAGIC and `uppercase_attributes` walks `self.__dict__` on **every** object creation.
+# MAGIC
+# MAGIC `dataclasses` takes a different approach: it **writes the source code** of `__init__` as a string and compiles it **once**.
+# MAGIC We do the same here:
+# MAGIC
+# MAGIC 1. Each rule (log / check / transform) is a small **step** that contributes lines of code
+# MAGIC 2. The `fast_class(...)` decorator glues all lines into **one** `__init__` and compiles it with `exec`
+# MAGIC 3. Optionally it adds `__slots__` (no per-object `__dict__` → less memory, faster attribute access)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. Steps: Small Pieces of Generated Code
+# MAGIC
+# MAGIC A step can add code:
+# MAGIC - `prologue(cls_name)` → lines that run once at the **start** of `__init__`
+# MAGIC - `per_field(name, annotation)` → lines for **each field**, before it is stored on `self`
+# MAGIC
+# MAGIC Objects a step needs at runtime (e.g. a custom function) go into `globals()` of the generated code.
+
+# COMMAND ----------
+
+# DBTITLE 1, InitStep Base Class and Built-in Steps
+import sys
+import types
+import typing
+import timeit
+
+
+class InitStep:
+    def globals(self):
+        return {}
+
+    def prologue(self, cls_name):
+        return []
+
+    def per_field(self, name, annotation):
+        return []
+
+
+class LogCreation(InitStep):
+    def prologue(self, cls_name):
+        return [f"print({f'[LOG] Creating instance of {cls_name}'!r})"]
+
+
+def _can_be_str(annotation):
+    # trust annotations like dataclasses do: a field annotated `float` is never a string,
+    # but `Any`, `object`, `str | None` and unknown annotations (e.g. "forward refs") might be
+    if annotation is typing.Any or annotation is object:
+        return True
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union or origin is types.UnionType:
+        return any(_can_be_str(arg) for arg in typing.get_args(annotation))
+    if origin is not None:                         # list[str], dict[str, int], ...
+        return False
+    if isinstance(annotation, type):
+        return issubclass(annotation, str)
+    return True
+
+
+class NoEmptyStrings(InitStep):
+    def per_field(self, name, annotation):
+        if not _can_be_str(annotation):
+            return []
+        return [f"if {name} == '':",
+                f"    raise ValueError('Attributes cannot be empty strings!')"]
+
+
+class UppercaseAttributes(InitStep):
+    def per_field(self, name, annotation):
+        if not _can_be_str(annotation):
+            return []
+        return [f"if isinstance({name}, str):",   # annotations are not enforced: `name: str` can still be None
+                f"    {name} = {name}.upper()"]
+
+
+class Check(InitStep):
+    """Run a custom check function on every field value (or only on some fields)."""
+
+    def __init__(self, func, message, fields=None):
+        self.func = func
+        self.message = message
+        self.fields = fields
+        self.ref = f"_check_{id(self)}"
+
+    def globals(self):
+        return {self.ref: self.func}
+
+    def per_field(self, name, annotation):
+        if self.fields is not None and name not in self.fields:
+            return []
+        return [f"if not {self.ref}({name}):",
+                f"    raise ValueError({f'{self.message}: {name}'!r})"]
+
+
+log_creation = LogCreation()
+no_empty_strings = NoEmptyStrings()
+uppercase_attributes = UppercaseAttributes()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. The `fast_class(...)` Decorator Factory
+# MAGIC
+# MAGIC Fields are declared with **annotations** (exactly like `@dataclass`).
+# MAGIC Annotations are trusted: string rules are not generated for a field annotated as e.g. `float`.
+# MAGIC A class-level value becomes the field's **default**.
+# MAGIC
+# MAGIC With `slots=True` we must build a **new class**, because `__slots__` only works when it exists at class-creation
+# MAGIC time (this is also what `@dataclass(slots=True)` does). Methods that use zero-argument `super()` keep a hidden
+# MAGIC `__class__` cell that still points to the **old** class, so we point those cells to the new one.
+# MAGIC
+# MAGIC Like `dataclasses`, a field without a default cannot follow a field with one: that would be an invalid `def`,
+# MAGIC so it is reported as a `TypeError` before any code is generated.
+
+# COMMAND ----------
+
+# DBTITLE 1, fast_class Decorator Factory
+_MISSING = object()
+
+
+def _build_init(cls_name, fields, steps):
+    with_default = None
+    for name, _, default in fields:
+        if default is not _MISSING:
+            with_default = name
+        elif with_default is not None:
+            raise TypeError(f"{cls_name}: non-default field {name!r} follows default field {with_default!r}")
+    params, body, namespace = ["self"], [], {}
+    for step in steps:
+        namespace.update(step.globals())
+        body.extend(step.prologue(cls_name))
+
+    for name, annotation, default in fields:
+        if default is _MISSING:
+            params.append(name)
+        else:
+            namespace[f"_default_{name}"] = default
+            params.append(f"{name}=_default_{name}")
+        for step in steps:
+            body.extend(step.per_field(name, annotation))
+    for name, _, _ in fields:
+        body.append(f"self.{name} = {name}")
+
+    source = f"def __init__({', '.join(params)}):\n" + "\n".join(f"    {line}" for line in body or ["pass"])
+    exec(source, namespace)
+    init = namespace["__init__"]
+    init.__source__ = source
+    return init
+
+
+def _fix_class_cells(old, new):
+    """Point the `__class__` cell of methods using zero-argument super() at the rebuilt class."""
+    for value in new.__dict__.values():
+        if isinstance(value, (classmethod, staticmethod)):
+            functions = [value.__func__]
+        elif isinstance(value, property):
+            functions = [value.fget, value.fset, value.fdel]
+        else:
+            functions = [value]
+        for func in functions:
+            code = getattr(func, "__code__", None)
+            if code is not None and "__class__" in code.co_freevars:
+                cell = func.__closure__[code.co_freevars.index("__class__")]
+                if cell.cell_contents is old:
+                    cell.cell_contents = new
+
+
+def fast_class(*steps, slots=False):
+    def decorator(cls):
+        annotations = cls.__dict__.get("__annotations__", {})
+        fields = [(name, annotation, cls.__dict__.get(name, _MISSING))
+                  for name, annotation in annotations.items()]
+
+        if slots:
+            body = {k: v for k, v in cls.__dict__.items()
+                    if k not in annotations and k not in ("__dict__", "__weakref__")}
+            body["__slots__"] = tuple(annotations)
+            old, cls = cls, type(cls)(cls.__name__, cls.__bases__, body)
+            _fix_class_cells(old, cls)
+
+        init = _build_init(cls.__name__, fields, steps)
+        init.__qualname__ = f"{cls.__qualname__}.__init__"
+        cls.__init__ = init
+        cls.__fields__ = tuple(annotations)
+        return cls
+    return decorator
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Using It on `Person`, `Product` and `City`
+
+# COMMAND ----------
+
+# DBTITLE 1, Generated Constructors in Action
+@fast_class(log_creation)
+class Person:
+    name: str
+
+@fast_class(no_empty_strings, slots=True)
+class Product:
+    name: str
+    brand: str
+
+@fast_class(uppercase_attributes, slots=True)
+class City:
+    name: str
+    country: str = "India"
+
+p = Person("Alice")
+item1 = Product("Laptop", "Dell")
+c = City("Hyderabad")
+print(p.name, "|", item1.name, item1.brand, "|", c.name, c.country)
+
+try:
+    Product("", "HP")
+except ValueError as exc:
+    print("Error:", exc)
+
+print(hasattr(item1, "__dict__"))   # False → __slots__ in use
+
+# COMMAND ----------
+
+# DBTITLE 1, Edge Cases: None, Any, super() and Field Order
+@fast_class(no_empty_strings, uppercase_attributes)
+class Contact:
+    name: typing.Any
+    email: typing.Optional[str] = None
+
+print(Contact("pavan").name, Contact("pavan").email)          # None is left alone
+try:
+    Contact("")
+except ValueError as exc:
+    print("Error:", exc)                                      # Any may be a str → checked
+
+
+class Base:
+    def describe(self):
+        return "base"
+
+@fast_class(slots=True)
+class Child(Base):
+    name: str
+
+    def describe(self):
+        return f"{self.name} <- {super().describe()}"          # zero-argument super() in a rebuilt class
+
+print(Child("child").describe())
+
+try:
+    @fast_class()
+    class Broken:
+        country: str = "India"
+        name: str
+except TypeError as exc:
+    print("TypeError:", exc)
+
+# COMMAND ----------
+
+# DBTITLE 1, Looking at the Generated Code
+print(City.__init__.__source__)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ One flat function: no wrappers, no `*args`, no `__dict__` walk — the upper-casing is done **before** storing.
+
+# COMMAND ----------
+
+# DBTITLE 1, Stacking All Rules + a Custom Check
+@fast_class(no_empty_strings, uppercase_attributes,
+            Check(lambda v: v > 0, "must be positive", fields={"price"}),
+            slots=True)
+class Item:
+    name: str
+    brand: str
+    price: float = 1.0
+
+print(Item.__init__.__source__)
+i = Item("laptop", "dell", 55_000.0)
+print(i.name, i.brand, i.price)
+
+try:
+    Item("mouse", "hp", -5)
+except ValueError as exc:
+    print("Error:", exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. How Much Faster and Smaller?
+# MAGIC
+# MAGIC We compare:
+# MAGIC - the **wrapped** version from the class decorators lesson (check + uppercase stacked)
+# MAGIC - our **generated** version with `__slots__`
+# MAGIC - a plain **tuple** as the lower bound
+
+# COMMAND ----------
+
+# DBTITLE 1, Constructor Benchmark
+def wrap_no_empty_strings(cls):
+    original_init = cls.__init__
+    def new_init(self, *args, **kwargs):
+        for value in args:
+            if value == "":
+                raise ValueError("Attributes cannot be empty strings!")
+        original_init(self, *args, **kwargs)
+    cls.__init__ = new_init
+    return cls
+
+def wrap_uppercase_attributes(cls):
+    original_init = cls.__init__
+    def new_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        for attr, value in self.__dict__.items():
+            if isinstance(value, str):
+                setattr(self, attr, value.upper())
+    cls.__init__ = new_init
+    return cls
+
+@wrap_uppercase_attributes
+@wrap_no_empty_strings
+class WrappedCity:
+    def __init__(self, name, country):
+        self.name = name
+        self.country = country
+
+@fast_class(no_empty_strings, uppercase_attributes, slots=True)
+class FastCity:
+    name: str
+    country: str
+
+n = 200_000
+results = {
+    "wrapped __init__": timeit.timeit(lambda: WrappedCity("Hyderabad", "India"), number=n),
+    "generated + slots": timeit.timeit(lambda: FastCity("Hyderabad", "India"), number=n),
+    "tuple": timeit.timeit(lambda: ("Hyderabad".upper(), "India".upper()), number=n),
+}
+for label, t in results.items():
+    print(f"{label:<18} {t / n * 1e9:6.0f} ns per object")
+
+w, f = WrappedCity("Hyderabad", "India"), FastCity("Hyderabad", "India")
+print("bytes per object: wrapped =", sys.getsizeof(w) + sys.getsizeof(w.__dict__),
+      "| slots =", sys.getsizeof(f))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Approach | Cost per object |
+# MAGIC |----------|-----------------|
+# MAGIC | Wrapping `__init__` | One extra call + `*args` packing **per decorator**, `__dict__` walks |
+# MAGIC | Generated `__init__` | One function, compiled once, only the lines that are needed |
+# MAGIC | `slots=True` | No per-object `__dict__` → smaller objects |
+# MAGIC
+# MAGIC ```
+# MAGIC @fast_class(step1, step2, ..., slots=True)
+# MAGIC class Record:
+# MAGIC     field: type = default
+# MAGIC
+# MAGIC → steps contribute code lines → one __init__ is exec'd → (new class with __slots__)
+# MAGIC ```
@@ -0,0 +1,361 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Resilience Decorators: `@retry`, `@timeout`, `@circuit_breaker`**
+# MAGIC
+# MAGIC So far:
+# MAGIC - `safe_divide` was our only **error-handling** decorator
+# MAGIC - `repeat(n)` re-ran a function **blindly**, n times, no matter what happened
+# MAGIC
+# MAGIC When a function talks to something **flaky** (a database, an API), we need smarter behaviour:
+# MAGIC
+# MAGIC | Decorator | What it does |
+# MAGIC |-----------|--------------|
+# MAGIC | `@retry(...)` | Try again on failure, waiting longer each time (**exponential backoff + jitter**) |
+# MAGIC | `@timeout(seconds)` | Give up if the call takes too long (**deadline**) |
+# MAGIC | `@circuit_breaker(...)` | After many failures, **stop calling** for a while and fail fast |
+# MAGIC
+# MAGIC All three are **decorator factories** (like `repeat(n)`) and all three work on `def` **and** `async def` functions.
+
+# COMMAND ----------
+
+# DBTITLE 1, Imports
+import time
+import random
+import asyncio
+import inspect
+import threading
+import functools
+import concurrent.futures
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. `@retry` with Exponential Backoff and Jitter
+# MAGIC
+# MAGIC Wait time before attempt `n` (starting at 0):
+# MAGIC
+# MAGIC ```
+# MAGIC cap   = min(max_delay, base_delay * 2 ** n)
+# MAGIC sleep = random.uniform(0, cap)      ← "full jitter"
+# MAGIC ```
+# MAGIC
+# MAGIC Why jitter? If 100 clients fail at the same moment and all wait **exactly** 1s, they all hit the server again at the
+# MAGIC same moment. Random waits spread them out.
+
+# COMMAND ----------
+
+# DBTITLE 1, retry Decorator Factory
+def backoff_delays(attempts, base_delay, max_delay, jitter=True):
+    for n in range(attempts - 1):
+        cap = min(max_delay, base_delay * 2 ** n)
+        yield random.uniform(0, cap) if jitter else cap
+
+
+def retry(attempts=3, base_delay=0.1, max_delay=5.0, exceptions=(Exception,), jitter=True):
+    if attempts < 1:
+        raise ValueError("attempts must be >= 1")
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for delay in backoff_delays(attempts, base_delay, max_delay, jitter):
+                    try:
+                        return await func(*args, **kwargs)
+                    except exceptions as exc:
+                        print(f"[RETRY] {func.__name__} failed ({exc!r}), retrying in {delay:.3f}s")
+                    await asyncio.sleep(delay)
+                return await func(*args, **kwargs)       # last attempt: errors propagate
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for delay in backoff_delays(attempts, base_delay, max_delay, jitter):
+                try:
+                    return func(*args, **kwargs)
+                except exceptions as exc:
+                    print(f"[RETRY] {func.__name__} failed ({exc!r}), retrying in {delay:.3f}s")
+                time.sleep(delay)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# COMMAND ----------
+
+# DBTITLE 1, Retrying a Flaky Function
+@retry(attempts=5, base_delay=0.01)
+def flaky_fetch():
+    if random.random() < 0.6:
+        raise ConnectionError("network glitch")
+    return "data"
+
+random.seed(3)
+print(flaky_fetch())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. `@timeout(seconds)` — Per-Call Deadlines
+# MAGIC
+# MAGIC - **async**: `asyncio.wait_for(...)` cancels the coroutine when the deadline passes.
+# MAGIC - **sync**: we run the call in a worker thread and wait on its `Future` with a timeout.
+# MAGIC
+# MAGIC ⚠️ Python cannot kill a thread. The sync version stops **waiting**, but the worker thread finishes its call in
+# MAGIC the background. The worker pool is **bounded** (`max_workers`), so stuck calls cannot create unlimited threads.
+
+# COMMAND ----------
+
+# DBTITLE 1, timeout Decorator Factory
+class CallTimeout(TimeoutError):
+    pass
+
+
+_timeout_pool = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="timeout")
+
+
+def timeout(seconds, executor=None):
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await asyncio.wait_for(func(*args, **kwargs), seconds)
+                except asyncio.TimeoutError:
+                    raise CallTimeout(f"{func.__name__} exceeded {seconds}s") from None
+            return async_wrapper
+
+        pool = executor or _timeout_pool
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            future = pool.submit(func, *args, **kwargs)
+            try:
+                return future.result(timeout=seconds)
+            except concurrent.futures.TimeoutError:
+                future.cancel()                       # works only if it has not started yet
+                raise CallTimeout(f"{func.__name__} exceeded {seconds}s") from None
+        return wrapper
+    return decorator
+
+# COMMAND ----------
+
+# DBTITLE 1, Deadlines in Action
+@timeout(0.05)
+def slow_query():
+    time.sleep(0.2)
+    return "rows"
+
+@timeout(0.05)
+async def slow_query_async():
+    await asyncio.sleep(0.2)
+    return "rows"
+
+for call in (slow_query, lambda: asyncio.run(slow_query_async())):
+    try:
+        call()
+    except CallTimeout as exc:
+        print("Timed out:", exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. `@circuit_breaker` — Fail Fast
+# MAGIC
+# MAGIC Like the breaker in your house's fuse box:
+# MAGIC
+# MAGIC ```
+# MAGIC CLOSED  ── failure_threshold failures in a row ──▶ OPEN
+# MAGIC OPEN    ── recovery_timeout seconds pass ────────▶ HALF_OPEN
+# MAGIC HALF_OPEN ── probe call succeeds ─▶ CLOSED
+# MAGIC HALF_OPEN ── probe call fails ────▶ OPEN (timer restarts)
+# MAGIC ```
+# MAGIC
+# MAGIC - While **OPEN**, calls raise `CircuitOpenError` **immediately** — no worker is blocked waiting on a dead service.
+# MAGIC - In **HALF_OPEN** only `half_open_max_calls` probe calls are let through.
+# MAGIC - Only errors listed in `exceptions` count as failures; other errors just pass through.
+# MAGIC - A success that arrives while **OPEN** (a slow call that started before the breaker opened) is ignored:
+# MAGIC   only a probe in HALF_OPEN can close the breaker again.
+# MAGIC - The state lives in a `CircuitBreaker` object protected by a lock, so it is **shared by all threads**
+# MAGIC   (and can be shared by several functions that call the same dependency).
+
+# COMMAND ----------
+
+# DBTITLE 1, CircuitBreaker Class and Decorator
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, half_open_max_calls=1,
+                 exceptions=(Exception,)):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.exceptions = exceptions
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self, name):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    raise CircuitOpenError(f"circuit for {name} is open")
+                self.state, self.probes = self.HALF_OPEN, 0
+            if self.state == self.HALF_OPEN:
+                if self.probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"circuit for {name} is half-open, probe in progress")
+                self.probes += 1
+
+    def on_success(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                return                          # a slow call let in before the breaker opened: proves nothing
+            self.state, self.failures = self.CLOSED, 0
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state, self.opened_at = self.OPEN, time.monotonic()
+
+    def on_ignored(self):
+        # an error the breaker does not count (e.g. ValueError from bad input): just free the probe slot
+        with self._lock:
+            if self.state == self.HALF_OPEN and self.probes:
+                self.probes -= 1
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                self.before_call(func.__name__)
+                try:
+                    result = await func(*args, **kwargs)
+                except self.exceptions:
+                    self.on_failure()
+                    raise
+                except BaseException:
+                    self.on_ignored()
+                    raise
+                self.on_success()
+                return result
+            async_wrapper.breaker = self
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.before_call(func.__name__)
+            try:
+                result = func(*args, **kwargs)
+            except self.exceptions:
+                self.on_failure()
+                raise
+            except BaseException:
+                self.on_ignored()
+                raise
+            self.on_success()
+            return result
+        wrapper.breaker = self
+        return wrapper
+
+
+def circuit_breaker(failure_threshold=5, recovery_timeout=30.0, half_open_max_calls=1,
+                    exceptions=(Exception,)):
+    return CircuitBreaker(failure_threshold, recovery_timeout, half_open_max_calls, exceptions)
+
+# COMMAND ----------
+
+# DBTITLE 1, Breaker Tripping and Recovering
+service_up = False
+
+@circuit_breaker(failure_threshold=3, recovery_timeout=0.1)
+def call_service():
+    if not service_up:
+        raise ConnectionError("service down")
+    return "ok"
+
+for i in range(6):
+    try:
+        print(i, call_service())
+    except (ConnectionError, CircuitOpenError) as exc:
+        print(i, type(exc).__name__, "-", call_service.breaker.state)
+
+time.sleep(0.15)
+service_up = True
+print("after recovery_timeout:", call_service(), "-", call_service.breaker.state)
+
+# COMMAND ----------
+
+# DBTITLE 1, A Late Success Does Not Close an Open Breaker
+slow_started = threading.Event()
+
+@circuit_breaker(failure_threshold=2, recovery_timeout=10)
+def fetch(slow=False):
+    if slow:
+        slow_started.set()
+        time.sleep(0.2)                 # let in while CLOSED, finishes after the breaker opened
+        return "late ok"
+    raise ConnectionError("service down")
+
+slow_call = threading.Thread(target=lambda: print("slow call:", fetch(slow=True)))
+slow_call.start()
+slow_started.wait()
+for _ in range(2):
+    try:
+        fetch()
+    except ConnectionError:
+        pass
+print("after 2 failures:", fetch.breaker.state)
+slow_call.join()
+print("after the late success:", fetch.breaker.state)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Combining Them
+# MAGIC
+# MAGIC Order matters (bottom to top, as in the chaining lesson):
+# MAGIC
+# MAGIC ```
+# MAGIC @retry(...)            ← retries the whole thing
+# MAGIC @circuit_breaker(...)  ← each attempt is counted by the breaker
+# MAGIC @timeout(...)          ← each attempt has its own deadline
+# MAGIC def call(): ...
+# MAGIC ```
+# MAGIC
+# MAGIC We tell `retry` **not** to retry `CircuitOpenError` — when the circuit is open we want to fail fast.
+
+# COMMAND ----------
+
+# DBTITLE 1, Stacked Resilience Decorators (Async)
+attempts_seen = 0
+
+@retry(attempts=4, base_delay=0.01, exceptions=(CallTimeout, ConnectionError))
+@circuit_breaker(failure_threshold=10, recovery_timeout=1.0)
+@timeout(0.05)
+async def get_quote():
+    global attempts_seen
+    attempts_seen += 1
+    if attempts_seen < 3:
+        await asyncio.sleep(1)          # first two attempts hang → timeout
+    return 42.0
+
+print("quote:", asyncio.run(get_quote()), "after", attempts_seen, "attempts")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Decorator | Key parameters | Fails with |
+# MAGIC |-----------|----------------|------------|
+# MAGIC | `retry` | `attempts`, `base_delay`, `max_delay`, `exceptions`, `jitter` | the last error |
+# MAGIC | `timeout` | `seconds` (thread pool for sync, `wait_for` for async) | `CallTimeout` |
+# MAGIC | `circuit_breaker` | `failure_threshold`, `recovery_timeout`, `half_open_max_calls` | `CircuitOpenError` |
+# MAGIC
+# MAGIC A flaky dependency now **sheds load fast** instead of piling up blocked workers.
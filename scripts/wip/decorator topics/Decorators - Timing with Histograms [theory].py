@@ -0,0 +1,294 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Timing Decorators with Histograms and a Metrics Registry**
+# MAGIC
+# MAGIC In the chaining lesson our `timer` decorator used `time.time()` and **printed** on every call.
+# MAGIC
+# MAGIC That is fine for a demo, but on a hot function:
+# MAGIC - `print` is a write to the console on **every call** (slower than the function itself!)
+# MAGIC - We only see single numbers, never the **overall picture** (average, p99, worst case)
+# MAGIC
+# MAGIC In this lesson we build a better `timer`:
+# MAGIC 1. Uses `time.perf_counter_ns()` (high resolution, integer nanoseconds)
+# MAGIC 2. Records each duration into a **histogram** (no printing)
+# MAGIC 3. Supports **sampling** (time only every N-th call)
+# MAGIC 4. Keeps all histograms in a **registry** we can dump as **JSON** or **Prometheus** text
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. A Log-Linear (HDR-style) Histogram
+# MAGIC
+# MAGIC Storing every duration costs memory. Instead we count durations in **buckets**.
+# MAGIC
+# MAGIC - Each power of two (1-2ns, 2-4ns, 4-8ns, ...) is one **range**
+# MAGIC - Each range is split into `2 ** SUB_BITS` equal **sub-buckets**
+# MAGIC
+# MAGIC With `SUB_BITS = 4` every bucket is at most ~6% wide, and 64 ranges cover every possible `int64` nanosecond value.
+# MAGIC Recording is just a bit of integer math and one list increment — **no lock, no allocation**.
+# MAGIC
+# MAGIC > Note: under the GIL `counts[i] += 1` from two threads can very rarely lose one increment.
+# MAGIC > For metrics that is acceptable, and it keeps the hot path lock-free.
+
+# COMMAND ----------
+
+# DBTITLE 1, LatencyHistogram Class
+import time
+import json
+import threading
+import functools
+
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+
+
+class LatencyHistogram:
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (64 * SUB_COUNT)
+        self.total_ns = 0
+        self.count = 0
+        self.max_ns = 0
+
+    @staticmethod
+    def bucket_index(value_ns):
+        if value_ns < SUB_COUNT:
+            return value_ns                          # small values are exact
+        shift = value_ns.bit_length() - SUB_BITS - 1
+        sub = (value_ns >> shift) - SUB_COUNT        # top bits after the leading 1
+        return (shift + 1) * SUB_COUNT + sub
+
+    @staticmethod
+    def bucket_upper_ns(index):
+        shift, sub = divmod(index, SUB_COUNT)
+        if shift == 0:
+            return sub
+        return ((SUB_COUNT + sub + 1) << (shift - 1)) - 1
+
+    def record(self, value_ns):
+        self.counts[self.bucket_index(value_ns)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, p):
+        if self.count == 0:
+            return 0
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self.bucket_upper_ns(index), self.max_ns)
+        return self.max_ns
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum_ns": self.total_ns,
+            "mean_ns": self.total_ns / self.count if self.count else 0,
+            "max_ns": self.max_ns,
+            "p50_ns": self.percentile(50),
+            "p99_ns": self.percentile(99),
+            "p999_ns": self.percentile(99.9),
+        }
+
+
+h = LatencyHistogram("demo")
+for v in [120, 130, 150, 900, 1_000, 25_000]:
+    h.record(v)
+print(h.snapshot())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ Percentiles are **approximate** (upper edge of the bucket), but the error is bounded by the bucket width.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. The Metrics Registry
+# MAGIC
+# MAGIC The registry is a simple **name → histogram** dictionary.
+# MAGIC
+# MAGIC - A lock is used **only when a new histogram is created** (once per function), never per call
+# MAGIC - `to_json()` gives a dict-of-snapshots as JSON
+# MAGIC - `to_prometheus()` gives the Prometheus text format (a `summary` per function)
+
+# COMMAND ----------
+
+# DBTITLE 1, MetricsRegistry Class
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        h = self._histograms.get(name)
+        if h is None:
+            with self._lock:
+                h = self._histograms.setdefault(name, LatencyHistogram(name))
+        return h
+
+    def snapshot(self):
+        return {name: h.snapshot() for name, h in sorted(self._histograms.items())}
+
+    def to_json(self, indent=None):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, metric="function_latency_seconds"):
+        lines = [
+            f"# HELP {metric} Wall time spent in decorated functions.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, snap in self.snapshot().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for q, key in (("0.5", "p50_ns"), ("0.99", "p99_ns"), ("0.999", "p999_ns")):
+                lines.append(f'{metric}{{function="{label}",quantile="{q}"}} {snap[key] / 1e9:.9f}')
+            lines.append(f'{metric}_sum{{function="{label}"}} {snap["sum_ns"] / 1e9:.9f}')
+            lines.append(f'{metric}_count{{function="{label}"}} {snap["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. The `timer` Decorator (with Optional Sampling)
+# MAGIC
+# MAGIC `timer` works **with or without** parameters:
+# MAGIC
+# MAGIC ```
+# MAGIC @timer                    → time every call
+# MAGIC @timer(sample_every=100)  → time only every 100th call
+# MAGIC @timer(name="db.query")   → custom metric name
+# MAGIC ```
+# MAGIC
+# MAGIC With sampling, the un-sampled calls skip the clock completely — they only bump a counter.
+
+# COMMAND ----------
+
+# DBTITLE 1, timer Decorator
+def timer(func=None, *, name=None, sample_every=1, registry=None):
+    if sample_every < 1:
+        raise ValueError("sample_every must be >= 1")
+
+    def decorator(func):
+        hist = (registry or REGISTRY).histogram(name or func.__qualname__)
+        clock = time.perf_counter_ns
+        record = hist.record
+
+        if sample_every == 1:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = clock()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(clock() - start)
+        else:
+            calls = [0]
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                calls[0] += 1
+                if calls[0] % sample_every:
+                    return func(*args, **kwargs)     # fast path: not sampled
+                start = clock()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(clock() - start)
+
+        wrapper.histogram = hist
+        return wrapper
+
+    if func is not None:          # used as @timer without brackets
+        return decorator(func)
+    return decorator
+
+# COMMAND ----------
+
+# DBTITLE 1, Using the New timer
+@timer
+def slow_add(a, b):
+    time.sleep(0.001)
+    return a + b
+
+@timer(sample_every=10)
+def fast_square(x):
+    return x * x
+
+for i in range(20):
+    slow_add(i, i)
+for i in range(10_000):
+    fast_square(i)
+
+print(slow_add.histogram.snapshot())
+print("fast_square samples:", fast_square.histogram.count)   # 10_000 / 10 = 1000
+
+# COMMAND ----------
+
+# DBTITLE 1, Exporting the Registry
+print(REGISTRY.to_json(indent=2))
+print(REGISTRY.to_prometheus())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. How Much Does the Decorator Cost?
+# MAGIC
+# MAGIC Let us compare a bare function, the new `timer`, and the old print-based `timer`.
+
+# COMMAND ----------
+
+# DBTITLE 1, Overhead Comparison
+import io
+import timeit
+import contextlib
+
+def old_timer(func):
+    def wrapper(*args, **kwargs):
+        start = time.time()
+        result = func(*args, **kwargs)
+        end = time.time()
+        print(f"[TIMER] {func.__name__} took {end - start:.4f}s")
+        return result
+    return wrapper
+
+def bare(x):
+    return x + 1
+
+timed = timer(name="overhead.timed")(bare)
+sampled = timer(name="overhead.sampled", sample_every=64)(bare)
+printed = old_timer(bare)
+
+n = 100_000
+with contextlib.redirect_stdout(io.StringIO()):   # hide the old timer's prints
+    t_print = timeit.timeit(lambda: printed(1), number=n)
+t_bare = timeit.timeit(lambda: bare(1), number=n)
+t_timed = timeit.timeit(lambda: timed(1), number=n)
+t_sampled = timeit.timeit(lambda: sampled(1), number=n)
+
+for label, t in [("bare", t_bare), ("timer", t_timed),
+                 ("timer(sample_every=64)", t_sampled), ("old print timer", t_print)]:
+    print(f"{label:<24} {t / n * 1e9:8.0f} ns/call")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Idea | Why |
+# MAGIC |------|-----|
+# MAGIC | `perf_counter_ns()` | Monotonic, high resolution, no float rounding |
+# MAGIC | Histogram buckets | Fixed memory, p50/p99/p999 at any time |
+# MAGIC | No lock per call | Timing the hot path must not become the hot path |
+# MAGIC | `sample_every=N` | Skips the clock on N-1 of every N calls |
+# MAGIC | Registry | One place to export JSON / Prometheus text |
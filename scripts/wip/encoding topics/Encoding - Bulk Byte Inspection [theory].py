@@ -0,0 +1,321 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Looking at Bytes in Bulk: Binary / Hex Dumps, UTF-8 Histograms, Bad Bytes**
+# MAGIC
+# MAGIC In the character encoding demo we printed the bits of a name like this:
+# MAGIC
+# MAGIC ```
+# MAGIC for c in name:
+# MAGIC     print(format(ord(c), '08b'), end="")
+# MAGIC ```
+# MAGIC
+# MAGIC Perfect for `"naveen"`. But it is **two Python calls per character** (`ord` + `format`) plus a `print`.
+# MAGIC On a 500 MB dump where we want to know *"is this valid UTF-8, and if not, where are the bad bytes?"*,
+# MAGIC a per-character loop takes many minutes.
+# MAGIC
+# MAGIC In this lesson we build small tools that work on a whole `bytes` / `memoryview` at once:
+# MAGIC - `binary_dump(data)` / `hex_dump(data)` → the bits or an `xxd`-style view, without `format` per byte
+# MAGIC - `utf8_histogram(data)` → how many 1-, 2-, 3- and 4-byte characters (ASCII, Latin, Telugu, emoji...)
+# MAGIC - `scan_utf8(path)` → histogram + **byte offsets of every invalid sequence**, in chunks, for files of any size
+
+# COMMAND ----------
+
+# DBTITLE 1, The Demo Way
+import os
+import time
+import codecs
+import tempfile
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+name = "naveen"
+for c in name:
+    print(format(ord(c), '08b'), end="")
+print()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. Lookup Tables Instead of `format` per Byte
+# MAGIC
+# MAGIC A byte has only **256** possible values, so every per-byte answer can be computed once and looked up:
+# MAGIC
+# MAGIC | Question | Table | Bulk operation (runs in C) |
+# MAGIC |----------|-------|----------------------------|
+# MAGIC | bits of a byte | `np.unpackbits` | one call for the whole buffer |
+# MAGIC | hex of a byte | built in | `bytes.hex(" ")` |
+# MAGIC | printable or `.` | 256-byte table | `bytes.translate(table)` |
+# MAGIC | UTF-8 role of a byte | 256-byte table | `bytes.translate(table)` + `count` |
+# MAGIC
+# MAGIC Without NumPy, `binary_dump` joins strings from a 256-entry list: still one lookup per byte, but no `format` call.
+
+# COMMAND ----------
+
+# DBTITLE 1, binary_dump and hex_dump
+_BITS = [format(b, "08b") for b in range(256)]
+_PRINTABLE = bytes(b if 32 <= b < 127 else ord(".") for b in range(256))
+
+
+def binary_dump(data, sep=" "):
+    """'01101110 01100001 ...' for a bytes-like object."""
+    if np is None or len(sep) != 1:
+        return sep.join(map(_BITS.__getitem__, bytes(data)))
+    view = np.frombuffer(data, dtype=np.uint8)
+    if not len(view):
+        return ""
+    out = np.full((len(view), 9), ord(sep), dtype=np.uint8)       # 8 bit characters + separator per byte
+    out[:, :8] = np.unpackbits(view).reshape(-1, 8) + ord("0")
+    return out.tobytes()[:-1].decode("ascii")
+
+
+def hex_dump(data, width=16, start=0):
+    """xxd-style lines: offset, hex bytes, printable ASCII (other bytes shown as '.')."""
+    data = bytes(data)
+    lines = []
+    for pos in range(0, len(data), width):
+        row = data[pos:pos + width]
+        lines.append(f"{start + pos:08x}  {row.hex(' '):<{width * 3 - 1}}  {row.translate(_PRINTABLE).decode('ascii')}")
+    return "\n".join(lines)
+
+
+print(binary_dump(name.encode()))
+print(hex_dump("Hello Pavan\nఅ  ఆ  ఇ\nCafé “quoted”\n".encode("utf-8")))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. The UTF-8 Role of Every Byte
+# MAGIC
+# MAGIC The **first byte** of a UTF-8 character tells its length. Every other byte is a continuation byte:
+# MAGIC
+# MAGIC | Byte | Role | Example |
+# MAGIC |------|------|---------|
+# MAGIC | `00–7F` | 1-byte character (ASCII) | `n` = `6E` |
+# MAGIC | `80–BF` | continuation byte | 2nd byte of `é` = `A9` |
+# MAGIC | `C2–DF` | start of a 2-byte character | `é` = `C3 A9` |
+# MAGIC | `E0–EF` | start of a 3-byte character | `అ` = `E0 B0 85` |
+# MAGIC | `F0–F4` | start of a 4-byte character | `😊` = `F0 9F 98 8A` |
+# MAGIC | `C0 C1 F5–FF` | never valid in UTF-8 | |
+# MAGIC
+# MAGIC So `data.translate(table)` turns every byte into its role (`1`, `2`, `3`, `4`, `c`, `x`), and six
+# MAGIC `count` calls give the histogram. With NumPy, six vectorized comparisons (`np.count_nonzero(view < 0x80)`, ...)
+# MAGIC count the bytes below each boundary, and the differences give the same numbers.
+
+# COMMAND ----------
+
+# DBTITLE 1, utf8_histogram
+def _utf8_role(b):
+    if b < 0x80:
+        return ord("1")
+    if b < 0xC0:
+        return ord("c")
+    if 0xC2 <= b <= 0xDF:
+        return ord("2")
+    if 0xE0 <= b <= 0xEF:
+        return ord("3")
+    if 0xF0 <= b <= 0xF4:
+        return ord("4")
+    return ord("x")
+
+
+_UTF8_ROLE = bytes(_utf8_role(b) for b in range(256))
+_ROLE_KEYS = {"1": 1, "2": 2, "3": 3, "4": 4, "c": "continuation", "x": "never valid"}
+_BOUNDS = (0x80, 0xC0, 0xC2, 0xE0, 0xF0, 0xF5)          # where the roles change, in byte order
+
+
+def utf8_histogram(data):
+    """Characters per UTF-8 length (counted by their first byte), plus continuation and never-valid bytes."""
+    if np is not None:
+        view = np.frombuffer(data, dtype=np.uint8)
+        below = [int(np.count_nonzero(view < bound)) for bound in _BOUNDS]
+        return {1: below[0], 2: below[3] - below[2], 3: below[4] - below[3], 4: below[5] - below[4],
+                "continuation": below[1] - below[0],
+                "never valid": below[2] - below[1] + len(view) - below[5]}
+    roles = bytes(data).translate(_UTF8_ROLE)
+    return {key: roles.count(role.encode()) for role, key in _ROLE_KEYS.items()}
+
+
+print(utf8_histogram("Hello Pavan అఆఇ अआइ Café 😊".encode("utf-8")))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Finding Invalid Sequences
+# MAGIC
+# MAGIC The histogram cannot see every error: `C3 41` has a valid start byte, but `41` is not a continuation byte.
+# MAGIC Checking the *order* of bytes is what the UTF-8 decoder already does in C, so we let it:
+# MAGIC
+# MAGIC - `codecs.utf_8_decode(view, "strict", final)` decodes straight from a `memoryview` (no copy) and stops
+# MAGIC   at the first error with its position
+# MAGIC - we record the offset, skip the bad bytes and continue from there. Each byte is decoded once
+# MAGIC - pure-ASCII chunks are skipped with `bytes.isascii()` (a few microseconds per MiB)
+# MAGIC - `final=False` leaves a character that is cut at the chunk edge for the next chunk
+# MAGIC
+# MAGIC `scan_utf8(path)` does this in 16 MiB chunks, so a 500 MB dump never sits in memory.
+
+# COMMAND ----------
+
+# DBTITLE 1, invalid_utf8_offsets and scan_utf8
+Utf8Report = namedtuple("Utf8Report", "size histogram invalid_count invalid_offsets")
+
+
+def invalid_utf8_offsets(data, start=0, final=True):
+    """Offsets (plus start) of invalid UTF-8 sequences in data, and how many bytes were checked.
+
+    With final=False, an incomplete character at the end is not an error; it is left unchecked
+    (checked < len(data)) so the caller can prepend it to the next chunk.
+    """
+    view = memoryview(data).cast("B")
+    offsets, pos = [], 0
+    while pos < len(view):
+        try:
+            _, consumed = codecs.utf_8_decode(view[pos:], "strict", final)
+            pos += consumed
+            break
+        except UnicodeDecodeError as exc:
+            offsets.append(start + pos + exc.start)
+            pos += exc.end
+    return offsets, pos
+
+
+def scan_utf8(path, chunk_size=1 << 24, max_offsets=1000):
+    """Histogram and invalid-sequence offsets of a whole file, reading it in chunks."""
+    histogram = dict.fromkeys([1, 2, 3, 4, "continuation", "never valid"], 0)
+    invalid_offsets, invalid_count = [], 0
+    carry, start = b"", 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            for key, count in utf8_histogram(chunk).items():
+                histogram[key] += count
+            data = carry + chunk if carry else chunk
+            if data.isascii():
+                start += len(data)
+                carry = b""
+            else:
+                room = None if max_offsets is None else max_offsets - len(invalid_offsets)
+                found, checked = invalid_utf8_offsets(data, start, final=not chunk)
+                invalid_count += len(found)
+                invalid_offsets.extend(found[:room])
+                carry = data[checked:]                  # at most 3 bytes of a cut character
+                start += checked
+            if not chunk:
+                break
+    return Utf8Report(start, histogram, invalid_count, invalid_offsets)
+
+# COMMAND ----------
+
+# DBTITLE 1, A Small File with Bad Bytes
+my_data = os.path.join(tempfile.mkdtemp(), "my_data.txt")
+with open(my_data, "wb") as f:
+    f.write("Hello Pavan\nఅ  ఆ  ఇ\n".encode("utf-8"))
+    f.write("Café “quoted text“\n".encode("cp1252"))         # one line saved by a Windows program
+    f.write("अ  आ  इ 😊\n".encode("utf-8")[:-4] + b"\n")     # a multi-byte character cut short
+
+report = scan_utf8(my_data)
+print(report)
+with open(my_data, "rb") as f:
+    for offset in report.invalid_offsets[:2]:
+        f.seek(max(0, offset - 8))
+        print(hex_dump(f.read(16), start=max(0, offset - 8)))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Timing on a 500 MB Dump
+# MAGIC
+# MAGIC English / Telugu / Hindi / emoji lines with a stray cp1252 byte every ~50 MB. The per-character loops are timed on
+# MAGIC a 2 MB slice and scaled up, because running them on 500 MB would take minutes:
+# MAGIC - binary dump: `format(b, '08b')` per byte vs `binary_dump`
+# MAGIC - bad-byte search: decode-and-check per line (`for line in f: line.decode()`) vs `scan_utf8`
+
+# COMMAND ----------
+
+# DBTITLE 1, Create the Dump
+MB = 1024 * 1024
+dump_path = os.path.join(os.path.dirname(my_data), "dump.bin")
+line_block = "".join(f"{i:07d} Hello Pavan అఆఇ अआइ Café — “quoted” 😊\n" for i in range(100_000)).encode("utf-8")
+with open(dump_path, "wb") as f:
+    while f.tell() < 500 * MB:
+        f.write(line_block[:-6] + b"\x93bad\x94\n")             # one cp1252 quote pair per block
+size = os.path.getsize(dump_path)
+print(f"size: {size / MB:.0f} MB")
+
+# COMMAND ----------
+
+# DBTITLE 1, Per-Character Loops vs Bulk
+sample = line_block[:2 * MB]
+
+
+def bits_per_byte(data):
+    return " ".join(format(b, '08b') for b in data)
+
+
+def bad_lines_per_line(path, limit_bytes):
+    bad, pos = [], 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                line.decode("utf-8")
+            except UnicodeDecodeError as exc:
+                bad.append(pos + exc.start)
+            pos += len(line)
+            if pos >= limit_bytes:
+                break
+    return bad
+
+
+start = time.perf_counter()
+slow_bits = bits_per_byte(sample)
+t_loop_bits = (time.perf_counter() - start) * size / len(sample)
+start = time.perf_counter()
+fast_bits = binary_dump(sample)
+t_bulk_bits = (time.perf_counter() - start) * size / len(sample)
+print(f"binary dump  format per byte : {t_loop_bits:7.1f}s (scaled to {size / MB:.0f} MB)")
+print(f"binary dump  binary_dump     : {t_bulk_bits:7.1f}s (scaled)   same text: {slow_bits == fast_bits}")
+
+start = time.perf_counter()
+bad_lines_per_line(dump_path, 50 * MB)
+t_lines = (time.perf_counter() - start) * size / (50 * MB)
+print(f"bad bytes    decode per line : {t_lines:7.1f}s (scaled, only finds the first error per line)")
+
+start = time.perf_counter()
+report = scan_utf8(dump_path)
+t_scan = time.perf_counter() - start
+print(f"bad bytes    scan_utf8       : {t_scan:7.1f}s (whole file)")
+print(f"  {report.invalid_count} invalid sequences, first at {report.invalid_offsets[:3]}")
+print(f"  histogram: {report.histogram}")
+os.remove(dump_path)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ The bulk versions run a handful of C loops over each buffer instead of Python code per byte. The UTF-8 check
+# MAGIC is the decoder itself, so it is as strict as `bytes.decode` (overlong forms, surrogates, cut characters).
+# MAGIC A 500 MB dump becomes a matter of seconds, and the offsets go straight into `hex_dump` for a closer look.
+# MAGIC
+# MAGIC ⚠️ `binary_dump` output is 9× the input size (8 characters + separator per byte). Dump slices, not whole files.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | Cost | New way |
+# MAGIC |---------|------|---------|
+# MAGIC | `format(ord(c), '08b')` per character | 2 calls per byte | `binary_dump(data)`: `np.unpackbits` / lookup table |
+# MAGIC | `print(hex(b))` per byte | 1 call per byte | `hex_dump(data)`: `bytes.hex(" ")` + `translate` per line |
+# MAGIC | `len(c.encode())` per character | 1 call per char | `utf8_histogram(data)`: `translate` + `count` / NumPy comparisons |
+# MAGIC | `try: line.decode()` per line | first error per line only | `scan_utf8(path)`: every bad offset, 16 MiB chunks |
+# MAGIC
+# MAGIC ```
+# MAGIC report = scan_utf8("dump.bin")
+# MAGIC print(report.invalid_count, report.invalid_offsets[:10])
+# MAGIC with open("dump.bin", "rb") as f:
+# MAGIC     f.seek(report.invalid_offsets[0] - 16)
+# MAGIC     print(hex_dump(f.read(32), start=report.invalid_offsets[0] - 16))
+# MAGIC ```
@@ -0,0 +1,415 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Which Encoding Is This File? Detection and Streaming Transcoding**
+# MAGIC
+# MAGIC In the character encoding demo we opened `my_data.txt` by **trial and error**:
+# MAGIC
+# MAGIC ```
+# MAGIC with open(file_path, encoding="ascii") as f:     # UnicodeDecodeError
+# MAGIC     data = f.read()
+# MAGIC with open(file_path, encoding="cp1252") as f:    # works, but Telugu comes out as "à°…"
+# MAGIC     data = f.read()
+# MAGIC with open(file_path, encoding="utf-8") as f:     # finally right
+# MAGIC     data = f.read()
+# MAGIC ```
+# MAGIC
+# MAGIC and used `errors="replace"` / `errors="ignore"` to make the errors go away. Problems on real data:
+# MAGIC 1. Every wrong guess **decodes the file again**, and the error often comes **late**. A file can be pure ASCII
+# MAGIC    for 900 MB and have one `é` written by Windows at the end
+# MAGIC 2. `f.read()` holds the whole file in memory, twice (bytes + str)
+# MAGIC 3. `errors="ignore"` silently **deletes** characters. Nobody notices until a customer's name is wrong
+# MAGIC
+# MAGIC In this lesson we build:
+# MAGIC - `detect_encoding(path)` → looks at the first 64 KiB only: BOM, NUL-byte pattern, UTF-8 validity, and
+# MAGIC   returns an encoding **with a confidence score**
+# MAGIC - `transcode(src, dst)` → converts cp1252 / UTF-16 / ... to UTF-8 in 1 MiB binary chunks with **incremental**
+# MAGIC   decoders. Each byte is decoded once, memory stays flat, and a late surprise does not restart anything
+
+# COMMAND ----------
+
+# DBTITLE 1, The Problem: Trial and Error
+import os
+import time
+import codecs
+import shutil
+import tempfile
+import tracemalloc
+import unicodedata
+from collections import namedtuple
+
+workdir = tempfile.mkdtemp()
+my_data_text = ("Hello Pavan\nHi Ganesh\nBye Nagarjuna\nఅ  ఆ  ఇ\nअ  आ  इ\n"
+                "Café — déjà vu “quoted text“\nCafe - deja vu \"quoted text\"\n")
+
+file_path = os.path.join(workdir, "my_data.txt")
+with open(file_path, "w", encoding="utf-8") as f:
+    f.write(my_data_text)
+
+for encoding in ("ascii", "cp1252", "utf-8"):
+    try:
+        with open(file_path, encoding=encoding) as f:
+            print(f"{encoding:<7} OK   ", repr(f.read()[36:60]))
+    except UnicodeDecodeError as exc:
+        print(f"{encoding:<7} FAIL ", exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. What the Bytes Tell Us
+# MAGIC
+# MAGIC We check, in this order:
+# MAGIC
+# MAGIC | Check | Looks like | Answer | Confidence |
+# MAGIC |-------|-----------|--------|------------|
+# MAGIC | **BOM** (byte order mark) at the start | `EF BB BF`, `FF FE`, `FE FF`, `FF FE 00 00` | `utf-8-sig`, `utf-16`, `utf-32` | 1.0 |
+# MAGIC | many **NUL bytes** on odd (or even) positions | `48 00 69 00` = "Hi" | `utf-16-le` / `utf-16-be` | 0.9 |
+# MAGIC | other NUL bytes | images, zip, ... | `None` (binary) | 0.0 |
+# MAGIC | only bytes < 0x80 | plain English | `utf-8` (ASCII is a subset) | 0.8 |
+# MAGIC | valid **UTF-8** with multi-byte characters | `C3 A9` = é | `utf-8` | 0.9 → 0.99 |
+# MAGIC | UTF-8 with a few invalid bytes | mostly `C3 A9`, one stray `93` | `utf-8` | 0.6 |
+# MAGIC | not valid UTF-8 | `E9` = é in cp1252 | `cp1252` (or `latin-1`) | 0.5 → 0.9 |
+# MAGIC
+# MAGIC Why is valid UTF-8 so convincing? A multi-byte UTF-8 character is a lead byte `C2–F4` followed by the right number
+# MAGIC of `80–BF` bytes. Western text in cp1252 (`é` = `E9`, followed by a normal letter) almost never happens to form
+# MAGIC those patterns. So a sample with several valid multi-byte characters is almost certainly UTF-8.
+# MAGIC
+# MAGIC For single-byte encodings we can only judge how **plausible** the decoded characters look: letters and punctuation
+# MAGIC raise the score, control characters lower it. Bytes `81 8D 8F 90 9D` do not exist in cp1252 → `latin-1`.
+# MAGIC
+# MAGIC ⚠️ A pure-ASCII sample says nothing about the rest of the file. That is why it only gets 0.8, and why `transcode`
+# MAGIC can still switch later (section 3).
+
+# COMMAND ----------
+
+# DBTITLE 1, detect_encoding
+EncodingGuess = namedtuple("EncodingGuess", "encoding confidence bom reason")
+
+_BOMS = [                                               # UTF-32 first: FF FE 00 00 also starts with FF FE
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_NOT_IN_CP1252 = b"\x81\x8d\x8f\x90\x9d"
+ASCII_ONLY = "only ASCII bytes in the sample"
+
+
+def detect_bytes(sample, at_eof=False):
+    """Guess the encoding of a byte sample. at_eof=False: the sample may end in the middle of a character."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return EncodingGuess(encoding, 1.0, True, "byte order mark")
+    if not sample:
+        return EncodingGuess("utf-8", 0.5, False, "empty")
+
+    if b"\x00" in sample:
+        half = len(sample) / 2
+        even, odd = sample[0::2].count(0), sample[1::2].count(0)
+        if odd > 0.3 * half and even < 0.05 * half:
+            return EncodingGuess("utf-16-le", 0.9, False, "NUL bytes on odd positions")
+        if even > 0.3 * half and odd < 0.05 * half:
+            return EncodingGuess("utf-16-be", 0.9, False, "NUL bytes on even positions")
+        return EncodingGuess(None, 0.0, False, "NUL bytes: looks like binary data")
+
+    if sample.isascii():
+        return EncodingGuess("utf-8", 0.8, False, ASCII_ONLY)
+
+    try:
+        text = codecs.getincrementaldecoder("utf-8")().decode(sample, at_eof)
+    except UnicodeDecodeError as exc:
+        first_bad = exc.start
+    else:
+        multibyte = len(text) - len(text.encode("ascii", "ignore"))
+        return EncodingGuess("utf-8", min(0.99, 0.9 + 0.025 * multibyte), False,
+                             f"valid UTF-8, {multibyte} multi-byte characters")
+
+    # invalid bytes become lone surrogates (U+DC80..U+DCFF): count them next to the real characters
+    text = codecs.getincrementaldecoder("utf-8")("surrogateescape").decode(sample, at_eof)
+    invalid = sum("\udc80" <= c <= "\udcff" for c in text)
+    multibyte = len(text) - len(text.encode("ascii", "ignore")) - invalid
+    if multibyte > invalid:
+        return EncodingGuess("utf-8", 0.6, False, f"mostly UTF-8, {invalid} invalid bytes (first at offset {first_bad})")
+    guess = _single_byte_guess(sample)
+    return guess._replace(reason=f"not UTF-8: byte 0x{sample[first_bad]:02X} at offset {first_bad}")
+
+
+def _single_byte_guess(sample):
+    encoding = "latin-1" if any(b in sample for b in _NOT_IN_CP1252) else "cp1252"
+    non_ascii = [c for c in sample.decode(encoding) if c > "\x7f"]
+    plausible = sum(unicodedata.category(c)[0] in "LNPSZ" for c in non_ascii)   # not a control character
+    confidence = 0.5 + 0.4 * plausible / max(1, len(non_ascii))
+    return EncodingGuess(encoding, round(confidence, 2), False, "")
+
+
+def detect_encoding(path, sample_size=64 * 1024):
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+    return detect_bytes(sample, at_eof=len(sample) < sample_size)
+
+# COMMAND ----------
+
+# DBTITLE 1, my_data.txt in Six Encodings
+western = "Hello Pavan\nCafé — déjà vu “quoted text“\n"          # cp1252 has no Telugu / Hindi
+samples = {
+    "ascii.txt": ("Hello Pavan\nHi Ganesh\n", "ascii"),
+    "utf8.txt": (my_data_text, "utf-8"),
+    "utf8_bom.txt": (my_data_text, "utf-8-sig"),
+    "utf16_bom.txt": (my_data_text, "utf-16"),
+    "utf16le.txt": (my_data_text, "utf-16-le"),
+    "cp1252.txt": (western, "cp1252"),
+}
+for name, (text, encoding) in samples.items():
+    with open(os.path.join(workdir, name), "w", encoding=encoding) as f:
+        f.write(text)
+    guess = detect_encoding(os.path.join(workdir, name))
+    print(f"{name:<14} written as {encoding:<10} → {guess.encoding:<10} {guess.confidence:.2f}  {guess.reason}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. Incremental Decoders
+# MAGIC
+# MAGIC Reading 1 MiB blocks of **bytes** and calling `bytes.decode()` on each one breaks: a block can end in the middle of
+# MAGIC `అ` (3 bytes) or of a UTF-16 code unit (2 bytes).
+# MAGIC
+# MAGIC `codecs.getincrementaldecoder(encoding)()` solves this. It keeps the unfinished bytes of one block and puts them
+# MAGIC in front of the next one:
+# MAGIC
+# MAGIC ```
+# MAGIC decoder = codecs.getincrementaldecoder("utf-8")()
+# MAGIC decoder.decode(b"\xe0\xb0")          # ''   (waits for the 3rd byte)
+# MAGIC decoder.decode(b"\x85", final=True)  # 'అ'
+# MAGIC ```
+# MAGIC
+# MAGIC The decoder also removes a BOM (`utf-8-sig`, `utf-16`) and the encoder on the other side never writes one for `utf-8`.
+
+# COMMAND ----------
+
+# DBTITLE 1, Cutting Bytes in the Middle of a Character
+data = "అ  ఆ".encode("utf-8")
+try:
+    print([data[:2].decode("utf-8"), data[2:].decode("utf-8")])
+except UnicodeDecodeError as exc:
+    print("bytes.decode per block:", exc)
+
+decoder = codecs.getincrementaldecoder("utf-8")()
+print("incremental decoder   :", [decoder.decode(data[:2]), decoder.decode(data[2:], final=True)])
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. `transcode`: One Pass, Constant Memory
+# MAGIC
+# MAGIC - reads `chunk_size` bytes, decodes with the incremental decoder, encodes, writes. Nothing else is kept
+# MAGIC - the output goes to a temp file in the target folder, `fsync`, then `os.replace` (same as `stream_replace`)
+# MAGIC - a `UnicodeDecodeError` reports the **byte offset in the file**, not the offset in some chunk
+# MAGIC
+# MAGIC **The late surprise.** When the guess was only "pure ASCII so far → utf-8" and the first non-ASCII byte is not valid
+# MAGIC UTF-8, everything before it was ASCII. ASCII bytes mean the same in cp1252 and latin-1. So `transcode` switches the
+# MAGIC decoder **at that chunk** and goes on. Nothing is read or decoded twice.
+# MAGIC
+# MAGIC **Really mixed files** (UTF-8 with a few stray cp1252 bytes, e.g. lines pasted from Excel) get an error handler
+# MAGIC registered with `codecs.register_error`. `errors="cp1252-fallback"` decodes just the bad bytes as cp1252 instead of
+# MAGIC deleting them like `errors="ignore"` does.
+
+# COMMAND ----------
+
+# DBTITLE 1, transcode
+TranscodeResult = namedtuple("TranscodeResult", "encoding bytes_in bytes_out switched_at")
+
+
+def _cp1252_fallback(exc):
+    if not isinstance(exc, UnicodeDecodeError):
+        raise exc
+    bad = exc.object[exc.start:exc.end]
+    return bad.decode("cp1252", errors="replace"), exc.end
+
+
+codecs.register_error("cp1252-fallback", _cp1252_fallback)
+
+
+def transcode(src, dst, from_encoding=None, to_encoding="utf-8", errors="strict", chunk_size=1 << 20):
+    """Re-encode src into dst chunk by chunk. from_encoding=None detects it from the first 64 KiB."""
+    may_switch = False
+    if from_encoding is None:
+        guess = detect_encoding(src)
+        if guess.encoding is None:
+            raise ValueError(f"{src}: {guess.reason}")
+        from_encoding = guess.encoding
+        may_switch = guess.reason == ASCII_ONLY and errors == "strict"
+    decoder = codecs.getincrementaldecoder(from_encoding)(errors)
+    encoder = codecs.getincrementalencoder(to_encoding)()
+    bytes_in = bytes_out = 0
+    switched_at = None
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dst)), suffix=".tmp")
+    try:
+        with open(src, "rb") as fin, os.fdopen(fd, "wb") as fout:
+            while True:
+                chunk = fin.read(chunk_size)
+                final = not chunk
+                pending = decoder.getstate()[0]         # lead bytes held back from the previous chunk
+                try:
+                    text = decoder.decode(chunk, final)
+                except UnicodeDecodeError as exc:
+                    data = pending + chunk              # exc.start counts from the held-back bytes
+                    if not (may_switch and data[:exc.start].isascii()):
+                        offset = bytes_in - len(pending) + exc.start
+                        exc.reason = f"{exc.reason} (byte {offset} of {src})"
+                        raise
+                    # everything so far was ASCII: decode this chunk and the rest as a single-byte encoding
+                    from_encoding = _single_byte_guess(data).encoding
+                    decoder = codecs.getincrementaldecoder(from_encoding)(errors)
+                    switched_at = bytes_in - len(pending) + exc.start
+                    may_switch = False
+                    text = decoder.decode(data, final)
+                if may_switch and not text.isascii():
+                    may_switch = False                  # real UTF-8 decoded: a later error is a real error
+                out = encoder.encode(text, final)
+                fout.write(out)
+                bytes_in += len(chunk)
+                bytes_out += len(out)
+                if final:
+                    break
+            fout.flush()
+            os.fsync(fout.fileno())
+        if os.path.exists(dst):
+            shutil.copymode(dst, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return TranscodeResult(from_encoding, bytes_in, bytes_out, switched_at)
+
+# COMMAND ----------
+
+# DBTITLE 1, Mixed-Encoding Ingestion: Everything to UTF-8
+out_dir = os.path.join(workdir, "utf8")
+os.makedirs(out_dir)
+for name in samples:
+    result = transcode(os.path.join(workdir, name), os.path.join(out_dir, name))
+    with open(os.path.join(out_dir, name), encoding="utf-8") as f:
+        first_line = f.readline()
+    print(f"{name:<14} {result.encoding:<10} {result.bytes_in:>4} → {result.bytes_out:>4} bytes  {first_line!r}")
+
+stray = os.path.join(workdir, "stray.txt")                  # UTF-8 with one line pasted from a cp1252 program
+with open(stray, "wb") as f:
+    f.write("అ  ఆ  ఇ\nCafé — déjà vu\n".encode("utf-8") + "“quoted text“\n".encode("cp1252"))
+print("detect          :", detect_encoding(stray))
+try:
+    transcode(stray, os.path.join(out_dir, "stray.txt"))
+except UnicodeDecodeError as exc:
+    print("strict          :", exc.reason)
+transcode(stray, os.path.join(out_dir, "stray.txt"), errors="cp1252-fallback")
+print("cp1252-fallback :", open(os.path.join(out_dir, "stray.txt"), encoding="utf-8").read().splitlines())
+
+edge = os.path.join(workdir, "edge.txt")                    # 128 KiB of ASCII, then a cp1252 'é' as the last byte of chunk 2
+with open(edge, "wb") as f:
+    f.write(b"x" * (2 * 65536 - 1) + "é café\n".encode("cp1252"))
+result = transcode(edge, os.path.join(out_dir, "edge.txt"), chunk_size=65536)
+print("chunk boundary  :", result, open(os.path.join(out_dir, "edge.txt"), encoding="utf-8").read()[-7:].encode())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Timing on Big Files
+# MAGIC
+# MAGIC Two 120 MB files:
+# MAGIC - **late cp1252**: pure ASCII for the first ~90%, then Western lines written by a cp1252 program
+# MAGIC - **UTF-16**: `my_data.txt` lines (English / Telugu / Hindi) saved as UTF-16 with a BOM
+# MAGIC
+# MAGIC The old way tries `ascii`, `utf-8`, `cp1252` with `f.read()` until one works, then writes UTF-8.
+# MAGIC Time and memory are measured in separate runs (tracemalloc slows everything down).
+
+# COMMAND ----------
+
+# DBTITLE 1, Create the Files
+MB = 1024 * 1024
+ascii_block = "".join(f"{i:07d} Hello Pavan, Hi Ganesh, Bye Nagarjuna\n" for i in range(20_000))
+late_cp1252 = os.path.join(workdir, "late_cp1252.txt")
+with open(late_cp1252, "w", encoding="cp1252") as f:
+    while f.tell() < 108 * MB:
+        f.write(ascii_block)
+    while f.tell() < 120 * MB:
+        f.write(western * 1000)
+
+big_utf16 = os.path.join(workdir, "big_utf16.txt")
+with open(big_utf16, "w", encoding="utf-16") as f:
+    while f.tell() < 120 * MB:
+        f.write(my_data_text * 10_000)
+
+for path in (late_cp1252, big_utf16):
+    print(f"{os.path.basename(path):<16} {os.path.getsize(path) / MB:5.0f} MB  {detect_encoding(path)}")
+
+# COMMAND ----------
+
+# DBTITLE 1, Trial and Error vs transcode
+def trial_and_error(src, dst):
+    for encoding in ("ascii", "utf-8", "cp1252", "utf-16"):
+        try:
+            with open(src, encoding=encoding) as f:
+                text = f.read()
+            break
+        except UnicodeError:
+            continue
+    with open(dst, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+old_out = os.path.join(workdir, "old.txt")
+new_out = os.path.join(workdir, "new.txt")
+for src in (late_cp1252, big_utf16):
+    ways = [
+        ("trial and error + f.read()", lambda: trial_and_error(src, old_out)),
+        ("transcode", lambda: transcode(src, new_out)),
+    ]
+    print(os.path.basename(src))
+    for label, fn in ways:
+        start = time.perf_counter()
+        result = fn()
+        print(f"  {label:<28} {time.perf_counter() - start:6.2f}s", "" if result is None else result)
+    for label, fn in ways:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label:<28} peak memory {peak / MB:7.1f} MiB")
+    with open(old_out, encoding="utf-8") as a, open(new_out, encoding="utf-8") as b:
+        old_line = a.readline()
+        same = old_line + a.read() == b.read()
+        print("  same output:", same, "" if same else f" old first line: {old_line!r}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ `transcode` decodes every byte **once**, in 1 MiB pieces, so its memory does not depend on the file size.
+# MAGIC For the late-cp1252 file the old way decoded ~90% of the file twice before `cp1252` finally worked.
+# MAGIC `transcode` switched decoders at the first non-ASCII byte instead (`switched_at`).
+# MAGIC
+# MAGIC ⚠️ Look at the UTF-16 output of the old way: `cp1252` **did not fail** on UTF-16 bytes, so trial and error "worked"
+# MAGIC and wrote garbage. The BOM check gets it right.
+# MAGIC
+# MAGIC ⚠️ Detection is a **guess**. A BOM is certain, and valid UTF-8 with many multi-byte characters is nearly certain.
+# MAGIC A cp1252 vs latin-1 decision on a few accented letters is not. When the source is known, pass `from_encoding=`.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | Problem | New way |
+# MAGIC |---------|---------|---------|
+# MAGIC | try `ascii`, `cp1252`, `utf-8` one by one | each wrong try decodes the file again | `detect_encoding(path)` reads 64 KiB once |
+# MAGIC | "it didn't fail, so it is right" | cp1252 never fails on UTF-8, just shows `à°…` | UTF-8 validity first, then a confidence score |
+# MAGIC | `errors="ignore"` | characters silently deleted | `errors="cp1252-fallback"` for stray bytes |
+# MAGIC | `f.read()` + `write()` | whole file in memory | `transcode(src, dst)` in 1 MiB chunks |
+# MAGIC | `bytes.decode()` per chunk | breaks characters at chunk edges | incremental decoders |
+# MAGIC
+# MAGIC ```
+# MAGIC guess = detect_encoding("data/my_data.txt")
+# MAGIC print(guess.encoding, guess.confidence, guess.reason)
+# MAGIC
+# MAGIC transcode("export_from_excel.csv", "export_utf8.csv")              # auto-detect → utf-8
+# MAGIC transcode("report.txt", "report_utf8.txt", from_encoding="utf-16")
+# MAGIC ```
@@ -0,0 +1,319 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Find and Replace in a Huge File, Chunk by Chunk**
+# MAGIC
+# MAGIC In the file operations demo we replaced a name like this:
+# MAGIC
+# MAGIC ```
+# MAGIC file = open(".../your_data.txt", mode='r+', encoding="utf-8")
+# MAGIC text = file.read()
+# MAGIC new_text = text.replace("Naveen", "Sunny")
+# MAGIC file.write(new_text)
+# MAGIC file.close()
+# MAGIC ```
+# MAGIC
+# MAGIC Two problems:
+# MAGIC 1. After `read()` the file position is at the **end**, so `write` **appends** the new text after the old one —
+# MAGIC    the file now contains both versions
+# MAGIC 2. The whole file (and a replaced copy) must fit in memory. A 10 GB log needs 20+ GB of RAM
+# MAGIC
+# MAGIC In this lesson we build `stream_replace(path, {"Naveen": "Sunny", ...})`:
+# MAGIC - reads **fixed-size chunks**, keeps a small **overlap** so a match split across two chunks is still found
+# MAGIC - writes to a **temporary file** next to the original, then swaps it in with an **atomic rename**
+# MAGIC - literal, regex and **many patterns in one pass**, with a count of replacements per pattern
+
+# COMMAND ----------
+
+# DBTITLE 1, The Problem: r+ Mode Appends
+import os
+import re
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+workdir = tempfile.mkdtemp()
+your_data = os.path.join(workdir, "your_data.txt")
+with open(your_data, "w", encoding="utf-8") as f:
+    f.write("Naveen is practicing everyday\nNaveen is also practicing everyday")
+
+file = open(your_data, mode="r+", encoding="utf-8")
+text = file.read()
+new_text = text.replace("Naveen", "Sunny")
+file.write(new_text)
+file.close()
+
+print(open(your_data, encoding="utf-8").read())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. Matches Across Chunk Boundaries
+# MAGIC
+# MAGIC If a chunk ends in the middle of a match, neither chunk contains the whole word:
+# MAGIC
+# MAGIC ```
+# MAGIC chunk 1: "... today Nav"      chunk 2: "een is practicing ..."
+# MAGIC ```
+# MAGIC
+# MAGIC So we never trust the **last `overlap` characters** of a buffer (overlap ≥ longest possible match):
+# MAGIC
+# MAGIC ```
+# MAGIC buffer = carry + chunk
+# MAGIC |-------------- safe part --------------|---- overlap ----|
+# MAGIC  replace matches that end in here        kept as "carry" → scanned again with the next chunk
+# MAGIC ```
+# MAGIC
+# MAGIC A match that **starts** in the safe part but runs into the overlap is also carried over (from its start),
+# MAGIC so it is scanned again once the rest of it has arrived. At end of file everything is safe.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. Many Patterns in One Pass
+# MAGIC
+# MAGIC All patterns are combined into **one** regular expression, so the text is scanned only once:
+# MAGIC
+# MAGIC | Mode | Combined pattern | Replacement |
+# MAGIC |------|------------------|-------------|
+# MAGIC | literal (default) | `Naveen\|Pavan\|Nav` — escaped, **longest first** | dictionary lookup of the matched text |
+# MAGIC | `regex=True` | `(?P<_p0>...)\|(?P<_p1>...)` | `m.lastgroup` tells which pattern matched; its own replacement (with `\1`, `\g<name>` or a function) is applied |
+# MAGIC
+# MAGIC Longest first matters: with `Nav|Naveen`, the regex would stop at `Nav` and never see `Naveen`.
+# MAGIC
+# MAGIC The most common case — **one** word like `"Naveen"` — skips the regex and uses `str.replace` on each chunk
+# MAGIC (a single C call). That is only safe for words that cannot **overlap themselves** (`"aa"` in `"aaa"` can), so
+# MAGIC such words go through the regex path.
+
+# COMMAND ----------
+
+# DBTITLE 1, Building the Combined Matcher
+class _Matcher:
+    def __init__(self, replacements, regex, flags):
+        if not replacements:
+            raise ValueError("nothing to replace")
+        self.counts = dict.fromkeys(replacements, 0)
+        if regex:
+            self._compiled = {}
+            parts = []
+            for i, (pattern, repl) in enumerate(replacements.items()):
+                self._compiled[f"_p{i}"] = (pattern, re.compile(pattern, flags), repl)
+                parts.append(f"(?P<_p{i}>{pattern})")
+            self.pattern = re.compile("|".join(parts), flags)
+            self.replace = self._replace_regex
+        else:
+            if flags:
+                raise ValueError("flags are only supported with regex=True")
+            self._table = dict(replacements)
+            self.pattern = re.compile("|".join(map(re.escape, sorted(replacements, key=len, reverse=True))))
+            self.replace = self._replace_literal
+        # fast path: one literal that cannot overlap itself (unlike "aa" or "abab") → plain str.replace
+        self.single = None
+        if not regex and len(replacements) == 1:
+            (old, new), = replacements.items()
+            if old and not any(old[:k] == old[-k:] for k in range(1, len(old))):
+                self.single = (old, new)
+
+    def _replace_literal(self, m):
+        old = m.group()
+        self.counts[old] += 1
+        return self._table[old]
+
+    def _replace_regex(self, m):
+        pattern, compiled, repl = self._compiled[m.lastgroup]
+        self.counts[pattern] += 1
+        own = compiled.fullmatch(m.group())             # re-match alone so \1, \g<name> refer to its own groups
+        if own is None:                                 # lookarounds need the surrounding text
+            return compiled.sub(repl, m.group(), count=1)
+        return repl(own) if callable(repl) else own.expand(repl)
+
+
+m = _Matcher({"Nav": "N.", "Naveen": "Sunny"}, regex=False, flags=0)
+print(m.pattern.pattern, "→", m.pattern.sub(m.replace, "Naveen met Nav"), m.counts)
+
+# COMMAND ----------
+
+# DBTITLE 1, stream_replace
+def _replace_single(matcher, buf, at_eof):
+    old, new = matcher.single
+    cut = len(buf)
+    if not at_eof:
+        cut -= len(old) - 1                             # the last len(old)-1 characters may start a match
+        i = buf.find(old, cut - len(old) + 1, len(buf))
+        if 0 <= i < cut:                                # a match that crosses the cut stays in the carry
+            cut = i
+    head = buf[:cut]
+    matcher.counts[old] += head.count(old)
+    return head.replace(old, new), buf[cut:]
+
+
+def _replace_chunk(matcher, buf, at_eof, overlap):
+    """Replace matches in the safe part of buf. Returns (output_text, carry_text)."""
+    if matcher.single:
+        return _replace_single(matcher, buf, at_eof)
+    limit = len(buf) if at_eof else len(buf) - overlap
+    pieces, pos = [], 0
+    for m in matcher.pattern.finditer(buf):
+        if not at_eof and (m.start() >= limit or m.end() > limit):
+            limit = min(limit, m.start())               # may still grow with more text: scan it again later
+            break
+        pieces.append(buf[pos:m.start()])
+        pieces.append(matcher.replace(m))
+        pos = m.end()
+    cut = max(pos, limit)
+    pieces.append(buf[pos:cut])
+    return "".join(pieces), buf[cut:]
+
+
+def stream_replace(path, replacements, regex=False, flags=0, output=None,
+                   chunk_size=1 << 20, overlap=None, encoding="utf-8"):
+    """Replace all patterns in one pass without loading the file. Returns {pattern: count}.
+
+    With output=None the file is replaced atomically; otherwise the result goes to `output`.
+    `overlap` must be at least the longest possible match (known exactly for literals; 1024 by default for regex).
+    """
+    matcher = _Matcher(replacements, regex, flags)
+    if overlap is None:
+        overlap = 1024 if regex else max(map(len, replacements))
+    if chunk_size <= overlap:
+        raise ValueError("chunk_size must be larger than overlap")
+
+    target = output or path
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), suffix=".tmp")
+    try:
+        with open(path, encoding=encoding, newline="") as src, \
+                os.fdopen(fd, "w", encoding=encoding, newline="") as dst:
+            carry = ""
+            while True:
+                chunk = src.read(chunk_size)
+                at_eof = not chunk
+                out, carry = _replace_chunk(matcher, carry + chunk, at_eof, overlap)
+                dst.write(out)
+                if at_eof:
+                    break
+            dst.flush()
+            os.fsync(dst.fileno())                      # data on disk before the rename makes it visible
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, target)                    # atomic: readers see the old or the new file, never half
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return matcher.counts
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Using It
+
+# COMMAND ----------
+
+# DBTITLE 1, The Demo, Done Right
+with open(your_data, "w", encoding="utf-8") as f:
+    f.write("Naveen is practicing everyday\nNaveen is also practicing everyday")
+
+print(stream_replace(your_data, {"Naveen": "Sunny"}))
+print(open(your_data, encoding="utf-8").read())
+
+# COMMAND ----------
+
+# DBTITLE 1, Tiny Chunks: Matches Split Across Chunks Are Still Found
+names = os.path.join(workdir, "names.txt")
+with open(names, "w", encoding="utf-8") as f:
+    f.write("Naveen, Pavan, Nav and నవీన్ practice. Naveen again!\n")
+
+print(stream_replace(names, {"Naveen": "Sunny", "Nav": "N.", "నవీన్": "సన్నీ"}, chunk_size=8))
+print(open(names, encoding="utf-8").read())
+
+# COMMAND ----------
+
+# DBTITLE 1, Regex: Dates, Emails and Phone Numbers in One Pass
+log = os.path.join(workdir, "app.log")
+with open(log, "w", encoding="utf-8") as f:
+    f.write("2025-09-21 login pavan@gmail.com from 98480 22338\n"
+            "2025-09-22 logout anusha@yahoo.com\n")
+
+counts = stream_replace(log, {
+    r"(\d{4})-(\d{2})-(\d{2})": r"\3/\2/\1",                           # ISO date → dd/mm/yyyy
+    r"[\w.]+@(?P<domain>[\w.]+)": r"***@\g<domain>",                   # hide the user part
+    r"\b\d{5} ?\d{5}\b": lambda m: "*" * 6 + m.group()[-4:],           # mask phone numbers
+}, regex=True, chunk_size=32, overlap=30)
+print(counts)
+print(open(log, encoding="utf-8").read())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. A 200 MB File: `read()` + `replace()` vs `stream_replace`
+# MAGIC
+# MAGIC Time and peak memory are measured in separate runs. Both versions write a **new** file, so the comparison is fair.
+
+# COMMAND ----------
+
+# DBTITLE 1, Benchmark
+big = os.path.join(workdir, "big.txt")
+block = "".join(f"line {i}: Naveen is practicing everyday with Pavan, నవీన్ and अनुषा\n" for i in range(10_000))
+with open(big, "w", encoding="utf-8") as f:
+    while f.tell() < 200 * 1024 * 1024:
+        f.write(block)
+print(f"size: {os.path.getsize(big) / 1024 / 1024:.0f} MB")
+
+
+def read_replace_write(src, dst):
+    with open(src, encoding="utf-8") as f:
+        text = f.read()
+    with open(dst, "w", encoding="utf-8") as f:
+        f.write(text.replace("Naveen", "Sunny"))
+
+
+out_naive = os.path.join(workdir, "naive.txt")
+out_stream = os.path.join(workdir, "stream.txt")
+ways = [
+    ("read() + replace() + write()", lambda: read_replace_write(big, out_naive)),
+    ("stream_replace (1 literal)", lambda: stream_replace(big, {"Naveen": "Sunny"}, output=out_stream)),
+]
+for label, fn in ways:
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<30} {time.perf_counter() - start:6.2f}s")
+
+for label, fn in ways:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<30} peak memory {peak / 1024 / 1024:7.1f} MiB")
+
+with open(out_naive, "rb") as a, open(out_stream, "rb") as b:
+    print("same output:", a.read() == b.read())
+
+start = time.perf_counter()
+counts = stream_replace(big, {"Naveen": "Sunny", "Pavan": "Gowtham", "నవీన్": "సన్నీ"}, output=out_stream)
+print(f"stream_replace (3 literals)    {time.perf_counter() - start:6.2f}s   {counts}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ Memory stays at a few MiB (one chunk + its replaced copy) no matter how big the file is, and a single
+# MAGIC literal is even a little faster than the read-everything version: both end up in `str.replace`, without one huge string.
+# MAGIC Several patterns call Python once per match, which is slower per byte — but it is still **one pass**
+# MAGIC over a file that never has to fit in RAM.
+# MAGIC
+# MAGIC ⚠️ For regex patterns, `overlap` must be at least the **longest match** you expect. Patterns with lookbehind
+# MAGIC (`(?<=...)`) or `\b` at the very start may not see the character before a chunk cut.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | Problem | New way |
+# MAGIC |---------|---------|---------|
+# MAGIC | `r+` → `read()` → `write()` | appends instead of replacing | write a temp file, `os.replace` it in |
+# MAGIC | `file.read()` | whole file in memory | fixed-size chunks + overlap |
+# MAGIC | `text.replace(a, b)` per pattern | one pass per pattern | one combined regex, one pass |
+# MAGIC | crash in the middle | half-written file | atomic rename: old or new file, never half |
+# MAGIC
+# MAGIC ```
+# MAGIC stream_replace(path, {"Naveen": "Sunny", "Pavan": "Gowtham"})
+# MAGIC stream_replace(path, {r"(\d{4})-(\d{2})-(\d{2})": r"\3/\2/\1"}, regex=True)
+# MAGIC ```
@@ -0,0 +1,355 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Reading the End of a Big File: `tail()` and `follow()`**
+# MAGIC
+# MAGIC In the file operations demo we read the end of `my_data.txt` like this:
+# MAGIC
+# MAGIC ```
+# MAGIC f = open(file_path, "r")
+# MAGIC end_position = f.seek(0, 2)
+# MAGIC read_position = end_position - 9
+# MAGIC f.seek(read_position)
+# MAGIC print(f.read())
+# MAGIC ```
+# MAGIC
+# MAGIC Three problems:
+# MAGIC 1. Positions are **bytes**, but `my_data.txt` has Telugu / Devanagari / accented lines — one character can be
+# MAGIC    2–3 bytes. Jumping back 9 bytes can land **in the middle of a character** → `UnicodeDecodeError`
+# MAGIC 2. "Last 9 bytes" is not what we want. We want the **last N lines**
+# MAGIC 3. The usual "last N lines" trick, `collections.deque(f, maxlen=n)`, reads the **whole file**.
+# MAGIC    On a 20 GB log that takes minutes
+# MAGIC
+# MAGIC In this lesson we build:
+# MAGIC - `tail(path, n_lines, encoding)` → reads **backwards** in binary blocks until it has seen N line breaks
+# MAGIC - `follow(path)` → like `tail -f`: yields new lines as they are appended (inotify on Linux, polling elsewhere)
+
+# COMMAND ----------
+
+# DBTITLE 1, The Problem with Byte Positions
+import io
+import os
+import sys
+import time
+import codecs
+import select
+import ctypes
+import tempfile
+import threading
+import collections
+
+my_data_text = ("Hello Pavan\nHi Ganesh\nBye Nagarjuna\nఅ  ఆ  ఇ\nअ  आ  इ\n"
+                "Café — déjà vu “quoted text“\nఇ Café!")            # ends with multi-byte characters
+
+workdir = tempfile.mkdtemp()
+file_path = os.path.join(workdir, "my_data.txt")
+with open(file_path, "w", encoding="utf-8") as f:
+    f.write(my_data_text)
+
+with open(file_path, "r", encoding="utf-8") as f:
+    try:
+        f.seek(-9, 2)                                   # text files refuse end-relative seeks
+    except io.UnsupportedOperation as exc:
+        print("UnsupportedOperation:", exc)
+
+with open(file_path, "r", encoding="utf-8") as f:
+    end_position = f.seek(0, 2)
+    f.seek(end_position - 9)
+    try:
+        print(f.read())
+    except UnicodeDecodeError as exc:
+        print("UnicodeDecodeError:", exc)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. Why Cutting at `\n` Is Always Safe in UTF-8
+# MAGIC
+# MAGIC In UTF-8, every byte of a multi-byte character is **≥ 0x80**:
+# MAGIC
+# MAGIC | Character | Bytes |
+# MAGIC |-----------|-------|
+# MAGIC | `A` | `41` |
+# MAGIC | `é` | `C3 A9` |
+# MAGIC | `అ` | `E0 B0 85` |
+# MAGIC | `\n` | `0A` |
+# MAGIC
+# MAGIC So the byte `0A` can **only** be a real newline, never part of another character. If we cut the file **right
+# MAGIC after** a `\n` byte, we are always at a character boundary — no need to decode anything while searching.
+# MAGIC
+# MAGIC The same holds for every ASCII-compatible encoding (Latin-1, cp1252, ...). UTF-16 and UTF-32 are different
+# MAGIC (`\n` is `0A 00`), so `tail` refuses them.
+
+# COMMAND ----------
+
+# DBTITLE 1, tail
+def _check_encoding(encoding):
+    if "\n".encode(encoding) != b"\n" or "A".encode(encoding) != b"A":
+        raise ValueError(f"tail() needs an ASCII-compatible encoding such as utf-8, not {encoding!r}")
+
+
+def tail(path, n_lines=10, encoding="utf-8", block_size=1 << 16):
+    """Last n_lines lines of a file (with their line endings, like readlines()), reading backwards in blocks."""
+    _check_encoding(encoding)
+    if n_lines <= 0:
+        return []
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos, blocks, newlines = end, [], 0
+        # a newline at the very end closes the last line, it does not start a new one
+        needed = n_lines + 1 if end and _last_byte(f, end) == b"\n" else n_lines
+        while pos > 0 and newlines < needed:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+    data = b"".join(reversed(blocks))
+    if newlines >= needed:                              # drop everything up to the needed-th newline from the end
+        cut = len(data)
+        for _ in range(needed):
+            cut = data.rindex(b"\n", 0, cut)
+        data = data[cut + 1:]
+    text = data.decode(encoding)
+    return io.StringIO(text, newline=None).readlines()  # \r\n → \n, like a text-mode file
+
+
+def _last_byte(f, end):
+    f.seek(end - 1)
+    return f.read(1)
+
+
+for line in tail(file_path, 3):
+    print(repr(line))
+print(tail(file_path, 2, block_size=4))                 # tiny blocks: cuts land inside characters, still fine
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. `follow`: Waiting for New Lines
+# MAGIC
+# MAGIC `follow(path)` is a **generator**: it starts at the end of the file and yields every line that is appended later.
+# MAGIC
+# MAGIC How does it know the file grew?
+# MAGIC
+# MAGIC | Method | How | Cost while idle |
+# MAGIC |--------|-----|-----------------|
+# MAGIC | **inotify** (Linux) | the kernel wakes us when the file is modified | nothing — we sleep in `select` |
+# MAGIC | **polling** (everywhere) | check the size every `poll_interval` seconds | one `os.stat` per interval |
+# MAGIC
+# MAGIC inotify is reached through `ctypes` (no extra package). If it is not available, `follow` falls back to polling.
+# MAGIC
+# MAGIC Details handled:
+# MAGIC - a line is yielded only when its `\n` has arrived (a writer may write half a line)
+# MAGIC - bytes are decoded with an **incremental decoder**, so a character split across two writes is fine
+# MAGIC - **rotation** (`app.log` renamed to `app.log.1`, a new `app.log` created): the inode behind the path changes. The
+# MAGIC   old file is read to its end, then the new one is opened from the start, and the inotify watch moves with it
+# MAGIC - **truncation** (same inode, but smaller than our position): reading restarts from the beginning
+
+# COMMAND ----------
+
+# DBTITLE 1, Inotify via ctypes (Linux Only)
+class _Inotify:
+    IN_MODIFY, IN_ATTRIB, IN_MOVE_SELF, IN_DELETE_SELF = 0x002, 0x004, 0x800, 0x400
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_MOVE_SELF | self.IN_DELETE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        """Sleep until the file changes or timeout seconds pass."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                os.read(self.fd, 64 * 1024)             # drain the events; we only need the wake-up
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Polling:
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+
+def _watcher(path, use_inotify):
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return _Inotify(path)
+        except (OSError, AttributeError):
+            pass
+    return _Polling()
+
+# COMMAND ----------
+
+# DBTITLE 1, follow
+def follow(path, encoding="utf-8", from_end=True, poll_interval=0.25, use_inotify=True, stop=None):
+    """Yield lines appended to path after this call. Stops when `stop` (a threading.Event) is set."""
+    start = os.path.getsize(path) if from_end else 0     # decided now, not when the first line is requested
+    return _follow(path, start, encoding, poll_interval, use_inotify, stop)
+
+
+def _follow(path, start, encoding, poll_interval, use_inotify, stop):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    f = open(path, "rb")
+    watcher = _watcher(path, use_inotify)
+    pending = ""
+    try:
+        f.seek(start)
+        while stop is None or not stop.is_set():
+            chunk = f.read(1 << 16)
+            if chunk:
+                pending += decoder.decode(chunk)
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    yield line.removesuffix("\r") + "\n"
+                continue
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:                   # rotated away, the new file is not there yet
+                watcher.wait(poll_interval)
+                continue
+            opened = os.fstat(f.fileno())
+            if (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev):
+                # rotated: read what was written to the old file before the rename, then switch to the new one
+                pending += decoder.decode(f.read(), final=True)
+                *lines, pending = pending.split("\n")
+                for line in lines + ([pending] if pending else []):   # an unfinished last line will never finish
+                    yield line.removesuffix("\r") + "\n"
+                f.close()
+                f = open(path, "rb")
+                watcher.close()
+                watcher = _watcher(path, use_inotify)    # the old watch is on the old inode
+                decoder.reset()
+                pending = ""
+                continue
+            if current.st_size < f.tell():              # same file, truncated → start again
+                f.seek(0)
+                decoder.reset()
+                pending = ""
+                continue
+            watcher.wait(poll_interval)
+    finally:
+        f.close()
+        watcher.close()
+
+# COMMAND ----------
+
+# DBTITLE 1, A Writer Thread and a Follower
+log_path = os.path.join(workdir, "app.log")
+with open(log_path, "w", encoding="utf-8") as f:
+    f.write("old line that follow() skips\n")
+
+
+def writer():
+    with open(log_path, "ab") as f:
+        for i, name in enumerate(["Pavan", "Ganesh", "నాగార్జున", "Café"]):
+            data = f"{time.strftime('%H:%M:%S')} login {name}\n".encode()
+            half = len(data) // 2 + 1                   # split the write in the middle of the line
+            f.write(data[:half]); f.flush()
+            time.sleep(0.05)
+            f.write(data[half:]); f.flush()
+            time.sleep(0.1)
+
+
+new_lines = follow(log_path)
+thread = threading.Thread(target=writer)
+start = time.perf_counter()
+thread.start()
+for n, line in enumerate(new_lines, 1):
+    print(f"+{time.perf_counter() - start:.2f}s  {line}", end="")
+    if n == 4:
+        break
+thread.join()
+print("watcher used:", type(_watcher(log_path, True)).__name__)
+
+# COMMAND ----------
+
+# DBTITLE 1, Log Rotation
+def rotating_writer():
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write("last line before rotation\n")
+    os.replace(log_path, log_path + ".1")               # what logrotate does
+    time.sleep(0.3)
+    with open(log_path, "w", encoding="utf-8") as f:    # new, smaller file at the same path
+        f.write("first line after rotation\n")
+
+
+new_lines = follow(log_path)
+thread = threading.Thread(target=rotating_writer)
+thread.start()
+print([next(new_lines), next(new_lines)])
+thread.join()
+new_lines.close()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Timing on a Big Log File
+# MAGIC
+# MAGIC A 500 MB log with mixed English / Telugu / Hindi lines. `deque(f, maxlen=10)` is the usual pure-Python
+# MAGIC "last 10 lines" — it has to read and decode **everything**. `tail` reads a few 64 KiB blocks from the end.
+
+# COMMAND ----------
+
+# DBTITLE 1, Create the Log
+big_log = os.path.join(workdir, "big.log")
+lines_block = "".join(f"2025-09-{i % 30 + 1:02d} INFO user{i} {'అఆఇ' if i % 3 == 0 else 'अआइ' if i % 3 == 1 else 'café'}\n"
+                      for i in range(100_000))
+with open(big_log, "w", encoding="utf-8") as f:
+    while f.tell() < 500 * 1024 * 1024:
+        f.write(lines_block)
+print(f"size: {os.path.getsize(big_log) / 1024 / 1024:.0f} MB")
+
+# COMMAND ----------
+
+# DBTITLE 1, deque vs tail
+start = time.perf_counter()
+with open(big_log, encoding="utf-8") as f:
+    last_deque = list(collections.deque(f, maxlen=10))
+t_deque = time.perf_counter() - start
+
+start = time.perf_counter()
+last_tail = tail(big_log, 10)
+t_tail = time.perf_counter() - start
+
+print(f"deque(f, maxlen=10): {t_deque * 1000:9.1f} ms")
+print(f"tail(path, 10)     : {t_tail * 1000:9.3f} ms   same lines: {last_deque == last_tail}")
+print(last_tail[-1], end="")
+
+start = time.perf_counter()
+many = tail(big_log, 50_000)
+print(f"tail(path, 50_000) : {(time.perf_counter() - start) * 1000:9.1f} ms  ({len(many)} lines)")
+os.remove(big_log)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ `tail` only touches the last few blocks, so its time depends on **how many lines you ask for**, not on the
+# MAGIC file size — a 20 GB log costs the same milliseconds as a 500 MB one.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | Problem | New way |
+# MAGIC |---------|---------|---------|
+# MAGIC | `f.seek(-9, 2)` in text mode | `UnsupportedOperation` | `tail(path, n)` works in binary |
+# MAGIC | `f.seek(end_position - 9)` | may cut a character in half | cut only after a `\n` byte — always a boundary |
+# MAGIC | `deque(f, maxlen=n)` | reads the whole file | reads backwards, only the blocks it needs |
+# MAGIC | `while True: f.readline()` loop | busy loop or fixed sleeps | `follow(path)` sleeps on inotify / polls |
+# MAGIC
+# MAGIC - `tail` supports ASCII-compatible encodings (UTF-8, Latin-1, ...); UTF-16/32 raise `ValueError`
+# MAGIC - `follow` yields only complete lines, decodes incrementally, and handles truncation and rotation
@@ -0,0 +1,323 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Storing Millions of Objects: A Columnar `StudentTable`**
+# MAGIC
+# MAGIC In the OOPS demos our `Student` class looked like this:
+# MAGIC
+# MAGIC ```
+# MAGIC class Student:
+# MAGIC     school_name = "ZPHS Korutla"
+# MAGIC
+# MAGIC     def __init__(self, id, name, marks):
+# MAGIC         self.id = id
+# MAGIC         self.name = name
+# MAGIC         self.marks = marks
+# MAGIC         self.school_name = "ZPHS Ichoda"   # instance variable shadows the class variable!
+# MAGIC ```
+# MAGIC
+# MAGIC Every `Student` object carries:
+# MAGIC - the object itself + its own `__dict__` (a hash table!)
+# MAGIC - a separate Python `int` for `id` and `float` for `marks`
+# MAGIC - a 4th entry `school_name` in every `__dict__`, even though all students share the same few schools
+# MAGIC
+# MAGIC For a few students this is fine. For **a few million** rows it adds up to **hundreds of bytes per student**.
+# MAGIC
+# MAGIC **Idea:** store the data **by column** instead of **by object**:
+# MAGIC
+# MAGIC | Column | Storage | Bytes per row |
+# MAGIC |--------|---------|---------------|
+# MAGIC | `id` | `array('q')` (64-bit ints) | 8 |
+# MAGIC | `marks` | `array('d')` (64-bit floats) | 8 |
+# MAGIC | `name` | index into a **string pool** → `array('I')` | 4 (+ each distinct name once) |
+# MAGIC | `school_name` | index into the **same pool** → `array('I')` | 4 |
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. The String Pool
+# MAGIC
+# MAGIC A string pool stores every **distinct** string **once** and hands out a small integer for it.
+# MAGIC 1,000,000 students from 20 schools → only 20 school strings in memory.
+
+# COMMAND ----------
+
+# DBTITLE 1, StringPool Class
+import sys
+import timeit
+import random
+import tracemalloc
+from array import array
+
+
+class StringPool:
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def intern(self, s):
+        i = self.index.get(s)
+        if i is None:
+            i = self.index[s] = len(self.strings)
+            self.strings.append(sys.intern(s))
+        return i
+
+    def __getitem__(self, i):
+        return self.strings[i]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+pool = StringPool()
+print(pool.intern("ZPHS Korutla"), pool.intern("ZPHS Ichoda"), pool.intern("ZPHS Korutla"))
+print(pool[1])
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. Row Views: Objects That *Look* Like `Student`
+# MAGIC
+# MAGIC A `StudentRow` holds **only** a reference to the table and a row number (`__slots__`, no `__dict__`).
+# MAGIC Its properties read from the columns, so existing code using `s.name`, `s.marks`, `print(s)`,
+# MAGIC `s.display()` or `s.update_marks(...)` keeps working.
+# MAGIC
+# MAGIC Rows are created **on demand** and thrown away — the table itself never stores row objects.
+
+# COMMAND ----------
+
+# DBTITLE 1, StudentRow View
+class StudentRow:
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    @property
+    def id(self):
+        return self._table.ids[self._i]
+
+    @property
+    def name(self):
+        return self._table.pool[self._table.name_refs[self._i]]
+
+    @property
+    def marks(self):
+        return self._table.marks[self._i]
+
+    @marks.setter
+    def marks(self, value):
+        self._table.marks[self._i] = value
+
+    @property
+    def school_name(self):
+        return self._table.pool[self._table.school_refs[self._i]]
+
+    def __str__(self):
+        return f"id={self.id},name={self.name},marks={self.marks}"
+
+    def __repr__(self):
+        return f"Student(id={self.id},name={self.name},marks={self.marks})"
+
+    def __lt__(self, other):
+        return self.marks < other.marks
+
+    def __eq__(self, other):
+        return self.marks == other.marks
+
+    __hash__ = None
+
+    def display(self):
+        print(f"Student: id={self.id}")
+        print(f"Student: name={self.name}")
+        print(f"Student: marks={self.marks}")
+        print(f"Student: school={self.school_name}")
+
+    def update_marks(self, new_marks):
+        self.marks = new_marks
+        print(f"update completed. new marks: {self.marks}")
+        print("calling display method: starts")
+        self.display()
+        print("calling display method: ends")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. The `StudentTable` Container
+# MAGIC
+# MAGIC - `append(id, name, marks, school_name=...)` adds one row to every column
+# MAGIC - `table[i]` returns a `StudentRow`, `for s in table` iterates rows
+# MAGIC - Column scans (`max_marks`, `average_marks`) run built-in `max` / `sum` directly over the arrays —
+# MAGIC   the loop is in C, no Python property call per row
+# MAGIC - If **NumPy** is installed, `columns()` exposes the arrays as NumPy arrays **without copying**
+# MAGIC   (`np.frombuffer`), so filters like `ids_with_marks_above` also run fully in C
+
+# COMMAND ----------
+
+# DBTITLE 1, StudentTable Class
+try:
+    import numpy as np
+except ImportError:                        # NumPy is optional
+    np = None
+
+
+class StudentTable:
+    school_name = "ZPHS Korutla"          # default school, shared (class variable)
+
+    def __init__(self, rows=()):
+        self.ids = array("q")
+        self.marks = array("d")
+        self.name_refs = array("I")
+        self.school_refs = array("I")
+        self.pool = StringPool()
+        for row in rows:
+            self.append(*row)
+
+    def append(self, id, name, marks, school_name=None):
+        self.ids.append(id)
+        self.marks.append(marks)
+        self.name_refs.append(self.pool.intern(name))
+        self.school_refs.append(self.pool.intern(school_name or self.school_name))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.ids)
+        if not 0 <= i < len(self.ids):
+            raise IndexError("student row out of range")
+        return StudentRow(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield StudentRow(self, i)
+
+    # ---- column scans ----
+    def max_marks(self):
+        return max(self.marks)
+
+    def average_marks(self):
+        return sum(self.marks) / len(self.marks)
+
+    def columns(self):
+        """Zero-copy NumPy views of the numeric columns (needs NumPy).
+
+        While a view is alive the array cannot grow, so drop views before calling append().
+        """
+        return {"id": np.frombuffer(self.ids, dtype=np.int64),
+                "marks": np.frombuffer(self.marks, dtype=np.float64)}
+
+    def ids_with_marks_above(self, threshold):
+        if np is not None and len(self.ids):
+            cols = self.columns()
+            return cols["id"][cols["marks"] > threshold]
+        return array("q", [i for i, m in zip(self.ids, self.marks) if m > threshold])
+
+    def count_by_school(self):
+        counts = {}
+        for ref in self.school_refs:
+            counts[ref] = counts.get(ref, 0) + 1
+        return {self.pool[ref]: n for ref, n in counts.items()}
+
+    def memory_bytes(self):
+        columns = sum(col.buffer_info()[1] * col.itemsize
+                      for col in (self.ids, self.marks, self.name_refs, self.school_refs))
+        strings = sum(sys.getsizeof(s) for s in self.pool.strings)
+        return columns + strings + sys.getsizeof(self.pool.strings) + sys.getsizeof(self.pool.index)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. It Behaves Like `Student`
+
+# COMMAND ----------
+
+# DBTITLE 1, Using Row Views
+table = StudentTable([(1, "anusha", 99.5), (2, "naveen", 99.0), (3, "venkat", 98.0)])
+table.append(4, "gowtham", 100.0, school_name="ZPHS Ichoda")
+
+s1 = table[0]
+print(s1)
+print(repr(table[3]))
+s1.update_marks(95.0)
+print(list(table))
+print(sorted(table))                     # uses __lt__ on marks, like the datetime demo
+print(table.count_by_school())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 5. Memory: Objects vs Columns (200,000 Students)
+
+# COMMAND ----------
+
+# DBTITLE 1, Memory Comparison
+class Student:
+    school_name = "ZPHS Korutla"
+
+    def __init__(self, id, name, marks):
+        self.id = id
+        self.name = name
+        self.marks = marks
+        self.school_name = "ZPHS Ichoda"
+
+N = 200_000
+first_names = ["anusha", "naveen", "venkat", "gowtham", "asha", "rahul", "sunny", "pavan"]
+random.seed(1)
+raw = [(i, random.choice(first_names), round(random.uniform(35, 100), 1)) for i in range(N)]
+
+tracemalloc.start()
+objects = [Student(*r) for r in raw]
+object_bytes = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+tracemalloc.start()
+columns = StudentTable(raw)
+column_bytes = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+print(f"list of Student objects: {object_bytes / N:6.1f} bytes per student")
+print(f"StudentTable columns   : {column_bytes / N:6.1f} bytes per student")
+print(f"→ {object_bytes / column_bytes:.1f}x smaller")
+print("table.memory_bytes():", columns.memory_bytes())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 6. Speed of Column Scans
+
+# COMMAND ----------
+
+# DBTITLE 1, Scan Benchmark
+t_objects = timeit.timeit(lambda: max(s.marks for s in objects), number=10)
+t_columns = timeit.timeit(columns.max_marks, number=10)
+print(f"max marks over objects: {t_objects / 10 * 1000:6.2f} ms")
+print(f"max marks over column : {t_columns / 10 * 1000:6.2f} ms")
+
+t_objects = timeit.timeit(lambda: [s.id for s in objects if s.marks > 90], number=10)
+t_columns = timeit.timeit(lambda: columns.ids_with_marks_above(90), number=10)
+print(f"ids with marks > 90 (objects): {t_objects / 10 * 1000:6.2f} ms")
+print(f"ids with marks > 90 (column) : {t_columns / 10 * 1000:6.2f} ms  (NumPy: {np is not None})")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ `max` / `sum` over a column are faster than over objects even in pure Python.
+# MAGIC
+# MAGIC ⚠️ Without NumPy, the filter falls back to a Python loop over the arrays, and reading an `array` item creates a
+# MAGIC new Python number each time — so it is **not** faster than objects. With NumPy it is a single vectorized comparison.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Row objects (`Student`) | Columns (`StudentTable`) |
+# MAGIC |-------------------------|--------------------------|
+# MAGIC | One object + `__dict__` per student | A few flat arrays for **all** students |
+# MAGIC | Every string stored per object | Each distinct string stored **once** (pool) |
+# MAGIC | Scans call Python code per object | Scans run built-ins over arrays |
+# MAGIC | Easy to read | Row **views** keep the same easy API |
+# MAGIC
+# MAGIC ⚠️ Row views are **live**: `table[0].update_marks(...)` changes the table itself.
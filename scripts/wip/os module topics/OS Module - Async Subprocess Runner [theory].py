@@ -0,0 +1,310 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **From `os.system` to an Async Subprocess Runner: Concurrency, Streaming Output and Timeouts**
+# MAGIC
+# MAGIC The os notebook runs a command like this:
+# MAGIC
+# MAGIC ```
+# MAGIC os.system("echo Hello from OS module!")
+# MAGIC ```
+# MAGIC
+# MAGIC That is fine for one greeting. For a job that fans out to 200 commands (copy files, call a CLI per partition,
+# MAGIC run a checker per table), `os.system` has five problems:
+# MAGIC - **a shell per call**: `/bin/sh -c "..."` starts first, then the command. Every command pays for two process starts
+# MAGIC - **quoting**: the command is one string for the shell. A file name like `a.csv; rm -rf ~` becomes two commands
+# MAGIC - **blocks**: the next command starts only when this one ends, so 200 × 1 s = 200 s
+# MAGIC - **output goes to the console**: the caller gets only the exit status, not stdout or stderr
+# MAGIC - **no timeout**: a hanging command hangs the job
+# MAGIC
+# MAGIC In this lesson we build, on `asyncio`:
+# MAGIC - `run_command(args)`: **no shell** by default. stdout and stderr are read **while** the command runs (optionally
+# MAGIC   line by line to a callback). A timeout kills the command and everything it started
+# MAGIC - `run_many(commands, concurrency=8)`: at most 8 commands at a time, results in input order, and a
+# MAGIC   `CommandResult` per command with its own wall time
+
+# COMMAND ----------
+
+# DBTITLE 1, Imports
+import os
+import sys
+import time
+import shlex
+import signal
+import asyncio
+import collections
+
+CommandResult = collections.namedtuple("CommandResult", "args returncode stdout stderr seconds timed_out error")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. One Command
+# MAGIC
+# MAGIC | Step | How |
+# MAGIC |------|-----|
+# MAGIC | start | `asyncio.create_subprocess_exec(*args)`: the program is started directly, arguments are passed as a list, nothing is parsed by a shell. A string is split with `shlex.split` |
+# MAGIC | shell, only if asked | `shell=True` → `create_subprocess_shell`, for pipes and globs you actually want |
+# MAGIC | capture | one task per stream reads 64 KiB chunks as they arrive. Reading both at once matters: a command that fills the stderr pipe while we only read stdout would block forever |
+# MAGIC | stream | `on_line(stream_name, line)` is called for every complete line, while the command is still running. A line longer than `max_output` bytes is passed on in pieces of about `max_output` bytes |
+# MAGIC | limit | at most `max_output` bytes per stream are kept (the rest is read and dropped), and an unfinished line never grows past `max_output` either, so a chatty command cannot fill the memory |
+# MAGIC | timeout | one deadline for the command **and** the end of its output. A background child (`sleep 8 &`) keeps the pipes open after the command exits, so waiting for the output is part of the deadline. On timeout the whole **process group** gets `SIGKILL`, so those grandchildren die too |
+# MAGIC | cancel | if the awaiting task is cancelled, the command is killed as well. No orphans |
+# MAGIC
+# MAGIC A command that cannot be started (not installed, not executable) does not raise. Its `CommandResult` has
+# MAGIC `returncode=None` and the `OSError` in `error`, so one bad command does not break a batch of 200.
+
+# COMMAND ----------
+
+# DBTITLE 1, run_command
+async def _pump(stream, name, chunks, max_output, on_line):
+    kept, carry, carry_len = 0, [], 0                   # carry: pieces of the unfinished line
+    while True:
+        chunk = await stream.read(1 << 16)
+        if not chunk:
+            break
+        if kept < max_output:
+            chunks.append(chunk[:max_output - kept])
+            kept += len(chunks[-1])
+        if on_line is not None:
+            *lines, rest = chunk.split(b"\n")           # only the new chunk is split
+            if lines:
+                lines[0] = b"".join(carry) + lines[0]
+                carry, carry_len = [], 0
+            for line in lines:
+                on_line(name, line.decode(errors="replace"))
+            if rest:
+                carry.append(rest)
+                carry_len += len(rest)
+                if carry_len >= max_output:             # no newline for max_output bytes: pass it on in pieces
+                    on_line(name, b"".join(carry).decode(errors="replace"))
+                    carry, carry_len = [], 0
+    if on_line is not None and carry:
+        on_line(name, b"".join(carry).decode(errors="replace"))
+
+
+def _kill(proc):
+    try:
+        if os.name == "posix":
+            # the command and everything it started; the group can outlive the command itself
+            os.killpg(proc.pid, signal.SIGKILL)
+        elif proc.returncode is None:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_command(args, *, timeout=None, shell=False, cwd=None, env=None, on_line=None, max_output=1 << 20):
+    """Run one command without blocking the event loop. Returns a CommandResult; never raises for the command itself."""
+    if shell:
+        if not isinstance(args, str):
+            args = shlex.join(args)
+    elif isinstance(args, str):
+        args = shlex.split(args)
+    start = time.perf_counter()
+    streams = {"stdout": [], "stderr": []}
+    options = dict(stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, stdin=asyncio.subprocess.DEVNULL,
+                   cwd=cwd, env=env, start_new_session=os.name == "posix")
+    try:
+        if shell:
+            proc = await asyncio.create_subprocess_shell(args, **options)
+        else:
+            proc = await asyncio.create_subprocess_exec(*args, **options)
+    except OSError as exc:
+        return CommandResult(args, None, "", "", time.perf_counter() - start, False, exc)
+
+    readers = [asyncio.create_task(_pump(getattr(proc, name), name, chunks, max_output, on_line))
+               for name, chunks in streams.items()]
+
+    async def finish():
+        await proc.wait()
+        await asyncio.wait(readers)                     # a background child may still hold the pipes open
+        for reader in readers:
+            reader.result()                             # re-raise an error from on_line
+
+    timed_out = finished = False
+    try:
+        try:
+            await asyncio.wait_for(finish(), timeout)   # one deadline for the command and its output
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill(proc)
+            await proc.wait()
+            # the killed group closes the pipes: let the readers reach EOF (bounded, a child may have left the group)
+            await asyncio.wait(readers, timeout=1)
+        finished = True
+    finally:
+        if not finished:                                # cancelled: no orphans
+            _kill(proc)
+        for reader in readers:
+            reader.cancel()
+    stdout, stderr = (b"".join(chunks).decode(errors="replace") for chunks in streams.values())
+    return CommandResult(args, proc.returncode, stdout, stderr, time.perf_counter() - start, timed_out, None)
+
+
+print(asyncio.run(run_command(["echo", "Hello from OS module!"])))
+print(asyncio.run(run_command("ls /no/such/folder")))
+print(asyncio.run(run_command(["no-such-program"])))
+print(asyncio.run(run_command(["sleep", "5"], timeout=0.5)))
+print(asyncio.run(run_command(["sh", "-c", "sleep 8 & echo hi"], timeout=1)))   # sh exits, its child holds the pipes
+
+# COMMAND ----------
+
+# DBTITLE 1, No Shell: the File Name Is Just a File Name
+name = "report.csv; echo INJECTED"
+
+os.system(f"echo {name}")                               # the shell sees two commands
+print(asyncio.run(run_command(["echo", name])).stdout)  # one argument, printed as-is
+
+# COMMAND ----------
+
+# DBTITLE 1, Streaming Lines While the Command Runs
+def show(stream, line):
+    print(f"{time.strftime('%H:%M:%S')} [{stream}] {line}")
+
+
+progress = [sys.executable, "-c",
+            "import sys, time\n"
+            "for i in range(3):\n"
+            "    print('step', i, flush=True); time.sleep(0.3)\n"
+            "print('disk almost full', file=sys.stderr)"]
+result = asyncio.run(run_command(progress, on_line=show))
+print(result.returncode, repr(result.stdout), repr(result.stderr))
+
+pieces = []                                             # 20 MB without a single newline
+no_newlines = [sys.executable, "-c", "import sys\nfor _ in range(20): sys.stdout.write('x' * 1_000_000)"]
+start = time.perf_counter()
+result = asyncio.run(run_command(no_newlines, on_line=lambda stream, line: pieces.append(len(line))))
+print(f"{len(pieces)} pieces, longest {max(pieces):,} chars, {sum(pieces):,} in total, "
+      f"{len(result.stdout):,} kept, {time.perf_counter() - start:.2f}s")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. Many Commands: `run_many`
+# MAGIC
+# MAGIC An `asyncio.Semaphore(concurrency)` lets at most `concurrency` commands run at the same time. `asyncio.gather`
+# MAGIC returns the results in the order of `commands`, whatever order the commands finish in. Every option of
+# MAGIC `run_command` (timeout, cwd, env, `on_line`, ...) applies to each command.
+# MAGIC
+# MAGIC How to pick `concurrency`:
+# MAGIC - commands that **wait** (network copies, API CLIs, `sleep`): much more than the number of cores is fine
+# MAGIC - commands that **compute** (compressing, converting): about `os.cpu_count()`. More only makes them share the cores
+# MAGIC
+# MAGIC `run_many` is a coroutine. `run_many_sync` wraps it in `asyncio.run` for plain scripts. In a notebook or anything else
+# MAGIC that already has an event loop, `await run_many(...)` directly.
+
+# COMMAND ----------
+
+# DBTITLE 1, run_many
+async def run_many(commands, *, concurrency=None, **options):
+    """Run every command, at most `concurrency` at once. Returns CommandResults in the order of `commands`."""
+    limit = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+
+    async def one(args):
+        async with limit:
+            return await run_command(args, **options)
+
+    return await asyncio.gather(*(one(args) for args in commands))
+
+
+def run_many_sync(commands, **options):
+    return asyncio.run(run_many(commands, **options))
+
+
+def report(results, wall):
+    failed = [r for r in results if r.returncode != 0]
+    busy = sum(r.seconds for r in results)
+    print(f"{len(results)} commands, {len(failed)} failed, wall {wall:.2f}s, "
+          f"sum of command times {busy:.2f}s (overlap {busy / wall:.1f}x)")
+    for r in failed[:5]:
+        why = "timed out" if r.timed_out else r.error or r.stderr.strip()[:60]
+        print(f"  {r.returncode!s:>5} {r.seconds:6.2f}s  {shlex.join(r.args) if isinstance(r.args, list) else r.args}: {why}")
+
+
+commands = [["sh", "-c", f"sleep 0.{i}; echo part_{i}"] for i in range(1, 6)] + [["false"], ["sleep", "3"]]
+start = time.perf_counter()
+results = run_many_sync(commands, concurrency=4, timeout=1)
+report(results, time.perf_counter() - start)
+print([r.stdout.strip() for r in results])
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Timing
+# MAGIC
+# MAGIC Three kinds of fan-out, each run with `os.system` in a loop and with `run_many`:
+# MAGIC - **waiting**: 40 × `sleep 0.25`, like 40 network calls
+# MAGIC - **tiny commands**: 300 × `/bin/true` (the program, not the shell builtin). This is pure process-start cost
+# MAGIC - **computing**: 8 × a Python loop that keeps one core busy for ~0.15 s
+# MAGIC
+# MAGIC ⚠️ This machine has `os.cpu_count()` = 1. Waiting commands overlap anyway. Computing commands can only take turns on the one core.
+
+# COMMAND ----------
+
+# DBTITLE 1, os.system vs run_many
+def with_os_system(commands):
+    for args in commands:
+        os.system(shlex.join(args) + " > /dev/null")
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+burn = [sys.executable, "-c", "sum(i * i for i in range(3_000_000))"]
+cases = [("waiting  40 x sleep 0.25", [["sleep", "0.25"]] * 40, 16),
+         ("tiny    300 x /bin/true ", [["/bin/true"]] * 300, 16),
+         ("computing 8 x python    ", [burn] * 8, os.cpu_count())]
+
+print(f"cores: {os.cpu_count()}")
+for label, commands, concurrency in cases:
+    t_system = timed(with_os_system, commands)
+    t_many = timed(run_many_sync, commands, concurrency=concurrency)
+    print(f"{label}: os.system {t_system:6.2f}s   run_many(concurrency={concurrency:<2}) {t_many:6.2f}s")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC Measured on 1 core:
+# MAGIC
+# MAGIC | Fan-out | `os.system` loop | `run_many` |
+# MAGIC |---------|------------------|------------|
+# MAGIC | 40 × `sleep 0.25` | 10.1s | 0.76s (`concurrency=16`) |
+# MAGIC | 300 × `/bin/true` | 0.19–0.27s | 0.18–0.19s |
+# MAGIC | 8 × 0.15 s of Python CPU work | 1.21s | 1.22s (`concurrency=1`, one core) |
+# MAGIC
+# MAGIC What to take from it:
+# MAGIC - **waiting commands** overlap: the wall time goes from `n × duration` to about `n / concurrency × duration`, even on
+# MAGIC   one core, because a sleeping or waiting process uses no CPU
+# MAGIC - **tiny commands**: no shell saves one process start per command, but asyncio spends about as much on its own
+# MAGIC   bookkeeping per process (pipes, transports, the child watcher). For thousands of sub-millisecond commands, a
+# MAGIC   plain `subprocess.run` loop is as fast, or a single command that takes a whole list of arguments is better
+# MAGIC - **computing commands** are limited by the cores. On 1 core, running them together is not faster than one after
+# MAGIC   another. On 8 cores with `concurrency=8`, expect close to 8×
+# MAGIC
+# MAGIC ⚠️ Output is kept in memory (up to `max_output` per stream and command). For commands that write gigabytes, let
+# MAGIC them write to a file (`["sh", "-c", "cmd > out.txt"]`, or a `--output` option) and keep `max_output` small.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | Problem | New way |
+# MAGIC |---------|---------|---------|
+# MAGIC | `os.system("cmd " + name)` | a shell per call, quoting bugs, injection | `run_command(["cmd", name])`: no shell unless `shell=True` |
+# MAGIC | output to the console | caller only sees the exit status | `stdout` / `stderr` captured, `on_line` while running |
+# MAGIC | no timeout | a hang stops the job | `timeout=`: kills the whole process group |
+# MAGIC | one command after another | `n × duration` | `run_many(commands, concurrency=k)` |
+# MAGIC | exceptions for missing programs | one bad command breaks the batch | `CommandResult.error`, the rest goes on |
+# MAGIC
+# MAGIC ```
+# MAGIC results = run_many_sync([["gzip", "-k", path] for path in paths], concurrency=os.cpu_count(), timeout=600)
+# MAGIC for r in results:
+# MAGIC     if r.returncode != 0:
+# MAGIC         print(r.args, r.seconds, r.timed_out, r.error or r.stderr)
+# MAGIC
+# MAGIC results = await run_many(commands, concurrency=32)     # inside a notebook or another coroutine
+# MAGIC ```
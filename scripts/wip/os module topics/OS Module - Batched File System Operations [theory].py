@@ -0,0 +1,497 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Thousands of `mkdir` / `rename` / `remove` Calls: a Batch Executor with Dependencies, Stats and Dry-Run**
+# MAGIC
+# MAGIC The os notebooks call the file system one operation at a time:
+# MAGIC
+# MAGIC ```
+# MAGIC os.makedirs("test/a/b/c")
+# MAGIC os.rename("notes.txt", "os_notes.txt")
+# MAGIC os.remove("os_notes.txt")
+# MAGIC os.path.getsize("size_test.txt")
+# MAGIC ```
+# MAGIC
+# MAGIC Reorganising a real tree ("move 50,000 files into `year=/month=` folders, then delete the old folders") is the
+# MAGIC same calls in a loop. Three things go wrong:
+# MAGIC - **serial latency**: each call waits for the previous one. On a network share, each call is a round trip
+# MAGIC - **order**: `mkdir a/b` before `mkdir a` fails, and so does `rmdir a` before `remove a/x`
+# MAGIC - **no overview**: the loop stops at the first error, and nobody knows what ran, what failed, or how long it took
+# MAGIC
+# MAGIC In this lesson we build `run_plan(plan)`:
+# MAGIC - a **plan** is a list of operations like `("rename", src, dst)`
+# MAGIC - a **dependency graph**: operations on the same path, or on a parent and its child, run in order. Everything else
+# MAGIC   is independent
+# MAGIC - independent operations run on a **thread pool**. `os` calls release the GIL while they wait
+# MAGIC - one `OpResult` per operation (status, value, error, seconds), plus a `summarize()` table per kind
+# MAGIC - `dry_run=True` checks the plan against the real tree without changing anything
+
+# COMMAND ----------
+
+# DBTITLE 1, Imports and Operations
+import os
+import math
+import time
+import errno
+import shutil
+import tempfile
+import statistics
+import collections
+import concurrent.futures as cf
+
+Op = collections.namedtuple("Op", "kind path dest", defaults=(None,))
+OpResult = collections.namedtuple("OpResult", "index op status value error seconds wave")
+
+OPERATIONS = {
+    "mkdir": os.mkdir,
+    "makedirs": os.makedirs,
+    "rename": os.rename,
+    "replace": os.replace,
+    "remove": os.remove,
+    "rmdir": os.rmdir,
+    "getsize": os.path.getsize,
+}
+CREATES = {"mkdir", "makedirs"}
+REMOVES = {"remove", "rmdir"}
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. From a Plan to a Dependency Graph
+# MAGIC
+# MAGIC **Step 1: parents first, children first.** In each run of **consecutive** `mkdir` / `makedirs` operations, parents
+# MAGIC are moved before children (sorted by depth). In each run of consecutive `remove` / `rmdir` operations, children are
+# MAGIC moved before parents. Only runs are reordered: a `mkdir` after a `rename` stays after it.
+# MAGIC
+# MAGIC **Step 2: conflicts keep plan order.** Two operations conflict when one of their paths (`path` or `dest`) is the
+# MAGIC same as, or inside, a path of the other one. A later operation waits for every earlier one it conflicts with.
+# MAGIC Checking all pairs would be O(n²) (50 million checks for 10,000 operations). Instead, two dictionaries are updated
+# MAGIC while walking the plan, which makes it O(n × depth):
+# MAGIC - `last[p]`: the latest operation on exactly `p`. A new operation waits for `last` of its path and of every parent
+# MAGIC - `inside[p]`: operations on paths **inside** `p` since the last operation on `p`. A new operation on `p` waits for
+# MAGIC   all of them
+# MAGIC
+# MAGIC Every dependency points to an **earlier** index. So the plan order itself is a valid serial order, and the
+# MAGIC **wave** of an operation (1 + the highest wave among its dependencies) tells which operations could run at the same time.
+
+# COMMAND ----------
+
+# DBTITLE 1, order_plan and build_graph
+def _normalise(plan):
+    ops = []
+    for step in plan:
+        op = Op(*step)
+        if op.kind not in OPERATIONS:
+            raise ValueError(f"unknown operation {op.kind!r}; expected one of {sorted(OPERATIONS)}")
+        if (op.dest is None) != (op.kind not in ("rename", "replace")):
+            raise ValueError(f"{op.kind!r} takes {'a source and a destination' if op.dest is None else 'one path'}: {op}")
+        ops.append(Op(op.kind, os.path.abspath(op.path), op.dest and os.path.abspath(op.dest)))
+    return ops
+
+
+def order_plan(plan):
+    """Normalise the paths and sort each run of creations parents-first and each run of removals children-first."""
+    ops = _normalise(plan)
+    ordered, start = [], 0
+    while start < len(ops):
+        group = CREATES if ops[start].kind in CREATES else REMOVES if ops[start].kind in REMOVES else None
+        end = start + 1
+        while group and end < len(ops) and ops[end].kind in group:
+            end += 1
+        run = ops[start:end]
+        if group:
+            run.sort(key=lambda op: op.path.count(os.sep), reverse=group is REMOVES)
+        ordered.extend(run)
+        start = end
+    return ordered
+
+
+def _parents(path):
+    parent = os.path.dirname(path)
+    while parent != path:
+        yield parent
+        path, parent = parent, os.path.dirname(parent)
+
+
+def build_graph(ops):
+    """deps[i]: indices of earlier operations that operation i must wait for."""
+    last, inside = {}, collections.defaultdict(set)
+    deps = []
+    for i, op in enumerate(ops):
+        paths = (op.path,) if op.dest is None else (op.path, op.dest)
+        wait = set()
+        for p in paths:
+            if p in last:
+                wait.add(last[p])
+            wait.update(last[a] for a in _parents(p) if a in last)
+            wait |= inside.pop(p, set())
+        for p in paths:
+            last[p] = i
+            for a in _parents(p):
+                inside[a].add(i)
+        deps.append(wait)
+    return deps
+
+
+def waves(deps):
+    wave = []
+    for wait in deps:
+        wave.append(1 + max((wave[j] for j in wait), default=0))
+    return wave
+
+
+demo = [("mkdir", "test/a/b"), ("mkdir", "test/a"), ("mkdir", "test"),
+        ("rename", "notes.txt", "test/a/notes.txt"), ("getsize", "test/a/notes.txt"),
+        ("mkdir", "other")]
+ops = order_plan(demo)
+for op, wait, wave in zip(ops, build_graph(ops), waves(build_graph(ops))):
+    print(f"wave {wave}  {op.kind:<8} {os.path.relpath(op.path)} {op.dest and os.path.relpath(op.dest) or ''}  waits for {sorted(wait)}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. Running the Graph
+# MAGIC
+# MAGIC `run_plan` uses Kahn's algorithm on a `ThreadPoolExecutor`:
+# MAGIC - every operation with no unfinished dependencies is submitted
+# MAGIC - when an operation finishes, the counters of its dependents go down by one. A dependent whose counter reaches 0 is submitted
+# MAGIC - when an operation **fails**, everything that depends on it is **skipped**, not run, because it would fail or act
+# MAGIC   on the wrong state. Independent branches keep going
+# MAGIC
+# MAGIC `OpResult.status` is `"ok"`, `"failed"`, `"skipped"`, or, with `dry_run=True`, `"planned"` / `"would fail"`.
+# MAGIC `value` holds the size for `getsize`. `seconds` is the time the system call itself took, measured inside the
+# MAGIC worker thread.
+# MAGIC
+# MAGIC **Dry-run** walks the plan in its (valid) serial order against a small **virtual view**: `os.path.lexists` on the
+# MAGIC real tree, overlaid with what the earlier operations in the plan would have created or removed. It catches missing
+# MAGIC parents, existing targets, missing sources and non-empty folders it knows about. It cannot see changes that happen
+# MAGIC on the real tree in the meantime.
+
+# COMMAND ----------
+
+# DBTITLE 1, run_plan
+def _call(op):
+    call = OPERATIONS[op.kind]
+    return call(op.path) if op.dest is None else call(op.path, op.dest)
+
+
+def _timed(op):
+    start = time.perf_counter()
+    try:
+        value = _call(op)
+        return value, None, time.perf_counter() - start
+    except OSError as exc:
+        return None, exc, time.perf_counter() - start
+
+
+class _VirtualTree:
+    """What exists after the operations so far, without touching the disk."""
+
+    def __init__(self):
+        self.state = {}                                 # path -> True (created) / False (removed or moved away)
+
+    def exists(self, path):
+        if path in self.state:
+            return self.state[path]
+        if any(self.state.get(a) is False for a in _parents(path)):
+            return False
+        return os.path.lexists(path)
+
+    def has_children(self, path):
+        created = any(exists and os.path.dirname(p) == path for p, exists in self.state.items())
+        if created or not os.path.isdir(path):
+            return created
+        return any(self.exists(os.path.join(path, name)) for name in os.listdir(path))
+
+    def check(self, op):
+        def fail(cls, code, path):
+            return cls(code, os.strerror(code), path)
+
+        if op.kind in ("mkdir", "rename", "replace"):
+            target = op.dest or op.path
+            if not self.exists(os.path.dirname(target)):
+                return fail(FileNotFoundError, errno.ENOENT, target)
+        if op.kind in ("mkdir", "makedirs", "rename") and self.exists(op.dest or op.path):
+            return fail(FileExistsError, errno.EEXIST, op.dest or op.path)
+        if op.kind in ("rename", "replace", "remove", "rmdir", "getsize") and not self.exists(op.path):
+            return fail(FileNotFoundError, errno.ENOENT, op.path)
+        if op.kind == "rmdir" and self.has_children(op.path):
+            return fail(OSError, errno.ENOTEMPTY, op.path)
+        return None
+
+    def apply(self, op):
+        if op.kind in CREATES:
+            for a in _parents(op.path):                 # makedirs creates the parents too
+                if op.kind == "mkdir" or self.exists(a):
+                    break
+                self.state[a] = True
+            self.state[op.path] = True
+        elif op.kind in REMOVES:
+            self.state[op.path] = False
+        elif op.dest is not None:
+            self.state[op.path] = False
+            self.state[op.dest] = True
+
+
+def _dry_run(ops, deps):
+    tree, results, blocked = _VirtualTree(), [], set()
+    for i, (op, wave) in enumerate(zip(ops, waves(deps))):
+        if deps[i] & blocked:
+            blocked.add(i)
+            results.append(OpResult(i, op, "skipped", None, None, 0.0, wave))
+            continue
+        error = tree.check(op)
+        if error is None:
+            tree.apply(op)
+        else:
+            blocked.add(i)
+        results.append(OpResult(i, op, "planned" if error is None else "would fail", None, error, 0.0, wave))
+    return results
+
+
+def run_plan(plan, workers=16, dry_run=False):
+    """Run every operation of the plan, independent ones in parallel. Returns one OpResult per operation, in plan order."""
+    ops = order_plan(plan)
+    deps = build_graph(ops)
+    if dry_run:
+        return _dry_run(ops, deps)
+
+    wave = waves(deps)
+    waiting = [len(wait) for wait in deps]
+    dependents = [[] for _ in ops]
+    for i, wait in enumerate(deps):
+        for j in wait:
+            dependents[j].append(i)
+    results = [None] * len(ops)
+
+    def skip(i):
+        stack = [i]
+        while stack:
+            k = stack.pop()
+            for j in dependents[k]:
+                if results[j] is None:
+                    results[j] = OpResult(j, ops[j], "skipped", None, None, 0.0, wave[j])
+                    stack.append(j)
+
+    with cf.ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {pool.submit(_timed, ops[i]): i for i, n in enumerate(waiting) if n == 0}
+        while running:
+            done, _ = cf.wait(running, return_when=cf.FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                value, error, seconds = future.result()
+                results[i] = OpResult(i, ops[i], "ok" if error is None else "failed", value, error, seconds, wave[i])
+                if error is not None:
+                    skip(i)
+                    continue
+                for j in dependents[i]:
+                    waiting[j] -= 1
+                    if waiting[j] == 0 and results[j] is None:
+                        running[pool.submit(_timed, ops[j])] = j
+    return results
+
+# COMMAND ----------
+
+# DBTITLE 1, summarize
+def summarize(results):
+    """Per operation kind: count, status counts and latency (ms) of the operations that ran."""
+    by_kind = collections.defaultdict(list)
+    for r in results:
+        by_kind[r.op.kind].append(r)
+    table = {}
+    for kind, rs in by_kind.items():
+        ran = sorted(r.seconds * 1000 for r in rs if r.status in ("ok", "failed"))
+        row = {"count": len(rs), **collections.Counter(r.status for r in rs)}
+        if ran:
+            row.update(mean_ms=round(statistics.fmean(ran), 3), p99_ms=round(ran[math.ceil(0.99 * len(ran)) - 1], 3),
+                       max_ms=round(ran[-1], 3))
+        table[kind] = row
+    row = {"waves": max((r.wave for r in results), default=0)}
+    row.update(collections.Counter(r.status for r in results))
+    table["all"] = row
+    return table
+
+
+def print_summary(results):
+    for kind, row in summarize(results).items():
+        print(f"{kind:<9}", "  ".join(f"{k}={v}" for k, v in row.items()))
+
+
+def failures(results):
+    return [(r.op, r.error) for r in results if r.status in ("failed", "would fail")]
+
+# COMMAND ----------
+
+# DBTITLE 1, The Practice Notebook as One Plan
+workdir = tempfile.mkdtemp()
+os.chdir(workdir)
+with open("notes.txt", "w") as f:
+    f.write("Learning os module")
+
+plan = [("makedirs", "test/a/b/c"), ("mkdir", "practice_dir"),
+        ("rename", "notes.txt", "practice_dir/os_notes.txt"),
+        ("getsize", "practice_dir/os_notes.txt"),
+        ("rmdir", "test/a"),                            # not empty: fails
+        ("rmdir", "test/a/b/c"),
+        ("remove", "missing.txt")]                      # fails, nothing depends on it
+
+for r in run_plan(plan, dry_run=True):
+    print(f"{r.status:<10} wave {r.wave}  {r.op.kind:<8} {os.path.relpath(r.op.path)}  {r.error or ''}")
+print()
+results = run_plan(plan)
+for r in results:
+    print(f"{r.status:<10} {r.op.kind:<8} {os.path.relpath(r.op.path):<26} value={r.value}  {r.error or ''}")
+print_summary(results)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC The dry-run and the real run agree on the plan. `rmdir test/a/b/c` runs **before** `rmdir test/a` (a run of
+# MAGIC removals, children first). `rmdir test/a` still fails, because `test/a/b` is in it, and the dry-run already said so.
+# MAGIC
+# MAGIC ## 3. Timing: Reorganising 20,000 Files
+# MAGIC
+# MAGIC The plan: create 400 `year=/month=/day=` folders, move 20,000 files into them, read all 20,000 sizes, remove the
+# MAGIC old flat folder, and finally delete every file again. That is ~60,000 operations.
+# MAGIC - **loop**: the same operations, one call after another, like the notebook
+# MAGIC - `run_plan` with 1 thread and with 16 threads
+# MAGIC
+# MAGIC ⚠️ This runs on a local disk with a warm cache, where a `rename` takes a few **microseconds**. There is no
+# MAGIC latency to hide, so the thread pool mostly adds overhead: building the graph, plus one future per operation. The
+# MAGIC executor pays off where each call **waits**: NFS/SMB shares, FUSE mounts of object stores, network home folders.
+# MAGIC There a call takes 0.5–50 ms, and 16 calls in flight are close to 16× faster. The last cell simulates that with a
+# MAGIC 2 ms delay per call.
+
+# COMMAND ----------
+
+# DBTITLE 1, Build the Reorganisation Plan
+def make_flat_folder(n):
+    shutil.rmtree("flat", ignore_errors=True)
+    shutil.rmtree("by_day", ignore_errors=True)
+    os.mkdir("flat")
+    for i in range(n):
+        with open(f"flat/event_{i:05d}.json", "w") as f:
+            f.write("{}" * (i % 50))
+
+
+def reorganise_plan(n):
+    days = [f"by_day/year=2025/month={m:02d}/day={d:02d}" for m in range(1, 13) for d in range(1, 34)][:400]
+    plan = [("makedirs", day) for day in reversed(days)]          # deepest-last order is fixed by order_plan
+    for i in range(n):
+        target = f"{days[i % len(days)]}/event_{i:05d}.json"
+        plan.append(("rename", f"flat/event_{i:05d}.json", target))
+        plan.append(("getsize", target))
+    plan.append(("rmdir", "flat"))
+    plan.extend(("remove", f"{days[i % len(days)]}/event_{i:05d}.json") for i in range(n))
+    return plan
+
+
+N = 20_000
+plan = reorganise_plan(N)
+print(len(plan), "operations, cores:", os.cpu_count())
+
+# COMMAND ----------
+
+# DBTITLE 1, Loop vs run_plan
+def loop(ops):
+    for op in ops:
+        _call(op)
+
+
+make_flat_folder(N)
+start = time.perf_counter()
+loop(order_plan(plan))
+t_loop = time.perf_counter() - start
+
+timings = {}
+for workers in (1, 16):
+    make_flat_folder(N)
+    start = time.perf_counter()
+    results = run_plan(plan, workers=workers)
+    timings[workers] = time.perf_counter() - start
+
+start = time.perf_counter()
+graph = build_graph(order_plan(plan))
+t_graph = time.perf_counter() - start
+
+print(f"loop, one call at a time : {t_loop:6.2f}s")
+for workers, seconds in timings.items():
+    print(f"run_plan, {workers:>2} thread(s)   : {seconds:6.2f}s")
+print(f"  of which order + graph : {t_graph:6.2f}s")
+print_summary(results)
+
+# COMMAND ----------
+
+# DBTITLE 1, With 2 ms of Latency per Call (a Network Share)
+def slow(call, delay=0.002):
+    def wrapper(*args):
+        time.sleep(delay)                               # the round trip: the thread waits, the GIL is free
+        return call(*args)
+    return wrapper
+
+
+fast_operations = dict(OPERATIONS)
+OPERATIONS.update({kind: slow(call) for kind, call in fast_operations.items()})
+small = reorganise_plan(1_000)
+try:
+    make_flat_folder(1_000)
+    start = time.perf_counter()
+    loop(order_plan(small))
+    t_loop = time.perf_counter() - start
+    make_flat_folder(1_000)
+    start = time.perf_counter()
+    results = run_plan(small, workers=16)
+    t_pool = time.perf_counter() - start
+finally:
+    OPERATIONS.update(fast_operations)
+
+print(f"{len(small)} operations at 2 ms each")
+print(f"loop, one call at a time : {t_loop:6.2f}s")
+print(f"run_plan, 16 threads     : {t_pool:6.2f}s   waves: {summarize(results)['all']['waves']}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC Measured on a 1-core machine:
+# MAGIC
+# MAGIC | Plan | Loop | `run_plan`, 1 thread | `run_plan`, 16 threads |
+# MAGIC |------|------|----------------------|------------------------|
+# MAGIC | 60,397 ops, local disk | 0.45s | 2.9s | 2.4s (0.76s of it is ordering + graph) |
+# MAGIC | 3,397 ops, 2 ms latency each | 7.3s | — | 0.63s (4 waves) |
+# MAGIC
+# MAGIC What to take from it:
+# MAGIC - **local disk**: the loop wins, because the system calls are faster than the bookkeeping around them. Use
+# MAGIC   `run_plan` there for the ordering, the dry-run and the report, not for speed
+# MAGIC - **waiting storage**: the time goes from `operations × latency` down to roughly `waves × latency`, as long as each
+# MAGIC   wave has at least `workers` operations. In this plan most operations are independent, so there are few waves. A
+# MAGIC   plan where everything touches one file is a single chain, and no number of threads helps it
+# MAGIC - **failures stay contained**: a failed `rename` skips its own `getsize` and `remove`, and the other 19,999 files go on
+# MAGIC
+# MAGIC ⚠️ The graph only knows about the paths in the plan. Anything else that writes into the same folders at the same
+# MAGIC time (another job, a user) is not ordered against it.
+
+# COMMAND ----------
+
+# DBTITLE 1, Clean Up
+os.chdir(tempfile.gettempdir())
+shutil.rmtree(workdir)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | Problem | New way |
+# MAGIC |---------|---------|---------|
+# MAGIC | one `os` call after another | serial latency: `n × round trip` | `run_plan(plan, workers=16)`: independent ops in parallel |
+# MAGIC | the caller orders `mkdir` / `rmdir` by hand | `mkdir a/b` before `mkdir a` fails | runs of creations parents-first, removals children-first |
+# MAGIC | O(n²) "does this touch that?" | too slow for 10,000s of ops | `last` / `inside` dictionaries: O(n × depth) |
+# MAGIC | first error stops the loop | half-done, unknown state | dependents `skipped`, independent work continues |
+# MAGIC | no report | no idea what was slow | `OpResult` per op + `summarize()`: counts, mean / p99 / max ms |
+# MAGIC | try it and see | changes the tree | `dry_run=True`: checks against a virtual view |
+# MAGIC
+# MAGIC ```
+# MAGIC plan = [("makedirs", "out/2025/10"), ("rename", "in/a.csv", "out/2025/10/a.csv"), ("rmdir", "in")]
+# MAGIC print(failures(run_plan(plan, dry_run=True)))
+# MAGIC results = run_plan(plan, workers=16)
+# MAGIC print_summary(results)
+# MAGIC ```
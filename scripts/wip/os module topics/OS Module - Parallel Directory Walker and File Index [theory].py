@@ -0,0 +1,437 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Finding the Newest, Largest and Total: a Parallel Walker with a Metadata Index**
+# MAGIC
+# MAGIC The os practice notebook finds the newest file like this:
+# MAGIC
+# MAGIC ```
+# MAGIC files = [f for f in os.listdir(".") if os.path.isfile(f)]
+# MAGIC latest = max(files, key=os.path.getmtime)
+# MAGIC ```
+# MAGIC
+# MAGIC This is fine for one folder. For a data lake, a log archive or a home directory with a million files it has three problems:
+# MAGIC - **two `stat` calls per file**: one from `isfile`, one from `getmtime`. "Largest files" and "total size" each add
+# MAGIC   another full pass
+# MAGIC - **not recursive**: subfolders are skipped
+# MAGIC - **one thread**: each `stat` waits for the disk (or the network share) before the next one starts
+# MAGIC
+# MAGIC In this lesson we build:
+# MAGIC - `scan_dir()`: one `os.scandir` pass per folder, using the `DirEntry` type and inode (free) and **one** `stat`
+# MAGIC - `walk()`: folders scanned by a **thread pool**. `scandir` and `stat` release the GIL while waiting on the OS
+# MAGIC - `FileIndex`: the result as a **persisted index** of (path, size, mtime, inode). `refresh()` re-lists only the
+# MAGIC   folders whose modification time changed, and `newest()` / `largest()` / `total_size()` query memory, not the disk
+
+# COMMAND ----------
+
+# DBTITLE 1, Imports
+import os
+import json
+import time
+import heapq
+import shutil
+import tempfile
+import collections
+import concurrent.futures as cf
+
+FileEntry = collections.namedtuple("FileEntry", "path size mtime inode")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. One Folder: `os.scandir` Instead of `listdir` + `stat`
+# MAGIC
+# MAGIC | Call | What it costs |
+# MAGIC |------|----------------|
+# MAGIC | `os.listdir(d)` | names only. Every question after that (`isfile`, `getsize`, `getmtime`) is a new `stat` |
+# MAGIC | `os.scandir(d)` | `DirEntry` objects. `is_file()` / `is_dir()` and `inode()` come from the folder listing itself (no `stat` on Linux/macOS) |
+# MAGIC | `entry.stat()` | one `stat`, **cached** on the entry (free on Windows, where the listing already has size and mtime) |
+# MAGIC
+# MAGIC `follow_symlinks=False` everywhere: a symlink to a folder is not walked, so a link loop cannot hang the scan, and
+# MAGIC a linked file is not counted twice.
+# MAGIC
+# MAGIC A folder is stored as its `st_mtime_ns`, its subfolder names and four **parallel lists** (names, sizes, mtimes,
+# MAGIC inodes). That stores a million files as four lists instead of a million tuples, and it is also the JSON layout on disk.
+
+# COMMAND ----------
+
+# DBTITLE 1, scan_dir
+def scan_dir(path):
+    """List one folder. Returns (folder_mtime_ns, subfolder_names, [names, sizes, mtimes_ns, inodes])."""
+    subdirs, names, sizes, mtimes, inodes = [], [], [], [], []
+    with os.scandir(path) as it:
+        dir_mtime = os.stat(path).st_mtime_ns           # after opening: changes during the listing are seen next time
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    names.append(entry.name)
+                    sizes.append(st.st_size)
+                    mtimes.append(st.st_mtime_ns)
+                    inodes.append(entry.inode())
+            except FileNotFoundError:
+                continue                                # deleted while we were listing
+    return dir_mtime, subdirs, [names, sizes, mtimes, inodes]
+
+
+workdir = tempfile.mkdtemp()
+os.makedirs(os.path.join(workdir, "logs", "2025"))
+for name, text in [("notes.txt", "Learning os module"), ("logs/2025/app.log", "x" * 500)]:
+    with open(os.path.join(workdir, name), "w") as f:
+        f.write(text)
+print(scan_dir(workdir))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. The Whole Tree with a Thread Pool
+# MAGIC
+# MAGIC `os.walk` scans one folder at a time. `walk()` below submits every folder it discovers to a
+# MAGIC `ThreadPoolExecutor`, so up to `workers` folders are listed at the same time:
+# MAGIC - on a **network share or a cold disk**, most of the time is spent waiting for the OS, and threads overlap that
+# MAGIC   waiting. The GIL is released during `scandir` and `stat`
+# MAGIC - on a **warm local disk** everything is in the page cache. Threads still help a little, because the system calls
+# MAGIC   run without the GIL while another thread runs the Python part
+# MAGIC
+# MAGIC Folders that disappear or cannot be read during the walk are skipped. `errors` collects them as `(path, exception)`
+# MAGIC pairs.
+# MAGIC
+# MAGIC `walk()` also takes a `reuse(path, dir_mtime)` hook. When the hook returns the folder's previous result, the folder
+# MAGIC is not listed again. `FileIndex.refresh()` uses this hook.
+
+# COMMAND ----------
+
+# DBTITLE 1, walk
+def walk(root, workers=8, reuse=None, errors=None):
+    """Scan every folder under root. Returns {relative_folder: (mtime_ns, subdirs, columns)}; root is "."."""
+    root = os.path.abspath(root)
+    result = {}
+
+    def visit(rel):
+        path = root if rel == "." else os.path.join(root, rel)
+        if reuse is not None:
+            previous = reuse(rel, os.stat(path).st_mtime_ns)
+            if previous is not None:
+                return rel, previous
+        return rel, scan_dir(path)
+
+    with cf.ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(visit, ".")}
+        while pending:
+            done, pending = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+            for future in done:
+                try:
+                    rel, scanned = future.result()
+                except OSError as exc:                  # vanished, permission denied, ...
+                    if errors is not None:
+                        errors.append((exc.filename, exc))
+                    continue
+                result[rel] = scanned
+                for name in scanned[1]:
+                    child = name if rel == "." else os.path.join(rel, name)
+                    pending.add(pool.submit(visit, child))
+    return result
+
+
+tree = walk(workdir)
+for rel, (mtime, subdirs, (names, sizes, _, _)) in sorted(tree.items()):
+    print(f"{rel:<10} subdirs={subdirs} files={list(zip(names, sizes))}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. `FileIndex`: Persist, Refresh, Query
+# MAGIC
+# MAGIC **Persist.** `save()` writes one JSON document with the root, the scan time and the per-folder columns. It writes to
+# MAGIC a temp file plus `fsync` plus `os.replace`, the same way as the other lessons, so a crash never leaves half an index.
+# MAGIC
+# MAGIC **Refresh.** Creating, deleting or renaming a file changes the **folder's** `st_mtime_ns`. `refresh()` walks the
+# MAGIC tree again, but for each folder it first compares one `stat` of the folder with the stored value:
+# MAGIC - same mtime: reuse the stored listing. No `scandir`, no `stat` per file
+# MAGIC - different mtime (or a new folder): list it again
+# MAGIC
+# MAGIC ⚠️ What a folder's mtime does **not** see:
+# MAGIC - a file rewritten **in place** (`open(path, "a")`, a database file) changes the file's mtime and size, not the
+# MAGIC   folder's. Atomic saves (temp file + rename, as many editors and our own lessons do) do change the folder.
+# MAGIC   `refresh(check_files=True)` re-stats the stored files of unchanged folders too. That is still one `stat` per file,
+# MAGIC   but it skips the listings
+# MAGIC - **racy timestamps**: a folder changed within the same clock tick as the scan can keep the same mtime. Like git's
+# MAGIC   index, folders whose mtime is not older than the previous scan start are always listed again
+
+# COMMAND ----------
+
+# DBTITLE 1, FileIndex
+class FileIndex:
+    VERSION = 1
+
+    def __init__(self, root, path=None):
+        self.root = os.path.abspath(root)
+        self.path = path
+        self.dirs = {}
+        self.scanned_at = 0                             # time.time_ns() when the last scan started
+        self.errors = []
+        self.stats = {"listed": 0, "reused": 0, "restatted": 0}
+
+    # -- building -----------------------------------------------------------------------------------------------------
+    def scan(self, workers=8):
+        """Full scan of the tree, ignoring what is stored."""
+        return self._walk(workers, reuse=None)
+
+    def refresh(self, workers=8, check_files=False):
+        """Re-list only folders whose mtime changed since the last scan (optionally re-stat files in the others)."""
+        previous, cutoff = self.dirs, self.scanned_at
+        if not previous:
+            return self.scan(workers)
+
+        def reuse(rel, dir_mtime):
+            stored = previous.get(rel)
+            if stored is None or stored[0] != dir_mtime or dir_mtime >= cutoff:
+                return None
+            if check_files:
+                return self._restat(rel, stored)
+            return stored
+
+        return self._walk(workers, reuse)
+
+    def _walk(self, workers, reuse):
+        started = time.time_ns()
+        self.errors = []
+        counted = reuse
+        if reuse is not None:
+            def counted(rel, dir_mtime):
+                stored = reuse(rel, dir_mtime)
+                self.stats["reused" if stored is not None else "listed"] += 1
+                return stored
+        self.stats = {"listed": 0, "reused": 0, "restatted": 0}
+        self.dirs = walk(self.root, workers, counted, self.errors)
+        if reuse is None:
+            self.stats["listed"] = len(self.dirs)
+        self.scanned_at = started
+        return self
+
+    def _restat(self, rel, stored):
+        dir_mtime, subdirs, (names, sizes, mtimes, inodes) = stored
+        folder = self.root if rel == "." else os.path.join(self.root, rel)
+        new = [[], [], [], []]
+        for name in names:
+            try:
+                st = os.stat(os.path.join(folder, name), follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            for column, value in zip(new, (name, st.st_size, st.st_mtime_ns, st.st_ino)):
+                column.append(value)
+        self.stats["restatted"] += len(names)
+        return dir_mtime, subdirs, new
+
+    # -- persistence --------------------------------------------------------------------------------------------------
+    def save(self, path=None):
+        path = path or self.path or os.path.join(self.root, ".file_index.json")
+        doc = {"version": self.VERSION, "root": self.root, "scanned_at": self.scanned_at, "dirs": self.dirs}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(doc, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.path = path
+        return path
+
+    @classmethod
+    def load(cls, path, root=None):
+        with open(path, encoding="utf-8") as f:
+            doc = json.load(f)
+        if doc.get("version") != cls.VERSION:
+            raise ValueError(f"{path}: index version {doc.get('version')!r}, expected {cls.VERSION}")
+        index = cls(root or doc["root"], path)
+        if index.root == os.path.abspath(doc["root"]):
+            index.dirs = {rel: tuple(scanned) for rel, scanned in doc["dirs"].items()}
+            index.scanned_at = doc["scanned_at"]
+        return index                                    # a different root starts empty: refresh() does a full scan
+
+    # -- queries ------------------------------------------------------------------------------------------------------
+    def __len__(self):
+        return sum(len(scanned[2][0]) for scanned in self.dirs.values())
+
+    def __iter__(self):
+        for rel, (_, _, (names, sizes, mtimes, inodes)) in self.dirs.items():
+            for name, size, mtime, inode in zip(names, sizes, mtimes, inodes):
+                yield FileEntry(name if rel == "." else os.path.join(rel, name), size, mtime, inode)
+
+    def total_size(self):
+        return sum(sum(scanned[2][1]) for scanned in self.dirs.values())
+
+    def largest(self, n=10):
+        return self._top(n, 1)
+
+    def newest(self, n=1):
+        return self._top(n, 2)
+
+    def _top(self, n, column):
+        # best n per folder first (C-level heapq over one list), then the best n overall: no FileEntry per file
+        candidates = []
+        for rel, (_, _, columns) in self.dirs.items():
+            values = columns[column]
+            if len(values) > n:
+                best = heapq.nlargest(n, range(len(values)), key=values.__getitem__)
+            else:
+                best = range(len(values))
+            candidates.extend((values[i], rel, i) for i in best)
+        result = []
+        for _, rel, i in heapq.nlargest(n, candidates):
+            names, sizes, mtimes, inodes = self.dirs[rel][2]
+            result.append(FileEntry(names[i] if rel == "." else os.path.join(rel, names[i]),
+                                    sizes[i], mtimes[i], inodes[i]))
+        return result
+
+
+index = FileIndex(workdir).scan()
+print(len(index), "files,", index.total_size(), "bytes")
+print("newest :", index.newest())
+print("largest:", index.largest(2))
+index_dir = tempfile.mkdtemp()                          # outside the tree, so saving does not change it
+saved = index.save(os.path.join(index_dir, "notes.index.json"))
+print("saved to", saved)
+
+# COMMAND ----------
+
+# DBTITLE 1, Refresh After Changes
+time.sleep(0.01)
+with open(os.path.join(workdir, "logs", "2025", "errors.log"), "w") as f:
+    f.write("disk full\n")
+
+again = FileIndex.load(saved)
+again.refresh()
+print(again.stats, "->", len(again), "files")
+print("newest :", again.newest()[0].path)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Timing: 200,000 Files in 2,000 Folders
+# MAGIC
+# MAGIC - **notebook style**: `os.walk` plus `os.path.getmtime` / `getsize` per file. Newest, largest 10 and total size
+# MAGIC   each make their own pass, as three separate "one-liners" would
+# MAGIC - `FileIndex.scan()` with 1 and with 8 threads, then the three queries
+# MAGIC - `FileIndex.load()` plus `refresh()` after 20 folders changed
+# MAGIC
+# MAGIC ⚠️ The tree is freshly created, so it is in the page cache. The numbers below come from a machine where
+# MAGIC `os.cpu_count()` is 1. On cold disks and network shares, where every `stat` waits for the OS, the gap between 1
+# MAGIC and 8 threads is much larger.
+
+# COMMAND ----------
+
+# DBTITLE 1, Create the Tree
+bench_root = os.path.join(workdir, "lake")
+for d in range(2_000):
+    folder = os.path.join(bench_root, f"year={2020 + d % 5}", f"part_{d:04d}")
+    os.makedirs(folder)
+    for i in range(100):
+        with open(os.path.join(folder, f"file_{i:03d}.csv"), "wb") as f:
+            f.write(b"x" * ((d * 100 + i) % 997))
+print("files:", sum(len(files) for _, _, files in os.walk(bench_root)), "cores:", os.cpu_count())
+
+# COMMAND ----------
+
+# DBTITLE 1, Notebook Style vs FileIndex
+def notebook_style(root):
+    paths = [os.path.join(d, name) for d, _, files in os.walk(root) for name in files]
+    newest = max(paths, key=os.path.getmtime)
+    largest = sorted(paths, key=os.path.getsize, reverse=True)[:10]
+    total = sum(os.path.getsize(p) for p in paths)
+    return newest, largest, total
+
+
+start = time.perf_counter()
+newest, largest, total = notebook_style(bench_root)
+t_naive = time.perf_counter() - start
+
+timings = {}
+for workers in (1, 8):
+    start = time.perf_counter()
+    lake = FileIndex(bench_root).scan(workers=workers)
+    timings[workers] = time.perf_counter() - start
+
+start = time.perf_counter()
+answers = lake.newest()[0], lake.largest(10), lake.total_size()
+t_query = time.perf_counter() - start
+
+index_path = os.path.join(index_dir, "lake.index.json")
+start = time.perf_counter()
+lake.save(index_path)
+t_save = time.perf_counter() - start
+
+changed = sorted(lake.dirs)[1::100][:20]
+time.sleep(0.01)
+for rel in changed:
+    with open(os.path.join(bench_root, rel, "new.csv"), "w") as f:
+        f.write("id,value\n")
+
+start = time.perf_counter()
+lake = FileIndex.load(index_path)
+t_load = time.perf_counter() - start
+start = time.perf_counter()
+lake.refresh()
+t_refresh = time.perf_counter() - start
+
+print(f"notebook style (3 passes)   : {t_naive:6.2f}s")
+for workers, seconds in timings.items():
+    print(f"scan, {workers} thread(s)         : {seconds:6.2f}s")
+print(f"newest + largest + total    : {t_query:6.3f}s   total matches: {answers[2] == total}")
+print(f"save / load index           : {t_save:6.2f}s / {t_load:.2f}s   ({os.path.getsize(index_path) / 1024 / 1024:.1f} MB)")
+print(f"refresh, 20 folders changed : {t_refresh:6.2f}s   {lake.stats}")
+print("newest after refresh        :", lake.newest()[0].path)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC Measured (200,000 files, 2,006 folders, warm cache, 1 core):
+# MAGIC
+# MAGIC | Step | Time |
+# MAGIC |------|------|
+# MAGIC | notebook style, 3 passes | 1.12s |
+# MAGIC | `scan()`, 1 thread / 8 threads | 0.78s / 0.50s |
+# MAGIC | newest + largest 10 + total size from the index | 0.04s |
+# MAGIC | `save()` / `load()` (9.3 MB JSON) | 0.24s / 0.09s |
+# MAGIC | `load()` + `refresh()` with 20 changed folders | 0.12s (20 listed, 1,986 reused) |
+# MAGIC
+# MAGIC What to take from it:
+# MAGIC - **one `stat` per file instead of several**. `scandir` answers "file or folder?" from the listing, and the single
+# MAGIC   `stat` gives size and mtime together. This is where the first pass saves most of its time
+# MAGIC - **queries are free once the index exists**. Each further question ("largest 10 under `year=2023`", "total per
+# MAGIC   folder") is a loop over lists in memory, not another walk
+# MAGIC - **`refresh()` pays one `stat` per folder** plus a listing for the changed ones. For a million files in 10,000
+# MAGIC   folders that is ~10,000 `stat` calls instead of a million
+# MAGIC - **threads** helped even here (~1.6×): while one thread is inside a `scandir` or `stat` system call, the GIL is
+# MAGIC   free for another to run Python. The gain grows when the OS makes us wait (network drives, cold disks)
+
+# COMMAND ----------
+
+# DBTITLE 1, Clean Up
+shutil.rmtree(workdir)
+shutil.rmtree(index_dir)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Old way | Problem | New way |
+# MAGIC |---------|---------|---------|
+# MAGIC | `os.listdir` + `isfile` + `getmtime` | 2+ `stat` calls per file | `os.scandir`: type from the listing, one cached `stat` |
+# MAGIC | non-recursive, one thread | misses subfolders, waits on every call | `walk()`: every folder to a `ThreadPoolExecutor` |
+# MAGIC | a new walk for every question | newest, largest, total = 3 passes | `FileIndex`: one scan, queries in memory |
+# MAGIC | walk again tomorrow | same cost every time | `save()` / `load()` + `refresh()`: re-list only changed folders |
+# MAGIC | in-place edits | folder mtime unchanged | `refresh(check_files=True)` re-stats files |
+# MAGIC
+# MAGIC ```
+# MAGIC index = FileIndex("/data/lake").scan(workers=16)
+# MAGIC index.save("/data/lake.index.json")
+# MAGIC
+# MAGIC index = FileIndex.load("/data/lake.index.json").refresh()
+# MAGIC index.newest(5), index.largest(10), index.total_size()
+# MAGIC ```
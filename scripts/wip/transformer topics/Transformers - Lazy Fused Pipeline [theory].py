@@ -0,0 +1,290 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **A Lazy, Fused Pipeline: `Pipeline(data).filter(...).map(...).reduce(...)`**
+# MAGIC
+# MAGIC Question 10 of the lambda practice notebook chains two transformer functions:
+# MAGIC
+# MAGIC ```
+# MAGIC list(map(lambda t: t["user"], filter(lambda t: t["amt"] >= 100, transactions)))
+# MAGIC ```
+# MAGIC
+# MAGIC `map` and `filter` are already **lazy** (they are iterators), which is good for memory.
+# MAGIC But every element still passes through **each layer** separately:
+# MAGIC
+# MAGIC ```
+# MAGIC list() → map.__next__ → filter.__next__ → transactions iterator
+# MAGIC ```
+# MAGIC
+# MAGIC With 5 chained stages, each element makes 5 trips through iterator machinery.
+# MAGIC
+# MAGIC **Operator fusion** means: turn neighbouring stages into **one loop**:
+# MAGIC
+# MAGIC ```
+# MAGIC for t in transactions:
+# MAGIC     if not (t["amt"] >= 100): continue
+# MAGIC     yield t["user"]
+# MAGIC ```
+# MAGIC
+# MAGIC Our `Pipeline` records stages, then **generates** the source code of that single loop (like the generated
+# MAGIC `__init__` in the decorators lesson) and runs it over any iterable — one pass, no intermediate lists.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. Stages and Barriers
+# MAGIC
+# MAGIC | Stage | Kind | Fusable? |
+# MAGIC |-------|------|----------|
+# MAGIC | `.map(fn)` | element-wise | ✅ |
+# MAGIC | `.filter(fn)` | element-wise | ✅ |
+# MAGIC | `.sorted(key, reverse)` | needs **all** elements first | ❌ barrier |
+# MAGIC | `.reduce(fn, initial)` | terminal | ✅ fused into the last loop |
+# MAGIC
+# MAGIC A **barrier** splits the pipeline into **segments**. Each segment becomes one generated loop.
+
+# COMMAND ----------
+
+# DBTITLE 1, Pipeline Class
+import time
+import functools
+
+_NO_INITIAL = object()
+
+
+def _label(fn):
+    return getattr(fn, "__name__", repr(fn))
+
+
+class Pipeline:
+    def __init__(self, source, stages=()):
+        self.source = source
+        self.stages = tuple(stages)
+
+    def _add(self, *stage):
+        return Pipeline(self.source, self.stages + (stage,))
+
+    # ---- recording stages (nothing runs yet) ----
+    def map(self, fn):
+        return self._add("map", fn)
+
+    def filter(self, fn):
+        return self._add("filter", fn)
+
+    def sorted(self, key=None, reverse=False):
+        return self._add("sorted", key, reverse)
+
+    # ---- planning ----
+    def _segments(self):
+        """Split stages at barriers → [("loop", [stages...]), ("sorted", key, reverse), ...]."""
+        plan, current = [], []
+        for stage in self.stages:
+            if stage[0] == "sorted":
+                if current:
+                    plan.append(("loop", current))
+                    current = []
+                plan.append(stage)
+            else:
+                current.append(stage)
+        if current:
+            plan.append(("loop", current))
+        return plan
+
+    def explain(self):
+        lines = [f"source: {type(self.source).__name__}"]
+        for step in self._segments():
+            if step[0] == "loop":
+                ops = " → ".join(f"{kind}({_label(fn)})" for kind, fn in step[1])
+                lines.append(f"fused loop [{ops}]")
+            else:
+                lines.append(f"barrier: sorted(key={_label(step[1]) if step[1] else None}, reverse={step[2]})")
+        return "\n".join(lines)
+
+    # ---- running ----
+    def __iter__(self):
+        it = iter(self.source)
+        for step in self._segments():
+            if step[0] == "loop":
+                it = _compile_loop(step[1], terminal=None)(it, *[fn for _, fn in step[1]])
+            else:
+                it = iter(sorted(it, key=step[1], reverse=step[2]))
+        return it
+
+    def collect(self):
+        return list(self)
+
+    def reduce(self, fn, initial=_NO_INITIAL):
+        segments = self._segments()
+        if segments and segments[-1][0] == "loop":           # fuse the reduce into the last loop
+            body = segments[-1][1]
+            source = iter(Pipeline(self.source, self.stages[:len(self.stages) - len(body)]))
+            loop = _compile_loop(body, terminal="reduce")
+            fns = [f for _, f in body]
+        else:
+            source, loop, fns = iter(self), _compile_loop([], terminal="reduce"), []
+        return loop(source, *fns, fn, initial)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. Generating the Fused Loop
+# MAGIC
+# MAGIC Each stage contributes one or two lines. The stage functions are passed in as **arguments**, so inside the loop
+# MAGIC they are fast local variables. Generated functions are cached by their "shape" (the list of stage kinds),
+# MAGIC so `exec` runs only once per shape.
+
+# COMMAND ----------
+
+# DBTITLE 1, Loop Code Generator
+@functools.lru_cache(maxsize=256)
+def _compile_loop_cached(kinds, terminal):
+    params = ["_source"] + [f"_f{i}" for i in range(len(kinds))]
+    lines = []
+    for i, kind in enumerate(kinds):
+        if kind == "map":
+            lines.append(f"x = _f{i}(x)")
+        else:
+            lines.append(f"if not _f{i}(x):")
+            lines.append("    continue")
+
+    if terminal == "reduce":
+        params += ["_fn", "_initial"]
+        head = [
+            "_it = iter(_source)",
+            "if _initial is _NO_INITIAL:",
+            "    for x in _it:",
+            *[f"        {line}" for line in lines],
+            "        acc = x",
+            "        break",
+            "    else:",
+            "        raise TypeError('reduce() of empty iterable with no initial value')",
+            "else:",
+            "    acc = _initial",
+            "for x in _it:",
+            *[f"    {line}" for line in lines],
+            "    acc = _fn(acc, x)",
+            "return acc",
+        ]
+    else:
+        head = ["for x in _source:", *[f"    {line}" for line in lines], "    yield x"]
+
+    source = f"def _fused({', '.join(params)}):\n" + "\n".join(f"    {line}" for line in head)
+    namespace = {"_NO_INITIAL": _NO_INITIAL}
+    exec(source, namespace)
+    fused = namespace["_fused"]
+    fused.__source__ = source
+    return fused
+
+
+def _compile_loop(stages, terminal):
+    return _compile_loop_cached(tuple(kind for kind, _ in stages), terminal)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. Question 10 and Question 18 as Pipelines
+
+# COMMAND ----------
+
+# DBTITLE 1, Question 10: filter → map
+transactions = [
+    {"user": "A", "amt": 100},
+    {"user": "B", "amt": 30},
+    {"user": "A", "amt": 200},
+    {"user": "C", "amt": 20},
+]
+
+q10 = Pipeline(transactions).filter(lambda t: t["amt"] >= 100).map(lambda t: t["user"])
+print(q10.explain())
+print(q10.collect())
+print(_compile_loop(q10._segments()[0][1], None).__source__)
+
+# COMMAND ----------
+
+# DBTITLE 1, Question 18: sorted → map (sorted is a barrier)
+scores = {"Alice": 88, "Bob": 92, "Charlie": 85}
+
+q18 = Pipeline(scores.items()).sorted(key=lambda kv: kv[1], reverse=True).map(lambda kv: kv[0])
+print(q18.explain())
+print(q18.collect())
+
+# COMMAND ----------
+
+# DBTITLE 1, Fused reduce: total amount of big transactions
+total = Pipeline(transactions).filter(lambda t: t["amt"] >= 100).map(lambda t: t["amt"]).reduce(lambda a, b: a + b, 0)
+print(total)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Streaming: O(1) Memory
+# MAGIC
+# MAGIC The source can be **any iterable** — even a generator that produces an endless log.
+# MAGIC Nothing is stored between stages (except at a `sorted` barrier, which by definition needs all elements).
+
+# COMMAND ----------
+
+# DBTITLE 1, Streaming from a Generator
+import random
+import tracemalloc
+
+def transaction_log(n):
+    rnd = random.Random(42)
+    for i in range(n):
+        yield {"user": f"u{i % 1000}", "amt": rnd.randint(1, 500)}
+
+tracemalloc.start()
+big_total = (Pipeline(transaction_log(1_000_000))
+             .filter(lambda t: t["amt"] >= 100)
+             .map(lambda t: t["amt"])
+             .reduce(lambda a, b: a + b, 0))
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+print(f"total = {big_total}, peak extra memory = {peak / 1024:.1f} KiB")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 5. Fused vs Chained Iterators
+
+# COMMAND ----------
+
+# DBTITLE 1, Benchmark on a Long Chain
+log = list(transaction_log(1_000_000))
+is_big = lambda t: t["amt"] >= 100
+get_amt = lambda t: t["amt"]
+is_even = lambda a: a % 2 == 0
+halve = lambda a: a // 2
+add = lambda a, b: a + b
+
+start = time.perf_counter()
+chained = functools.reduce(add, map(halve, filter(is_even, map(get_amt, filter(is_big, log)))), 0)
+t_chained = time.perf_counter() - start
+
+pipe = Pipeline(log).filter(is_big).map(get_amt).filter(is_even).map(halve)
+start = time.perf_counter()
+fused = pipe.reduce(add, 0)
+t_fused = time.perf_counter() - start
+
+print(pipe.explain())
+print(f"chained map/filter/reduce: {t_chained:.3f}s")
+print(f"fused pipeline           : {t_fused:.3f}s   same result: {chained == fused}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ✅ The lambdas themselves are still called once per element — fusion removes the **iterator layers between them**.
+# MAGIC The longer the chain, the bigger the saving.
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Method | Meaning |
+# MAGIC |--------|---------|
+# MAGIC | `Pipeline(iterable)` | Start a lazy pipeline (nothing runs yet) |
+# MAGIC | `.map(fn)` / `.filter(fn)` | Element-wise stages, fused into one loop |
+# MAGIC | `.sorted(key, reverse)` | Barrier: collects everything, then continues |
+# MAGIC | `.collect()` / `for x in pipeline` | Run and get results |
+# MAGIC | `.reduce(fn, initial)` | Run and fold, fused into the last loop |
+# MAGIC | `.explain()` | Show the fused plan |
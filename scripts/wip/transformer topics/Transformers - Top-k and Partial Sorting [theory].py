@@ -0,0 +1,266 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # **Top-k Instead of Full Sorting**
+# MAGIC
+# MAGIC Questions 16–20 of the lambda practice always **sort everything**:
+# MAGIC
+# MAGIC ```
+# MAGIC sorted(employees, key=lambda t: t[1], reverse=True)
+# MAGIC sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+# MAGIC ```
+# MAGIC
+# MAGIC Often we only need the **top few** rows (a leaderboard's top 10).
+# MAGIC Sorting 50 million scores to show 10 of them wastes time **and** memory:
+# MAGIC
+# MAGIC | Approach | Time | Extra memory |
+# MAGIC |----------|------|--------------|
+# MAGIC | `sorted(data, ...)[:k]` | O(n log n) | O(n) — a full sorted copy |
+# MAGIC | heap of size k | O(n log k) | O(k) |
+# MAGIC
+# MAGIC In this lesson:
+# MAGIC 1. `top_k(iterable, k, key, reverse)` — heap-based selection
+# MAGIC 2. `merge_sorted(*runs, key, reverse, limit)` — stream-merge runs that are **already sorted**
+# MAGIC 3. `Leaderboard` — compute keys **once**, then answer many top-k queries cheaply
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 1. How a Size-k Heap Finds the Largest k
+# MAGIC
+# MAGIC Keep a **min-heap** with the best k seen so far. Its root (`heap[0]`) is the **weakest** of the top k.
+# MAGIC
+# MAGIC For every new element:
+# MAGIC - not better than the root → ignore it (most elements, very cheap)
+# MAGIC - better → replace the root (`heapreplace`, O(log k))
+# MAGIC
+# MAGIC We store `(key, -position, item)` so that items are never compared directly, and on equal keys the **earlier**
+# MAGIC element wins — exactly like the stable `sorted(..., reverse=True)`.
+
+# COMMAND ----------
+
+# DBTITLE 1, Manual Heap Selection (to See the Idea)
+import time
+import heapq
+import random
+import itertools
+import tracemalloc
+
+def largest_k_manual(iterable, k, key):
+    heap = []
+    for pos, item in enumerate(iterable):
+        entry = (key(item), -pos, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+    return [item for _, _, item in sorted(heap, reverse=True)]
+
+employees = (("A", 30), ("B", 24), ("C", 29), ("D", 30))
+print(largest_k_manual(employees, 2, key=lambda t: t[1]))
+print(sorted(employees, key=lambda t: t[1], reverse=True)[:2])   # same answer
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 2. `top_k`
+# MAGIC
+# MAGIC The standard library already ships this algorithm, with the heap operations written in C:
+# MAGIC `heapq.nlargest` / `heapq.nsmallest`. Both are documented to return the same as `sorted(...)[:k]`
+# MAGIC (including the order of ties), and they call `key` **once per element**.
+# MAGIC
+# MAGIC `top_k` just gives them the familiar `sorted`-style signature.
+
+# COMMAND ----------
+
+# DBTITLE 1, top_k
+def top_k(iterable, k, key=None, reverse=False):
+    """Same result as sorted(iterable, key=key, reverse=reverse)[:k], in O(n log k) time and O(k) memory."""
+    if k <= 0:
+        return []
+    if reverse:
+        return heapq.nlargest(k, iterable, key=key)
+    return heapq.nsmallest(k, iterable, key=key)
+
+# Question 17: top 2 employees by age
+print(top_k((("A", 30), ("B", 24), ("C", 29)), 2, key=lambda t: t[1], reverse=True))
+
+# Question 18: best 2 names by score
+scores = {"Alice": 88, "Bob": 92, "Charlie": 85}
+print([name for name, _ in top_k(scores.items(), 2, key=lambda kv: kv[1], reverse=True)])
+
+# Question 19: 3 shortest tags
+print(top_k({"python", "java", "c", "javascript", "go"}, 3, key=len))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 3. `merge_sorted` — Merging Pre-Sorted Runs
+# MAGIC
+# MAGIC If data arrives as several **already sorted** pieces (one per day, one per server, one per file),
+# MAGIC we do not need to sort again. `heapq.merge` walks all runs at once, always taking the smallest head —
+# MAGIC it is **lazy**, so with `limit=k` we stop after k items and never read the rest.
+
+# COMMAND ----------
+
+# DBTITLE 1, merge_sorted
+def merge_sorted(*runs, key=None, reverse=False, limit=None):
+    merged = heapq.merge(*runs, key=key, reverse=reverse)
+    return merged if limit is None else itertools.islice(merged, limit)
+
+monday = [("asha", 99), ("ravi", 91), ("sunny", 70)]          # each run sorted by score, descending
+tuesday = [("naveen", 97), ("pavan", 95), ("gowtham", 60)]
+print(list(merge_sorted(monday, tuesday, key=lambda t: t[1], reverse=True, limit=4)))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 4. Computing Keys Once: `Leaderboard`
+# MAGIC
+# MAGIC `sorted` already computes each key **once** per call (decorate-sort-undecorate happens inside).
+# MAGIC But if we ask **many** questions of the same data (top 10, top 100, bottom 5, ...), each call recomputes every key.
+# MAGIC
+# MAGIC `Leaderboard` computes the keys **once**, stores them in a list, and from then on works with **row positions**.
+# MAGIC `keys.__getitem__` is a C function, so using it as the heap key is much cheaper than calling a lambda.
+# MAGIC With NumPy installed and numeric keys, `np.argpartition` finds the top k in **O(n)**
+# MAGIC (`use_numpy=False` turns this off).
+
+# COMMAND ----------
+
+# DBTITLE 1, Leaderboard with Precomputed Keys
+try:
+    import numpy as np
+except ImportError:                     # NumPy is optional
+    np = None
+
+
+FLOAT64_EXACT = 2**53                   # every int up to this size is exact as a float64
+
+
+def _float64_keys(keys):
+    """keys as a float64 array if float64 orders them exactly like Python does, else None."""
+    try:
+        arr = np.asarray(keys)          # str, None, ints beyond int64, ... give a non-numeric dtype
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if arr.ndim != 1 or arr.dtype.kind not in "if":
+        return None
+    if arr.dtype.kind == "i" and (arr.min() < -FLOAT64_EXACT or arr.max() > FLOAT64_EXACT):
+        return None
+    if arr.dtype.kind == "f" and not all(type(k) is not int or -FLOAT64_EXACT <= k <= FLOAT64_EXACT
+                                         for k in keys):
+        return None                     # a big int mixed with floats was already rounded
+    return arr.astype(np.float64, copy=False)
+
+
+class Leaderboard:
+    def __init__(self, items, key, use_numpy=True):
+        self.items = items if isinstance(items, list) else list(items)
+        self.keys = [key(item) for item in self.items]            # the only calls to key()
+        self._np_keys = None
+        if use_numpy and np is not None and self.keys:
+            self._np_keys = _float64_keys(self.keys)
+
+    def _top_positions(self, k, reverse):
+        n = len(self.keys)
+        if self._np_keys is not None and 0 < k < n:
+            keys = -self._np_keys if reverse else self._np_keys
+            kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+            # argpartition picks any of the rows tied with the k-th key: take the earliest ones, like sorted()
+            better = np.flatnonzero(keys < kth)
+            candidates = np.concatenate((better, np.flatnonzero(keys == kth)[:k - len(better)]))
+            # stable order among equal keys: sort by (key, position)
+            return candidates[np.lexsort((candidates, keys[candidates]))].tolist()
+        positions = range(n)
+        pick = heapq.nlargest if reverse else heapq.nsmallest
+        return pick(k, positions, key=self.keys.__getitem__)
+
+    def top(self, k, reverse=True):
+        return [self.items[i] for i in self._top_positions(k, reverse)]
+
+    def sorted(self, reverse=False):
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__, reverse=reverse)
+        return [self.items[i] for i in order]
+
+
+board = Leaderboard(scores.items(), key=lambda kv: kv[1])
+print(board.top(2), board.top(1, reverse=False), board.sorted(reverse=True))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ⚠️ The NumPy path compares keys as `float64`, which is exact for scores and ints up to 2**53.
+# MAGIC All keys are checked when the `Leaderboard` is built: bigger ints, or any key that is not a number,
+# MAGIC and it uses `heapq` instead.
+
+# COMMAND ----------
+
+# DBTITLE 1, Keys float64 Cannot Compare
+big = [("a", 2**60 + 1), ("b", 2**60), ("c", 2**60 + 2)]           # equal as float64
+print(Leaderboard(big, key=lambda t: t[1]).top(1))
+mixed = [(i, i) for i in range(2000)] + [("x", "late text key")]    # a str after position 1000
+try:
+    Leaderboard(mixed, key=lambda t: t[1]).top(3)
+except TypeError as exc:
+    print("TypeError:", exc)                                         # same error as sorted() gives
+print(Leaderboard(scores.items(), key=lambda kv: kv[1], use_numpy=False).top(2))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## 5. Leaderboard Benchmark (2 Million Entries)
+
+# COMMAND ----------
+
+# DBTITLE 1, Full Sort vs top_k vs Leaderboard
+N, K = 2_000_000, 10
+random.seed(7)
+entries = [(f"player{i}", random.randint(0, 1_000_000)) for i in range(N)]
+score = lambda t: t[1]
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<38} {time.perf_counter() - start:6.3f}s")
+    return result
+
+a = timed("sorted(..., reverse=True)[:10]", lambda: sorted(entries, key=score, reverse=True)[:K])
+b = timed("top_k(..., 10, reverse=True)", lambda: top_k(entries, K, key=score, reverse=True))
+board = timed("Leaderboard(...) (keys computed once)", lambda: Leaderboard(entries, key=score))
+c = timed("board.top(10)", lambda: board.top(K))
+print("same top 10:", a == b == c)
+
+ties = [(f"player{i}", random.randint(0, 5)) for i in range(N)]     # scores 0..5: every top 10 is a tie
+tied_board = Leaderboard(ties, key=score)
+print("same top 10 with ties:", sorted(ties, key=score, reverse=True)[:K] == tied_board.top(K),
+      sorted(ties, key=score)[:K] == tied_board.top(K, reverse=False))
+
+# COMMAND ----------
+
+# DBTITLE 1, Memory: Full Sort vs Streaming top_k
+def score_stream(n):
+    rnd = random.Random(7)
+    for i in range(n):
+        yield (f"player{i}", rnd.randint(0, 1_000_000))
+
+def peak_memory(label, fn):
+    tracemalloc.start()            # tracemalloc slows allocations down a lot, so only memory is reported here
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<38} peak extra memory {peak / 1024 / 1024:7.2f} MiB")
+
+M = 200_000
+peak_memory("sorted(generator)[:10]", lambda: sorted(score_stream(M), key=score, reverse=True)[:K])
+peak_memory("top_k(generator, 10)", lambda: top_k(score_stream(M), K, key=score, reverse=True))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # ✅ Summary
+# MAGIC
+# MAGIC | Need | Use | Cost |
+# MAGIC |------|-----|------|
+# MAGIC | Top k of anything | `top_k(iterable, k, key, reverse)` | O(n log k) time, O(k) memory |
+# MAGIC | Combine already sorted runs | `merge_sorted(*runs, key, reverse, limit)` | Lazy, reads only what is needed |
+# MAGIC | Many queries on the same data | `Leaderboard(items, key)` | Keys computed once; O(n) with NumPy |
+# MAGIC | Everything in order | `sorted(...)` | Still the right tool! |